@@ -1,43 +1,102 @@
-from django.core.management import BaseCommand
-from bot.models import TgUser
-from bot.tg.client import TgClient, logger
-from bot.tg.schemas import Message
+import asyncio
+from datetime import timedelta
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.db import close_old_connections
+from bot.models import TgUpdate, TgUser
+from bot.tg.client import TgClient, TgClientError, logger
+from bot.tg.dispatcher import UpdateDispatcher
+from bot.tg.schemas import Message, UpdateObj
+from bot.tg.sender import get_sender
+from bot.tg.state import TgBotStatus, get_state_store
 from goals.models import Goal, GoalCategory
 
 
-class TgBotStatus:
-
-    STOK = 0
-    CAT_CHOICE = 1
-    GOAL_CREATE = 2
-
-    def __init__(self, status_b=STOK, category_id=None):
-        self.status_b = status_b
-        self.category_id = category_id
-
-    def set_status_b(self, status_b):
-        self.status_b = status_b
-
-    def set_category_id(self, category_id):
-        self.category_id = category_id
-
-BOT_STATUS = TgBotStatus()
-
 class Command(BaseCommand):
+    # пауза после ошибки опроса удваивается до poll_max_delay
+    poll_delay = 1
+    poll_max_delay = 60
+    # неверный токен или зарегистрированный webhook: повторять опрос бессмысленно
+    poll_fatal_statuses = (401, 409)
+    webhook_batch_size = 100
+    webhook_poll_interval = 0.5
+    # за это время воркер должен обработать закрепленные за ним обновления, иначе их заберет другой
+    webhook_lease = timedelta(minutes=5)
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.tg_client = TgClient()
+        self.sender = get_sender()
+        self.state_store = get_state_store()
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=settings.BOT_CONCURRENCY,
+            help='Сколько сообщений разных чатов обрабатывается одновременно',
+        )
+        parser.add_argument(
+            '--webhook', action='store_true',
+            help='Обрабатывать обновления, принятые через bot/webhook, вместо long polling',
+        )
+        parser.add_argument('--webhook-url', help='Зарегистрировать webhook в Telegram по этому адресу')
 
     def handle(self, *args, **options):
+        if options['webhook_url']:
+            self.tg_client.set_webhook(options['webhook_url'], settings.BOT_WEBHOOK_SECRET)
+
+        dispatcher = UpdateDispatcher(self.handle_message, concurrency=options['concurrency'])
+        source = self.drain if options['webhook'] else self.poll
+        try:
+            asyncio.run(source(dispatcher))
+        finally:
+            dispatcher.close()
+            self.sender.close(timeout=10)
+
+    async def poll(self, dispatcher: UpdateDispatcher):
+        """long polling в отдельном потоке, обработка не задерживает получение обновлений"""
         offset = 0
+        delay = self.poll_delay
 
         logger.info('Бот готов к работе')
         while True:
-            res = self.tg_client.get_updates(offset=offset)
+            try:
+                res = await asyncio.to_thread(self.tg_client.get_updates, offset=offset)
+            except TgClientError as e:
+                if e.status_code in self.poll_fatal_statuses:
+                    raise CommandError(f'{e}: проверьте BOT_TOKEN или удалите webhook, либо запустите runbot --webhook')
+                # ошибки без повторов в клиенте возвращаются сразу, опрос не должен крутиться без пауз
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.poll_max_delay)
+                continue
+            delay = self.poll_delay
+
             for item in res.result:
                 offset = item.update_id + 1
-                self.handle_message(item.message)
+                dispatcher.dispatch(item)
+
+    async def drain(self, dispatcher: UpdateDispatcher):
+        """обновления из очереди TgUpdate, которую заполняет WebhookView; процессов может быть несколько"""
+        logger.info('Бот готов к работе, обновления через webhook')
+        while True:
+            # закрепляем не больше, чем диспетчер успеет начать обрабатывать,
+            # иначе аренда истечет в очереди и обновление обработает второй воркер
+            limit = min(self.webhook_batch_size, dispatcher.concurrency - dispatcher.pending)
+            if limit <= 0:
+                await asyncio.sleep(self.webhook_poll_interval)
+                continue
+            updates = await asyncio.to_thread(self.claim_updates, limit)
+            for update in updates:
+                # обновление удаляется из очереди только после успешной обработки
+                dispatcher.dispatch(UpdateObj.parse_obj(update.payload), done=update.delete)
+            if len(updates) < limit:
+                await asyncio.sleep(self.webhook_poll_interval)
+
+    def claim_updates(self, limit: int) -> list[TgUpdate]:
+        close_old_connections()
+        try:
+            return TgUpdate.claim(limit, self.webhook_lease)
+        finally:
+            close_old_connections()
 
     def handle_message(self, msg: Message):
         tg_user, created = TgUser.objects.get_or_create(chat_id=msg.chat.id)
@@ -47,25 +106,26 @@ class Command(BaseCommand):
             self.handle_unauthorized_user(tg_user, msg)
 
     def handle_authorized_user(self, tg_user: TgUser, msg: Message):
+        state = self.state_store.get(msg.chat.id)
         if msg.text == '/goals':
             self.processing_request_goals(tg_user, msg)
         elif msg.text == '/create':
             self.processing_goal_creation(tg_user, msg)
         elif msg.text == '/cancel':
             self.cancellation_processing(msg)
-        elif BOT_STATUS.status_b == TgBotStatus.CAT_CHOICE:
-            self.checking_selected_category(msg)
-        elif BOT_STATUS.status_b == TgBotStatus.GOAL_CREATE:
-            self.create_goal(msg, tg_user)
+        elif state.status_b == TgBotStatus.CAT_CHOICE:
+            self.checking_selected_category(tg_user, msg)
+        elif state.status_b == TgBotStatus.GOAL_CREATE:
+            self.create_goal(msg, tg_user, state)
         else:
-            self.tg_client.send_message(chat_id=msg.chat.id, text=f'Неизвестная команда {msg.text}')
+            self.sender.send(chat_id=msg.chat.id, text=f'Неизвестная команда {msg.text}')
 
     def handle_unauthorized_user(self, tg_user: TgUser, msg: Message):
         code = tg_user.generate_verification_code()
         tg_user.verification_code = code
         tg_user.save()
 
-        self.tg_client.send_message(chat_id=msg.chat.id, text=f'Hello! Verification code: {code}')
+        self.sender.send(chat_id=msg.chat.id, text=f'Hello! Verification code: {code}')
 
     def processing_request_goals(self, tg_user: TgUser, msg: Message):
         """все цели участника или владельца доски"""
@@ -77,7 +137,7 @@ class Command(BaseCommand):
 
         goals = '\n'.join([f'# {goal.title}' for goal in qs])
 
-        self.tg_client.send_message(chat_id=msg.chat.id, text='No goals' if not goals else goals)
+        self.sender.send(chat_id=msg.chat.id, text='No goals' if not goals else goals)
 
     def processing_goal_creation(self, tg_user: TgUser, msg: Message):
         """категории участника или владельца доски, выбор категории для новой цели"""
@@ -88,33 +148,39 @@ class Command(BaseCommand):
         categories = '\n'.join([f'-> {cat.title}' for cat in qs])
 
         if not categories:
-            self.tg_client.send_message(chat_id=msg.chat.id, text='Категория не найдена')
-        self.tg_client.send_message(chat_id=msg.chat.id, text=f'Выберете категорию \n{categories}')
+            self.sender.send(chat_id=msg.chat.id, text='Категория не найдена')
+        self.sender.send(chat_id=msg.chat.id, text=f'Выберете категорию \n{categories}')
 
-        BOT_STATUS.set_status_b(TgBotStatus.CAT_CHOICE)
+        self.state_store.set(msg.chat.id, TgBotStatus(status_b=TgBotStatus.CAT_CHOICE))
 
-    def checking_selected_category(self, msg: Message):
-        """если категория существует, бот предлагает добавить цель"""
-        cat = GoalCategory.objects.filter(title=msg.text)
+    def checking_selected_category(self, tg_user: TgUser, msg: Message):
+        """если категория существует на досках пользователя, бот предлагает добавить цель"""
+        cat = GoalCategory.objects.filter(board__participants__user=tg_user.user, title=msg.text, is_deleted=False)
         if cat:
-            self.tg_client.send_message(chat_id=msg.chat.id, text='Введите цель')
-            BOT_STATUS.set_category_id(category_id=cat[0].id)
-            BOT_STATUS.set_status_b(status_b=TgBotStatus.GOAL_CREATE)
+            self.sender.send(chat_id=msg.chat.id, text='Введите цель')
+            self.state_store.set(
+                msg.chat.id, TgBotStatus(status_b=TgBotStatus.GOAL_CREATE, category_id=cat[0].id)
+            )
         else:
-            self.tg_client.send_message(chat_id=msg.chat.id, text=f'Категория "{msg.text}" отсутсвует на доске')
+            self.sender.send(chat_id=msg.chat.id, text=f'Категория "{msg.text}" отсутсвует на доске')
 
-    def create_goal(self, msg, tg_user):
+    def create_goal(self, msg: Message, tg_user: TgUser, state: TgBotStatus):
         """Сохраняет цель в категорию"""
-        cat = GoalCategory.objects.get(pk=BOT_STATUS.category_id)
+        cat = GoalCategory.objects.filter(pk=state.category_id, is_deleted=False).first()
+        if cat is None:
+            # категорию удалили, пока пользователь вводил цель
+            self.state_store.clear(msg.chat.id)
+            self.sender.send(chat_id=msg.chat.id, text='Категория не найдена')
+            return
         goal = Goal.objects.create(
             title=msg.text,
             category=cat,
             user=tg_user.user,
         )
-        self.tg_client.send_message(chat_id=msg.chat.id, text=f'Цель {goal.title} создана')
-        BOT_STATUS.set_status_b(TgBotStatus.STOK)
+        self.sender.send(chat_id=msg.chat.id, text=f'Цель {goal.title} создана')
+        self.state_store.clear(msg.chat.id)
 
     def cancellation_processing(self, msg: Message):
         """команда для отмены"""
-        BOT_STATUS.set_status_b(TgBotStatus.STOK)
-        self.tg_client.send_message(chat_id=msg.chat.id, text='Отмена')
+        self.state_store.clear(msg.chat.id)
+        self.sender.send(chat_id=msg.chat.id, text='Отмена')
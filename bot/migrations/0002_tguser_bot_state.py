@@ -0,0 +1,25 @@
+# Generated by Django 4.2.1 on 2026-10-18 02:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0010_add_search_vector'),
+        ('bot', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tguser',
+            name='bot_category',
+            field=models.ForeignKey(blank=True, default=None, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='goals.goalcategory'),
+        ),
+        migrations.AddField(
+            model_name='tguser',
+            name='bot_status',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
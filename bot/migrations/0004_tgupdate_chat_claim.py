@@ -0,0 +1,34 @@
+# Generated by Django 4.2.1 on 2026-10-18 05:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0003_tgupdate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tgupdate',
+            name='chat_id',
+            field=models.BigIntegerField(db_index=True, default=0),
+            preserve_default=False,
+        ),
+        # обновления, принятые до миграции
+        migrations.RunSQL(
+            "UPDATE bot_tgupdate SET chat_id = (payload -> 'message' -> 'chat' ->> 'id')::bigint",
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddField(
+            model_name='tgupdate',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='tgupdate',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
@@ -1,13 +1,61 @@
-from django.db import models
+import logging
+from datetime import timedelta
+from django.db import connection, models, transaction
+from django.db.models import F
+from django.utils import timezone
 from uuid import uuid4
 from core.models import User
 
+logger = logging.getLogger(__name__)
+
 
 class TgUser(models.Model):
     chat_id = models.BigIntegerField(unique=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, default=None)
     verification_code = models.CharField(max_length=100, null=True, blank=True, default=None)
+    # состояние диалога для DatabaseStateStore
+    bot_status = models.PositiveSmallIntegerField(default=0)
+    bot_category = models.ForeignKey(
+        'goals.GoalCategory', on_delete=models.SET_NULL, null=True, blank=True, default=None, related_name='+'
+    )
 
     @staticmethod
     def generate_verification_code() -> str:
         return str(uuid4())
+
+
+class TgUpdate(models.Model):
+    """очередь обновлений, полученных через webhook, до обработки воркером runbot"""
+    # ключ advisory-блокировки, под которой воркеры по очереди разбирают чаты
+    claim_lock_id = 715420
+
+    update_id = models.BigIntegerField(unique=True)
+    chat_id = models.BigIntegerField(db_index=True)
+    payload = models.JSONField()
+    created = models.DateTimeField(auto_now_add=True)
+    # до какого времени обновление закреплено за воркером; после падения воркера его заберет другой
+    claimed_until = models.DateTimeField(null=True, blank=True, default=None)
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    @staticmethod
+    def claim(limit: int, lease: timedelta, max_attempts: int = 3) -> list['TgUpdate']:
+        """
+        закрепляет за воркером самые ранние обновления чатов, которые сейчас никто не обрабатывает:
+        сообщения одного чата обрабатывает только один воркер, по порядку update_id;
+        обновление удаляется из очереди вызовом delete() после успешной обработки
+        """
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_xact_lock(%s)', [TgUpdate.claim_lock_id])
+            now = timezone.now()
+            expired = TgUpdate.objects.filter(claimed_until__lte=now, attempts__gte=max_attempts)
+            for update_id in expired.values_list('update_id', flat=True):
+                logger.error('Обновление %s не обработано за %s попыток, удалено', update_id, max_attempts)
+            expired.delete()
+
+            busy = TgUpdate.objects.filter(claimed_until__gt=now).values('chat_id')
+            updates = list(TgUpdate.objects.exclude(chat_id__in=busy).order_by('update_id')[:limit])
+            TgUpdate.objects.filter(id__in=[update.id for update in updates]).update(
+                claimed_until=now + lease, attempts=F('attempts') + 1
+            )
+        return updates
@@ -0,0 +1,8 @@
+from bot.tg.client import TgClient
+from tasks.registry import task
+
+
+@task(name='bot.send_message', max_attempts=5)
+def send_message(chat_id: int, text: str) -> None:
+    """сообщение из веб-процесса, при недоступности Telegram задача повторяется"""
+    TgClient().send_message(chat_id=chat_id, text=text)
@@ -1,19 +1,75 @@
 import logging
+import time
+from functools import lru_cache
 from django.conf import settings
 from pydantic import ValidationError
 from bot.tg.schemas import GetUpdatesResponse, SendMessageResponse
+from todolist.metrics import Metrics
 import requests
+from requests.adapters import HTTPAdapter
 
 logger = logging.getLogger(__name__)
 
 
+class TgClientError(RuntimeError):
+    def __init__(self, message: str, status_code: int | None = None):
+        super().__init__(message)
+        # None, если ответа от Telegram не было
+        self.status_code = status_code
+
+
+class RequestMetrics(Metrics):
+    """количество, ошибки, повторы и время запросов к Telegram по методам API"""
+
+    name = 'Telegram API'
+    fields = {'requests': 0, 'errors': 0, 'retries': 0, 'total_time': 0.0, 'max_time': 0.0}
+
+    def observe(self, method: str, seconds: float, error: bool = False) -> None:
+        self.peak(method, max_time=seconds)
+        self.add(method, requests=1, errors=int(error), total_time=seconds)
+
+    def retry(self, method: str) -> None:
+        self.add(method, retries=1)
+
+    def summarize(self, stats: dict[str, float]) -> dict[str, float]:
+        return {**stats, 'avg_time': stats['total_time'] / stats['requests'] if stats['requests'] else 0.0}
+
+
+metrics = RequestMetrics(log_interval=settings.METRICS_LOG_INTERVAL)
+
+
+@lru_cache
+def get_session() -> requests.Session:
+    """общая для процесса сессия: keep-alive соединения к Telegram переиспользуются"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.BOT_HTTP_POOL_SIZE)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
 class TgClient:
+    retry_statuses = (429, 500, 502, 503, 504)
+    metrics = metrics
 
-    def __init__(self, token: str = settings.BOT_TOKEN):
+    def __init__(
+        self,
+        token: str = settings.BOT_TOKEN,
+        base_url: str = settings.BOT_API_URL,
+        session: requests.Session | None = None,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        timeout: float = 10,
+    ):
         self.token = token
+        self.base_url = base_url.rstrip('/')
+        self.session = session or get_session()
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
 
     def get_url(self, method: str) -> str:
-        return f'https://api.telegram.org/bot{self.token}/{method}'
+        return f'{self.base_url}/bot{self.token}/{method}'
 
     def get_updates(self, offset: int = 0, timeout: int = 60) -> GetUpdatesResponse:
         data = self._get(method='getUpdates', offset=offset, timeout=timeout)
@@ -27,10 +83,53 @@ class TgClient:
         data = self._get(method='sendMessage', chat_id=chat_id, text=text)
         return SendMessageResponse(**data)
 
+    def set_webhook(self, url: str, secret_token: str) -> dict:
+        # секрет в теле POST, чтобы он не попадал в логи запросов как часть URL
+        return self._post(method='setWebhook', url=url, secret_token=secret_token)
+
+    def delete_webhook(self) -> dict:
+        return self._get(method='deleteWebhook')
+
     def _get(self, method: str, **params) -> dict:
+        return self._request('get', method, params)
+
+    def _post(self, method: str, **data) -> dict:
+        return self._request('post', method, data)
+
+    def _request(self, http_method: str, method: str, params: dict) -> dict:
+        """запрос с повторами: экспоненциальная пауза, для 429 пауза из retry_after"""
         url: str = self.get_url(method)
-        response = requests.get(url, params=params)
-        if not response.ok:
-            logger.error('Status code: %s. Body: %s', response.status_code, response.content)
-            raise RuntimeError
-        return response.json()
+        # long polling держит соединение timeout секунд, ожидание ответа должно быть дольше
+        timeout = self.timeout + params.get('timeout', 0)
+        payload = {'params': params} if http_method == 'get' else {'json': params}
+
+        for attempt in range(self.max_retries + 1):
+            delay = self.backoff * 2 ** attempt
+            started = time.monotonic()
+            try:
+                response = self.session.request(http_method, url, timeout=timeout, **payload)
+            except requests.RequestException as e:
+                self.metrics.observe(method, time.monotonic() - started, error=True)
+                # текст исключения содержит URL с токеном бота
+                logger.warning('Telegram %s: %s', method, type(e).__name__)
+                if attempt == self.max_retries:
+                    raise TgClientError(f'Telegram {method}: {type(e).__name__}') from e
+            else:
+                self.metrics.observe(method, time.monotonic() - started, error=not response.ok)
+                if response.ok:
+                    return response.json()
+                if response.status_code not in self.retry_statuses or attempt == self.max_retries:
+                    logger.error('Status code: %s. Body: %s', response.status_code, response.content)
+                    raise TgClientError(f'Telegram {method}: {response.status_code}', response.status_code)
+                if response.status_code == 429:
+                    delay = self._retry_after(response) or delay
+
+            self.metrics.retry(method)
+            time.sleep(delay)
+
+    @staticmethod
+    def _retry_after(response: requests.Response) -> float | None:
+        try:
+            return float(response.json()['parameters']['retry_after'])
+        except (ValueError, KeyError, TypeError):
+            return None
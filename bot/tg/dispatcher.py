@@ -0,0 +1,69 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from django.db import close_old_connections
+
+from bot.tg.schemas import Message, UpdateObj
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateDispatcher:
+    """
+    раздает обновления обработчику: сообщения разных чатов обрабатываются параллельно,
+    сообщения одного чата строго по порядку; синхронный обработчик (ORM, запросы к Telegram)
+    выполняется в пуле из concurrency потоков
+    """
+
+    def __init__(self, handler: Callable[[Message], None], concurrency: int):
+        self.handler = handler
+        self.concurrency = concurrency
+        # принятые, но еще не обработанные (успешно или с ошибкой) сообщения
+        self.pending = 0
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='tg-handler')
+        self.queues: dict[int, asyncio.Queue] = {}
+        self.tasks: set[asyncio.Task] = set()
+
+    def dispatch(self, update: UpdateObj, done: Callable[[], Any] | None = None) -> None:
+        """done вызывается в том же потоке после успешной обработки сообщения"""
+        chat_id = update.message.chat.id
+        queue = self.queues.get(chat_id)
+        if queue is None:
+            queue = self.queues[chat_id] = asyncio.Queue()
+            task = asyncio.create_task(self._drain(chat_id, queue))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+        queue.put_nowait((update.message, done))
+        self.pending += 1
+
+    async def join(self) -> None:
+        """ожидает обработки всех полученных обновлений"""
+        while self.tasks:
+            await asyncio.gather(*self.tasks)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+
+    async def _drain(self, chat_id: int, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        while not queue.empty():
+            msg, done = queue.get_nowait()
+            try:
+                await loop.run_in_executor(self.executor, self._handle, msg, done)
+            except Exception:
+                logger.exception('Ошибка обработки сообщения из чата %s', chat_id)
+            finally:
+                self.pending -= 1
+        # между проверкой очереди и удалением нет await, новое сообщение не потеряется
+        del self.queues[chat_id]
+
+    def _handle(self, msg: Message, done: Callable[[], Any] | None) -> None:
+        close_old_connections()
+        try:
+            self.handler(msg)
+            if done is not None:
+                done()
+        finally:
+            close_old_connections()
@@ -0,0 +1,161 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable
+
+from django.conf import settings
+
+from bot.tg.client import TgClient
+
+logger = logging.getLogger(__name__)
+
+# ограничение Telegram на длину одного сообщения
+MAX_MESSAGE_LENGTH = 4096
+
+
+class TokenBucket:
+    """rate токенов в секунду, не больше capacity про запас"""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated_at = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def delay(self) -> float:
+        """сколько секунд ждать до следующего токена"""
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def consume(self) -> None:
+        self._refill()
+        self.tokens -= 1
+
+    @property
+    def is_full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity
+
+
+class MessageSender:
+    """
+    очередь исходящих сообщений с фоновым потоком: send() не ждет Telegram,
+    отправка ограничена общим и по-чатовым token bucket, накопившиеся сообщения
+    одного чата склеиваются в одно
+    """
+
+    def __init__(
+        self,
+        client: TgClient | None = None,
+        rate: float = 30,
+        chat_rate: float = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.client = client or TgClient()
+        self.clock = clock
+        self.bucket = TokenBucket(rate, capacity=rate, clock=clock)
+        self.chat_rate = chat_rate
+        self.chat_buckets: dict[int, TokenBucket] = {}
+        self.pending: OrderedDict[int, list[str]] = OrderedDict()
+        self.in_flight = 0
+        self.condition = threading.Condition()
+        self.worker: threading.Thread | None = None
+        self.stopped = False
+
+    def send(self, chat_id: int, text: str) -> None:
+        with self.condition:
+            self.pending.setdefault(chat_id, []).append(text)
+            if self.worker is None:
+                self.worker = threading.Thread(target=self._run, name='tg-sender', daemon=True)
+                self.worker.start()
+            self.condition.notify_all()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """ожидает отправки всех сообщений из очереди"""
+        deadline = None if timeout is None else self.clock() + timeout
+        with self.condition:
+            while self.pending or self.in_flight:
+                remaining = None if deadline is None else deadline - self.clock()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.condition.wait(remaining)
+        return True
+
+    def close(self, timeout: float | None = None) -> None:
+        self.flush(timeout)
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self.condition:
+                batch = self._next_batch()
+                if batch is None:
+                    return
+                self.in_flight += 1
+            chat_id, text = batch
+            try:
+                self.client.send_message(chat_id=chat_id, text=text)
+            except Exception:
+                logger.exception('Не удалось отправить сообщение в чат %s', chat_id)
+            finally:
+                with self.condition:
+                    self.in_flight -= 1
+                    self.condition.notify_all()
+
+    def _next_batch(self) -> tuple[int, str] | None:
+        """под блокировкой ждет, пока лимиты позволят отправить следующий чат из очереди"""
+        while True:
+            if self.stopped and not self.pending:
+                return None
+            if not self.pending:
+                self.condition.wait()
+                continue
+
+            delays = [self._chat_bucket(chat_id).delay() for chat_id in self.pending]
+            wait = max(self.bucket.delay(), min(delays))
+            if wait > 0:
+                self.condition.wait(wait)
+                continue
+
+            chat_id = next(chat_id for chat_id, delay in zip(self.pending, delays) if delay == 0)
+            self.bucket.consume()
+            self._chat_bucket(chat_id).consume()
+            return chat_id, self._take_texts(chat_id)
+
+    def _take_texts(self, chat_id: int) -> str:
+        texts = self.pending.pop(chat_id)
+        batch = [texts.pop(0)]
+        length = len(batch[0])
+        while texts and length + 1 + len(texts[0]) <= MAX_MESSAGE_LENGTH:
+            length += 1 + len(texts[0])
+            batch.append(texts.pop(0))
+        if texts:
+            # остаток в конец очереди, чтобы не задерживать другие чаты
+            self.pending[chat_id] = texts
+        return '\n'.join(batch)
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self.chat_buckets) > 1000:
+                self.chat_buckets = {
+                    key: value for key, value in self.chat_buckets.items()
+                    if key in self.pending or not value.is_full
+                }
+            bucket = self.chat_buckets[chat_id] = TokenBucket(self.chat_rate, capacity=1, clock=self.clock)
+        return bucket
+
+
+@lru_cache
+def get_sender() -> MessageSender:
+    return MessageSender(rate=settings.BOT_SEND_RATE, chat_rate=settings.BOT_SEND_CHAT_RATE)
@@ -0,0 +1,81 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from bot.models import TgUser
+
+
+class TgBotStatus:
+
+    STOK = 0
+    CAT_CHOICE = 1
+    GOAL_CREATE = 2
+
+    def __init__(self, status_b=STOK, category_id=None):
+        self.status_b = status_b
+        self.category_id = category_id
+
+
+class BaseStateStore(ABC):
+    """хранилище состояния диалога бота по chat_id"""
+
+    @abstractmethod
+    def get(self, chat_id: int) -> TgBotStatus:
+        ...
+
+    @abstractmethod
+    def set(self, chat_id: int, state: TgBotStatus) -> None:
+        ...
+
+    def clear(self, chat_id: int) -> None:
+        self.set(chat_id, TgBotStatus())
+
+
+class MemoryStateStore(BaseStateStore):
+    """LRU в памяти процесса с временем жизни состояния, для одного процесса бота"""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._states: OrderedDict[int, tuple[float, int, int | None]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, chat_id: int) -> TgBotStatus:
+        with self._lock:
+            item = self._states.get(chat_id)
+            if item is None:
+                return TgBotStatus()
+            expires_at, status_b, category_id = item
+            if expires_at < time.monotonic():
+                del self._states[chat_id]
+                return TgBotStatus()
+            self._states.move_to_end(chat_id)
+            return TgBotStatus(status_b, category_id)
+
+    def set(self, chat_id: int, state: TgBotStatus) -> None:
+        with self._lock:
+            self._states[chat_id] = (time.monotonic() + self.ttl, state.status_b, state.category_id)
+            self._states.move_to_end(chat_id)
+            while len(self._states) > self.maxsize:
+                self._states.popitem(last=False)
+
+
+class DatabaseStateStore(BaseStateStore):
+    """состояние в строке TgUser, общее для нескольких процессов бота и переживает перезапуск"""
+
+    def get(self, chat_id: int) -> TgBotStatus:
+        row = TgUser.objects.filter(chat_id=chat_id).values_list('bot_status', 'bot_category_id').first()
+        return TgBotStatus(*row) if row else TgBotStatus()
+
+    def set(self, chat_id: int, state: TgBotStatus) -> None:
+        TgUser.objects.filter(chat_id=chat_id).update(bot_status=state.status_b, bot_category_id=state.category_id)
+
+
+@lru_cache
+def get_state_store() -> BaseStateStore:
+    return import_string(settings.BOT_STATE_STORE)()
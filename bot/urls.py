@@ -3,4 +3,5 @@ from . import views
 
 urlpatterns = [
     path('verify', views.VerificationCodeView.as_view(), name='verify'),
+    path('webhook', views.WebhookView.as_view(), name='webhook'),
 ]
@@ -1,11 +1,15 @@
 from typing import Any
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
+from pydantic import ValidationError
 from rest_framework import generics, permissions
-from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.exceptions import AuthenticationFailed, NotFound, PermissionDenied
 from rest_framework.request import Request
 from rest_framework.response import Response
-from bot.models import TgUser
+from bot.models import TgUpdate, TgUser
 from bot.serializers import TgUserSerializer
-from bot.tg.client import TgClient
+from bot.tasks import send_message
+from bot.tg.schemas import UpdateObj
 
 
 class VerificationCodeView(generics.GenericAPIView):
@@ -24,6 +28,32 @@ class VerificationCodeView(generics.GenericAPIView):
         tg_user.user = request.user
         tg_user.save()
 
-        TgClient().send_message(chat_id=tg_user.chat_id, text='Бот проверен')
+        send_message.delay(user=request.user, chat_id=tg_user.chat_id, text='Бот проверен')
 
         return Response(TgUserSerializer(tg_user).data)
+
+
+class WebhookView(generics.GenericAPIView):
+    authentication_classes = []
+    permission_classes = []
+
+    def post(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        """принимает обновление от Telegram и ставит в очередь для runbot --webhook"""
+        if not settings.BOT_WEBHOOK_SECRET:
+            raise NotFound
+        secret = request.headers.get('X-Telegram-Bot-Api-Secret-Token', '')
+        if not constant_time_compare(secret, settings.BOT_WEBHOOK_SECRET):
+            raise PermissionDenied
+
+        try:
+            update = UpdateObj.parse_obj(request.data)
+        except ValidationError:
+            # обновления без сообщения бот не обрабатывает, но Telegram должен получить 200
+            return Response()
+
+        # Telegram повторяет доставку при ошибках, повторное обновление не дублируется
+        TgUpdate.objects.bulk_create(
+            [TgUpdate(update_id=update.update_id, chat_id=update.message.chat.id, payload=request.data)],
+            ignore_conflicts=True,
+        )
+        return Response()
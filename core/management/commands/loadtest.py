@@ -0,0 +1,68 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+import requests
+from django.core.management import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+	help = (
+		'Нагрузочный тест запущенного API: запросы/с и задержки (p50, p99) при параллельных запросах. '
+		'Для сравнения запустите его против gunicorn todolist.wsgi и todolist.asgi с воркерами uvicorn'
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument('base_url', help='Адрес API, например http://127.0.0.1:8000')
+		parser.add_argument('--path', action='append', help='Путь для запросов, можно указать несколько раз')
+		parser.add_argument('--username', required=True)
+		parser.add_argument('--password', required=True)
+		parser.add_argument('--requests', type=int, default=2000, help='Всего запросов')
+		parser.add_argument('--concurrency', type=int, default=50, help='Одновременных запросов')
+
+	def handle(self, *args, **options):
+		self.base_url = options['base_url']
+		self.credentials = {'username': options['username'], 'password': options['password']}
+		self.local = threading.local()
+		paths = options['path'] or ['/core/profile', '/goals/board/list', '/goals/goal/list?limit=20']
+		total = options['requests']
+
+		self.session()
+		started = time.monotonic()
+		with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+			results = list(executor.map(self.request, (paths[i % len(paths)] for i in range(total))))
+		elapsed = time.monotonic() - started
+
+		latencies = sorted(latency for latency, ok in results)
+		errors = sum(not ok for latency, ok in results)
+		quantiles = statistics.quantiles(latencies, n=100)
+		self.stdout.write(
+			f'{total} запросов, {options["concurrency"]} одновременно, ошибок: {errors}\n'
+			f'запросов/с: {total / elapsed:.1f}\n'
+			f'p50: {quantiles[49] * 1000:.1f} мс, p99: {quantiles[98] * 1000:.1f} мс, '
+			f'max: {latencies[-1] * 1000:.1f} мс'
+		)
+
+	def session(self) -> requests.Session:
+		"""своя сессия с keep-alive у каждого потока"""
+		session = getattr(self.local, 'session', None)
+		if session is None:
+			session = self.local.session = requests.Session()
+			try:
+				response = session.post(urljoin(self.base_url, '/core/login'), json=self.credentials)
+			except requests.RequestException as e:
+				raise CommandError(f'API недоступно: {e}')
+			if not response.ok:
+				raise CommandError(f'Не удалось войти: {response.status_code}')
+		return session
+
+	def request(self, path: str) -> tuple[float, bool]:
+		session = self.session()
+		started = time.monotonic()
+		try:
+			ok = session.get(urljoin(self.base_url, path), timeout=30).ok
+		except requests.RequestException:
+			ok = False
+		return time.monotonic() - started, ok
@@ -0,0 +1,60 @@
+import time
+from typing import Callable
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, QuerySet
+from django.utils import timezone
+
+from goals.models import Board, Goal, GoalCategory
+from goals.versions import bump_board_versions
+
+ARCHIVE_BATCH_SIZE = 1000
+# сколько секунд запрос на удаление архивирует цели сам, остальное доделывает фоновая задача
+ARCHIVE_INLINE_SECONDS = 5
+
+
+def archive_goals(
+    goals: QuerySet[Goal],
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    deadline: float | None = None,
+    progress: Callable[[int], None] | None = None,
+) -> tuple[int, bool]:
+    """
+    архивирует цели пачками по диапазонам id, каждая пачка в своей короткой транзакции,
+    поэтому строки не блокируются надолго; прерванный процесс продолжается с первой неархивной цели.
+    Возвращает число архивированных целей и признак, что архивировано все
+    """
+    goals = goals.exclude(status=Goal.Status.archived)
+    archived = last_id = 0
+    while deadline is None or time.monotonic() < deadline:
+        ids = list(goals.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return archived, True
+        with transaction.atomic():
+            archived += goals.filter(id__gte=ids[0], id__lte=ids[-1]).update(
+                status=Goal.Status.archived, updated=timezone.now()
+            )
+        last_id = ids[-1]
+        if progress:
+            progress(archived)
+    return archived, False
+
+
+def pending_boards() -> QuerySet[Board]:
+    """удаленные доски, цели которых еще не архивированы"""
+    active = Goal.objects.filter(board=OuterRef('pk')).exclude(status=Goal.Status.archived)
+    return Board.objects.filter(Exists(active), is_deleted=True)
+
+
+def pending_categories() -> QuerySet[GoalCategory]:
+    """удаленные категории живых досок, цели которых еще не архивированы"""
+    active = Goal.objects.filter(category=OuterRef('pk')).exclude(status=Goal.Status.archived)
+    return GoalCategory.objects.filter(Exists(active), is_deleted=True, board__is_deleted=False)
+
+
+def finish_archive(goals: QuerySet[Goal], board_id: int, **kwargs) -> tuple[int, bool]:
+    """архивирует цели и сбрасывает кеш доски, даже если архивирована только часть"""
+    try:
+        return archive_goals(goals, **kwargs)
+    finally:
+        bump_board_versions(board_id)
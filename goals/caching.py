@@ -0,0 +1,130 @@
+import hashlib
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Model
+from django.http import HttpResponseBase
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework.request import Request
+from rest_framework.response import Response
+from goals.permissions import get_board_roles
+from goals.versions import get_board_versions
+from todolist.db.routers import primary_reads
+from todolist.metrics import Metrics
+
+
+def make_etag(*parts) -> str:
+    return 'W/' + quote_etag(hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest())
+
+
+def conditional_response(
+    request: Request, etag: str, last_modified: datetime | None = None
+) -> HttpResponseBase | None:
+    """304 с валидаторами, если у клиента актуальная версия, иначе None"""
+    response = get_conditional_response(
+        request._request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    return response and set_validators(response, etag, last_modified)
+
+
+def set_validators(
+    response: HttpResponseBase, etag: str, last_modified: datetime | None = None
+) -> HttpResponseBase:
+    """клиент может хранить ответ, но должен перепроверять его по ETag"""
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+class ConditionalListMixin:
+    """
+    условный GET для списков: ETag из id и updated строк страницы и общего количества,
+    которое пагинация уже посчитала; при совпадении If-None-Match ответ 304 без сериализации.
+    Last-Modified не отдается: по нему нельзя заметить удаление строки
+    """
+
+    def list(self, request: Request, *args, **kwargs) -> HttpResponseBase:
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            rows, position = list(queryset), ()
+        else:
+            rows, position = page, (getattr(self.paginator, 'count', None), self.paginator.get_next_link())
+        etag = make_etag(*position, *(f'{obj.pk}@{obj.updated.isoformat()}' for obj in rows))
+        if response := conditional_response(request, etag):
+            return response
+
+        data = self.get_serializer(rows, many=True).data
+        response = Response(data) if page is None else self.get_paginated_response(data)
+        return set_validators(response, etag)
+
+
+class ConditionalRetrieveMixin:
+    """условный GET для объекта по его updated"""
+
+    def retrieve(self, request: Request, *args, **kwargs) -> HttpResponseBase:
+        instance: Model = self.get_object()
+        etag = make_etag(instance.pk, instance.updated.isoformat())
+        if response := conditional_response(request, etag, instance.updated):
+            return response
+        return set_validators(Response(self.get_serializer(instance).data), etag, instance.updated)
+
+
+class CacheMetrics(Metrics):
+    """попадания и промахи кеша списков по представлениям"""
+
+    name = 'Кеш списков'
+    fields = {'hits': 0, 'misses': 0}
+
+    def observe(self, view: str, hit: bool) -> None:
+        self.add(view, **{'hits' if hit else 'misses': 1})
+
+
+metrics = CacheMetrics(log_interval=settings.METRICS_LOG_INTERVAL)
+
+
+class CachedListMixin:
+    """
+    кеш ответа списка по пользователю, строке запроса и версиям его досок,
+    версия доски меняется при любом изменении ее категорий, целей, комментариев и участников;
+    при промахе список читается из основной базы; без общего кеша (LIST_CACHE_ENABLED)
+    список не кешируется
+    """
+
+    def get_list_cache_key(self, request: Request) -> str:
+        versions = get_board_versions(sorted(get_board_roles(request)))
+        state = ':'.join(f'{board_id}.{version}' for board_id, version in sorted(versions.items()))
+        query = request.query_params.urlencode()
+        return 'list:{}:{}:{}'.format(
+            type(self).__name__,
+            request.user.id,
+            hashlib.md5(f'{query}|{state}'.encode()).hexdigest(),
+        )
+
+    def list(self, request: Request, *args, **kwargs) -> HttpResponseBase:
+        if not settings.LIST_CACHE_ENABLED:
+            return super().list(request, *args, **kwargs)
+
+        key = self.get_list_cache_key(request)
+        view = type(self).__name__
+        if cached := cache.get(key):
+            metrics.observe(view, hit=True)
+            etag, data = cached
+            response = conditional_response(request, etag) or set_validators(Response(data), etag)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        metrics.observe(view, hit=False)
+        # ответ отстающей реплики попал бы в кеш под новой версией доски
+        with primary_reads():
+            response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, (response['ETag'], response.data), timeout=settings.LIST_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,73 @@
+from typing import Iterable
+
+from django.db.models import Q
+
+from goals.events import events_after, locate_event, trimmed_event_id
+from goals.models import Board, BoardEvent, Goal, GoalCategory, GoalComment
+from goals.serializers import BoardSerializer, GoalCategorySerializer, GoalCommentSerializer, GoalSerializer
+
+# раздел ответа, запрос текущего состояния и сериализатор для каждого вида событий
+SECTIONS = {
+    BoardEvent.Kind.board: ('boards', Board.objects.exclude(is_deleted=True), BoardSerializer),
+    BoardEvent.Kind.category: (
+        'categories', GoalCategory.objects.select_related('user').exclude(is_deleted=True), GoalCategorySerializer
+    ),
+    BoardEvent.Kind.goal: (
+        'goals', Goal.objects.select_related('user').exclude(status=Goal.Status.archived), GoalSerializer
+    ),
+    BoardEvent.Kind.comment: ('comments', GoalComment.objects.select_related('user'), GoalCommentSerializer),
+}
+
+
+class ChangesGone(Exception):
+    """события после курсора уже удалены из журнала, клиенту нужна полная загрузка"""
+
+
+def fetch_changes(user_id: int, board_ids: Iterable[int], since: int, limit: int) -> tuple[list[dict], bool]:
+    """
+    события досок пользователя после курсора и события о его собственном членстве,
+    в том числе на досках, откуда его уже удалили; курсор - id последнего полученного события
+    """
+    # журнал чистит trim_board_events: события после курсора удалены, часть изменений потеряна
+    if since < trimmed_event_id():
+        raise ChangesGone
+    # события курсора может не быть и без очистки (откат транзакции, курсор пустого журнала):
+    # тогда события отдаются с начала журнала, повтор клиенту не мешает
+    key = locate_event(since) if since else None
+
+    board_ids = list(board_ids)
+    own = Q(kind=BoardEvent.Kind.participant, object_id=user_id)
+    events = list(
+        events_after(key).filter(Q(board_id__in=board_ids) | own)
+        .values('id', 'board_id', 'kind', 'action', 'object_id')[:limit + 1]
+    )
+    return events[:limit], len(events) > limit
+
+
+def collect_changes(board_ids: Iterable[int], events: list[dict], context: dict) -> dict:
+    """
+    изменения по событиям: текущее состояние измененных объектов одним запросом на вид,
+    удаленные, архивные и недоступные объекты попадают в deleted; удаление доски или категории
+    означает удаление всего, что в ней
+    """
+    board_ids = set(board_ids)
+    changed: dict[str, set[int]] = {kind: set() for kind in SECTIONS}
+    for event in events:
+        if event['kind'] == BoardEvent.Kind.participant:
+            # участники входят в доску; удаленный с доски пользователь теряет ее целиком
+            changed[BoardEvent.Kind.board].add(event['board_id'])
+        else:
+            changed[event['kind']].add(event['object_id'])
+
+    result, deleted = {}, {}
+    for kind, (section, queryset, serializer_class) in SECTIONS.items():
+        ids = changed[kind]
+        if kind == BoardEvent.Kind.board:
+            queryset = queryset.filter(id__in=ids & board_ids)
+        else:
+            queryset = queryset.filter(id__in=ids, board_id__in=board_ids)
+        objects = list(queryset.order_by('id')) if ids else []
+        result[section] = serializer_class(objects, many=True, context=context).data
+        deleted[section] = sorted(ids - {obj.id for obj in objects})
+    result['deleted'] = deleted
+    return result
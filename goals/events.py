@@ -0,0 +1,215 @@
+import asyncio
+import json
+from typing import AsyncIterator, Callable, Iterable
+
+from asgiref.sync import sync_to_async
+from django.db.models import Max, Q, QuerySet
+from django.db.models.expressions import RawSQL
+
+from goals.models import BoardEvent, BoardEventTrim
+from todolist.db.routers import primary_reads
+
+EVENT_FIELDS = ('id', 'txid', 'board_id', 'kind', 'action', 'object_id')
+# через сколько миллисекунд EventSource переподключается после обрыва
+RETRY_MS = 3000
+
+
+def visible_events() -> QuerySet[BoardEvent]:
+    """
+    события транзакций, закончившихся раньше всех еще идущих: id выдаются до коммита, поэтому
+    события упорядочены по (txid, id), и закоммиченное позже событие всегда оказывается после прочитанных
+    """
+    return BoardEvent.objects.filter(txid__lt=RawSQL('txid_snapshot_xmin(txid_current_snapshot())', []))
+
+
+def event_key(event: dict) -> tuple[int, int]:
+    """место события в журнале"""
+    return event['txid'], event['id']
+
+
+def locate_event(event_id: int) -> tuple[int, int] | None:
+    txid = BoardEvent.objects.filter(id=event_id).values_list('txid', flat=True).first()
+    return None if txid is None else (txid, event_id)
+
+
+def events_after(key: tuple[int, int] | None) -> QuerySet[BoardEvent]:
+    """видимые события после места key по порядку, без key с начала журнала"""
+    queryset = visible_events()
+    if key is not None:
+        txid, event_id = key
+        queryset = queryset.filter(Q(txid__gt=txid) | Q(txid=txid, id__gt=event_id))
+    return queryset.order_by('txid', 'id')
+
+
+def fetch_events(
+    after: tuple[int, int] | None, limit: int, board_ids: Iterable[int] | None = None
+) -> list[dict]:
+    queryset = events_after(after)
+    if board_ids is not None:
+        queryset = queryset.filter(board_id__in=board_ids)
+    return list(queryset.values(*EVENT_FIELDS)[:limit])
+
+
+def trimmed_event_id() -> int:
+    """наибольший id удаленного из журнала события, 0 - журнал не чистился"""
+    return BoardEventTrim.objects.aggregate(last=Max('last_id'))['last'] or 0
+
+
+def latest_event_key() -> tuple[int, int]:
+    """
+    место последнего видимого события; в пустом журнале - место после удаленных событий:
+    курсор по нему не устаревает, пока журнал снова не почистят
+    """
+    # по ключу с реплики клиент продолжил бы с отстающего места
+    with primary_reads():
+        key = visible_events().order_by('-txid', '-id').values_list('txid', 'id').first()
+        return key or (0, trimmed_event_id())
+
+
+def latest_event_id() -> int:
+    return latest_event_key()[1]
+
+
+def format_event(event: dict) -> str:
+    """событие в формате server-sent events, в data только ссылка на измененный объект"""
+    data = json.dumps({'board': event['board_id'], 'action': event['action'], 'id': event['object_id']})
+    return f"id: {event['id']}\nevent: {event['kind']}\ndata: {data}\n\n"
+
+
+class Subscription:
+    """
+    события досок подписчика: сначала пропущенные до подписки, затем новые;
+    при добавлении пользователя на доску или удалении с нее список досок меняется на лету
+    """
+
+    def __init__(self, board_ids: set[int], key: tuple[int, int], maxsize: int, user_id: int | None = None):
+        self.board_ids = board_ids
+        self.user_id = user_id
+        self.backlog: list[dict] = []
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=maxsize)
+        # последнее отданное клиенту событие: место в журнале и id
+        self.key = key
+        self.position = key[1]
+        self.overflowed = False
+        # пропущено слишком много событий, клиенту проще перезагрузить данные
+        self.reset = False
+
+    def put(self, event: dict) -> None:
+        membership = event['kind'] == BoardEvent.Kind.participant and event['object_id'] == self.user_id
+        if membership and event['action'] == BoardEvent.Action.created:
+            self.board_ids.add(event['board_id'])
+        if event['board_id'] not in self.board_ids or self.overflowed:
+            return
+        if membership and event['action'] == BoardEvent.Action.deleted:
+            # событие об удалении пользователь еще получит, следующие события доски уже нет
+            self.board_ids.discard(event['board_id'])
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # клиент не успевает читать: поток закроется, клиент переподключится с Last-Event-ID
+            self.overflowed = True
+
+    async def get(self) -> dict:
+        while True:
+            event = self.backlog.pop(0) if self.backlog else await self.queue.get()
+            if event_key(event) > self.key:
+                self.key, self.position = event_key(event), event['id']
+                return event
+
+
+class EventHub:
+    """
+    одна выборка новых событий на процесс раз в interval секунд, независимо от числа
+    подключенных клиентов; события раздаются подписчикам по доскам
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[..., list[dict]] = fetch_events,
+        latest: Callable[[], tuple[int, int]] = latest_event_key,
+        locate: Callable[[int], tuple[int, int] | None] = locate_event,
+        interval: float = 1,
+        batch_size: int = 500,
+        queue_size: int = 1000,
+    ):
+        self.fetch = sync_to_async(fetch)
+        self.latest = sync_to_async(latest)
+        self.locate = sync_to_async(locate)
+        self.interval = interval
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.last: tuple[int, int] | None = None
+        self.subscribers: set[Subscription] = set()
+        self.task: asyncio.Task | None = None
+
+    async def subscribe(
+        self, board_ids: Iterable[int], last_event_id: int | None = None, user_id: int | None = None
+    ) -> Subscription:
+        """новые события идут в очередь сразу, пропущенные после last_event_id догружаются из базы"""
+        if self.last is None:
+            self.last = await self.latest()
+        start = self.last
+        key = start if last_event_id is None else (await self.locate(last_event_id) or (0, 0))
+        subscription = Subscription(set(board_ids), key, self.queue_size, user_id)
+        self.subscribers.add(subscription)
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+        while key < start:
+            events = await self.fetch(key, self.batch_size, subscription.board_ids)
+            subscription.backlog += [event for event in events if event_key(event) <= start]
+            if len(subscription.backlog) > self.queue_size:
+                subscription.backlog, subscription.key, subscription.position = [], start, start[1]
+                subscription.reset = True
+                break
+            if len(events) < self.batch_size:
+                break
+            key = event_key(events[-1])
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self.subscribers.discard(subscription)
+
+    async def run(self) -> None:
+        while self.subscribers:
+            # место в журнале, а не id: ни поиска события, ни чтения с начала, если его удалили
+            events = await self.fetch(self.last, self.batch_size)
+            for event in events:
+                self.last = event_key(event)
+                for subscription in tuple(self.subscribers):
+                    subscription.put(event)
+            if len(events) < self.batch_size:
+                await asyncio.sleep(self.interval)
+
+
+hub = EventHub()
+
+
+async def event_stream(
+    hub: EventHub,
+    board_ids: Iterable[int],
+    last_event_id: int | None = None,
+    heartbeat: float = 15,
+    max_age: float = 300,
+    user_id: int | None = None,
+) -> AsyncIterator[str]:
+    """
+    поток событий досок; через max_age секунд закрывается, клиент переподключается
+    с Last-Event-ID и заново получает список своих досок
+    """
+    subscription = await hub.subscribe(board_ids, last_event_id, user_id)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_age
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        if subscription.reset:
+            yield f'id: {subscription.position}\nevent: reset\ndata: {{}}\n\n'
+        while not subscription.overflowed and (remaining := deadline - loop.time()) > 0:
+            try:
+                event = await asyncio.wait_for(subscription.get(), timeout=min(heartbeat, remaining))
+            except asyncio.TimeoutError:
+                yield ': ping\n\n'
+                continue
+            yield format_event(event)
+    finally:
+        hub.unsubscribe(subscription)
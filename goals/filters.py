@@ -1,9 +1,20 @@
 import django_filters
+from django.contrib.postgres.search import SearchQuery
 from django.db import models
+from django.db.models import QuerySet
 from django_filters import rest_framework
+from rest_framework.filters import SearchFilter
+from rest_framework.request import Request
 
 from goals.models import Goal
 
+# конфигурация должна совпадать с триггерами search_vector в миграции 0010
+SEARCH_CONFIG = 'russian'
+
+
+def search_query(terms: str) -> SearchQuery:
+    return SearchQuery(terms, config=SEARCH_CONFIG, search_type='websearch')
+
 
 class GoalDateFilter(rest_framework.FilterSet):
     class Meta:
@@ -18,3 +29,13 @@ class GoalDateFilter(rest_framework.FilterSet):
     filter_overrides = {
         models.DateTimeField: {"filter_class": django_filters.IsoDateTimeFilter},
     }
+
+
+class FullTextSearchFilter(SearchFilter):
+    """полнотекстовый поиск по search_vector вместо icontains по search_fields"""
+
+    def filter_queryset(self, request: Request, queryset: QuerySet, view) -> QuerySet:
+        terms = request.query_params.get(self.search_param, '').strip()
+        if not terms:
+            return queryset
+        return queryset.filter(search_vector=search_query(terms))
@@ -0,0 +1,26 @@
+from django.core.management import BaseCommand
+from goals.archive import ARCHIVE_BATCH_SIZE, finish_archive, pending_boards, pending_categories
+from goals.models import Goal
+
+
+class Command(BaseCommand):
+    help = 'Архивирование целей удаленных досок и категорий, которое не закончили запрос на удаление и фоновые задачи'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE, help='Целей в одной транзакции')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        for board in pending_boards():
+            self.archive(f'Доска {board.id}', Goal.objects.filter(board=board), board.id, batch_size)
+        for category in pending_categories():
+            self.archive(f'Категория {category.id}', category.goals.all(), category.board_id, batch_size)
+
+    def archive(self, name: str, goals, board_id: int, batch_size: int) -> None:
+        total = goals.exclude(status=Goal.Status.archived).count()
+
+        def progress(done: int) -> None:
+            self.stdout.write(f'{name}: архивировано {done} из {total}')
+
+        archived, _ = finish_archive(goals, board_id, batch_size=batch_size, progress=progress)
+        self.stdout.write(f'{name}: готово, архивировано {archived}')
@@ -0,0 +1,28 @@
+import sys
+
+from django.core.management import BaseCommand, CommandError
+from goals.models import Board
+from goals.transfer import export_board, export_goals_csv
+
+
+class Command(BaseCommand):
+    help = 'Выгрузка доски с категориями, целями и комментариями в NDJSON (или целей в CSV)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('board_id', type=int)
+        parser.add_argument('--output', help='Файл для выгрузки, по умолчанию stdout')
+        parser.add_argument('--csv', action='store_true', help='Только цели в формате CSV')
+
+    def handle(self, *args, **options):
+        try:
+            board = Board.objects.get(id=options['board_id'])
+        except Board.DoesNotExist:
+            raise CommandError('Доска не найдена')
+
+        lines = export_goals_csv(board) if options['csv'] else export_board(board)
+        output = open(options['output'], 'w', encoding='utf-8', newline='') if options['output'] else sys.stdout
+        try:
+            output.writelines(lines)
+        finally:
+            if output is not sys.stdout:
+                output.close()
@@ -0,0 +1,28 @@
+from django.core.management import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+from core.models import User
+from goals.transfer import IMPORT_BATCH_SIZE, BoardImporter
+
+
+class Command(BaseCommand):
+    help = 'Создание доски из NDJSON выгрузки export_board'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--user', required=True, help='Владелец новой доски')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError('Пользователь не найден')
+
+        importer = BoardImporter(user, batch_size=options['batch_size'])
+        with open(options['path'], encoding='utf-8') as lines:
+            try:
+                board = importer.run(lines)
+            except ValidationError as e:
+                raise CommandError(e.detail[0])
+
+        self.stdout.write(f'Создана доска {board.id}: {importer.counts}')
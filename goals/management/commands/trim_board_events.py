@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from goals.models import BoardEvent, BoardEventTrim
+
+
+class Command(BaseCommand):
+    help = 'Удаление старых событий досок: клиенты, отставшие сильнее, перезагружают данные целиком'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help='Сколько дней хранить события')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            old = BoardEvent.objects.filter(created__lt=timezone.now() - timedelta(days=options['days']))
+            last_id = old.aggregate(last=Max('id'))['last']
+            # удаляется весь журнал до last_id, включая поздно закоммиченные события с меньшим id
+            deleted, _ = BoardEvent.objects.filter(id__lte=last_id or 0).delete()
+            if deleted:
+                # курсоры до last_id устарели, по этой отметке /changes отвечает 410
+                BoardEventTrim.objects.create(last_id=last_id)
+        self.stdout.write(f'Удалено событий: {deleted}')
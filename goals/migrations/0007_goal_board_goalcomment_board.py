@@ -0,0 +1,38 @@
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def fill_boards(apps, schema_editor):
+    # доска цели берется из ее категории, доска комментария из его цели
+    Goal = apps.get_model('goals', 'Goal')
+    GoalCategory = apps.get_model('goals', 'GoalCategory')
+    GoalComment = apps.get_model('goals', 'GoalComment')
+
+    Goal.objects.update(
+        board_id=Subquery(GoalCategory.objects.filter(id=OuterRef('category_id')).values('board_id')[:1])
+    )
+    GoalComment.objects.update(
+        board_id=Subquery(Goal.objects.filter(id=OuterRef('goal_id')).values('board_id')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0006_alter_goalcategory_board'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='goal',
+            name='board',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='goals', to='goals.board'),
+        ),
+        migrations.AddField(
+            model_name='goalcomment',
+            name='board',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='comments', to='goals.board'),
+        ),
+        migrations.RunPython(fill_boards, migrations.RunPython.noop),
+    ]
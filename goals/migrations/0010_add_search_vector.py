@@ -0,0 +1,80 @@
+# Generated by Django 4.2.1 on 2023-06-21 20:15
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+# search_vector поддерживается триггерами, поэтому обновляется и при save(), и при bulk_create
+GOAL_SEARCH_TRIGGER = """
+CREATE FUNCTION goals_goal_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER goals_goal_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description ON goals_goal
+    FOR EACH ROW EXECUTE FUNCTION goals_goal_search_vector_update();
+
+UPDATE goals_goal SET title = title;
+"""
+
+COMMENT_SEARCH_TRIGGER = """
+CREATE FUNCTION goals_goalcomment_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := to_tsvector('russian', coalesce(NEW.text, ''));
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER goals_goalcomment_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF text ON goals_goalcomment
+    FOR EACH ROW EXECUTE FUNCTION goals_goalcomment_search_vector_update();
+
+UPDATE goals_goalcomment SET text = text;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0009_add_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='goal',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='goalcomment',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='goal',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='goal_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='goalcomment',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='comment_search_vector_idx'),
+        ),
+        migrations.RunSQL(
+            GOAL_SEARCH_TRIGGER,
+            """
+            DROP TRIGGER goals_goal_search_vector_trigger ON goals_goal;
+            DROP FUNCTION goals_goal_search_vector_update();
+            """,
+        ),
+        migrations.RunSQL(
+            COMMENT_SEARCH_TRIGGER,
+            """
+            DROP TRIGGER goals_goalcomment_search_vector_trigger ON goals_goalcomment;
+            DROP FUNCTION goals_goalcomment_search_vector_update();
+            """,
+        ),
+    ]
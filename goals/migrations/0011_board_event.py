@@ -0,0 +1,30 @@
+# Generated by Django 4.2.1 on 2026-10-18 02:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0010_add_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoardEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('board', 'Доска'), ('participant', 'Участник'), ('category', 'Категория'), ('goal', 'Цель'), ('comment', 'Комментарий')], max_length=16)),
+                ('action', models.CharField(choices=[('created', 'Создание'), ('updated', 'Изменение'), ('deleted', 'Удаление')], max_length=16)),
+                ('object_id', models.BigIntegerField()),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='goals.board')),
+            ],
+            options={
+                'verbose_name': 'Событие доски',
+                'verbose_name_plural': 'События досок',
+                'indexes': [models.Index(fields=['board', 'id'], name='event_board_id_idx')],
+            },
+        ),
+    ]
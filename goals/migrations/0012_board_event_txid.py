@@ -0,0 +1,32 @@
+# Generated by Django 4.2.1 on 2026-10-18 05:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0011_board_event'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='boardevent',
+            name='event_board_id_idx',
+        ),
+        # события до миграции считаются закоммиченными раньше всех новых
+        migrations.AddField(
+            model_name='boardevent',
+            name='txid',
+            field=models.BigIntegerField(default=0),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='boardevent',
+            index=models.Index(fields=['board', 'txid', 'id'], name='event_board_txid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boardevent',
+            index=models.Index(fields=['txid', 'id'], name='event_txid_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.1 on 2026-10-18 07:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0012_board_event_txid'),
+    ]
+
+    operations = [
+        # выборки участников по пользователю обслуживает индекс внешнего ключа user_id
+        migrations.RemoveIndex(
+            model_name='boardparticipant',
+            name='participant_user_role_idx',
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.1 on 2026-10-18 04:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0013_remove_participant_user_role_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoardEventTrim',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_id', models.BigIntegerField()),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Очистка событий',
+                'verbose_name_plural': 'Очистки событий',
+            },
+        ),
+    ]
@@ -1,5 +1,10 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import Func, Q
+from django.utils import timezone
 from core.models import User
+from goals.versions import bump_board_versions
 
 
 class BaseModel(models.Model):
@@ -52,6 +57,36 @@ class GoalCategory(BaseModel):
 	def __str__(self):
 		return self.title
 
+	def save(self, *args, **kwargs) -> None:
+		"""при переносе категории на другую доску переносим ее цели и комментарии"""
+		adding = self._state.adding
+		update_fields = kwargs.get('update_fields')
+		super().save(*args, **kwargs)
+
+		if not adding and (update_fields is None or 'board' in update_fields):
+			goals = list(self.goals.exclude(board_id=self.board_id).values_list('id', 'board_id'))
+			if goals:
+				moved_from = {board_id for _, board_id in goals}
+				comments = GoalComment.objects.filter(goal__category=self).exclude(board_id=self.board_id)
+				comment_ids = list(comments.values_list('id', flat=True))
+				# updated меняется вместе с доской, иначе ETag перенесенных записей не изменится
+				now = timezone.now()
+				self.goals.filter(id__in=[goal_id for goal_id, _ in goals]).update(board_id=self.board_id, updated=now)
+				GoalComment.objects.filter(id__in=comment_ids).update(board_id=self.board_id, updated=now)
+				bump_board_versions(*moved_from)
+				BoardEvent.record(
+					BoardEvent.Kind.category, BoardEvent.Action.deleted,
+					[(board_id, self.id) for board_id in moved_from],
+				)
+				# update() сигналов не вызывает, подписчики новой доски узнают о записях из событий
+				BoardEvent.record(
+					BoardEvent.Kind.goal, BoardEvent.Action.updated, [(self.board_id, goal_id) for goal_id, _ in goals]
+				)
+				BoardEvent.record(
+					BoardEvent.Kind.comment, BoardEvent.Action.updated,
+					[(self.board_id, comment_id) for comment_id in comment_ids],
+				)
+
 
 class Goal(BaseModel):
 
@@ -70,27 +105,132 @@ class Goal(BaseModel):
 	title = models.CharField(max_length=255)
 	description = models.TextField(null=True, blank=True)
 	category = models.ForeignKey(GoalCategory, on_delete=models.PROTECT, related_name='goals')
+	board = models.ForeignKey(Board, on_delete=models.PROTECT, related_name='goals', editable=False)
 	due_date = models.DateField(null=True, blank=True)
 	user = models.ForeignKey(User, on_delete=models.PROTECT, related_name='goals')
 	status = models.PositiveSmallIntegerField(choices=Status.choices, default=Status.to_do)
 	priority = models.PositiveSmallIntegerField(choices=Priority.choices, default=Priority.medium)
+	# заполняется триггером в базе по title и description
+	search_vector = SearchVectorField(null=True, editable=False)
 
 	class Meta:
 		verbose_name = "Цель"
 		verbose_name_plural = "Цели"
+		indexes = [
+			models.Index(fields=['board', 'status'], name='goal_board_status_idx'),
+			# частичные индексы по активным целям (4 — архив), архив исключают все списки
+			models.Index(fields=['board', 'title'], condition=~Q(status=4), name='goal_active_board_idx'),
+			models.Index(
+				fields=['category', 'status', 'priority'], condition=~Q(status=4), name='goal_active_category_idx'
+			),
+			models.Index(fields=['due_date'], condition=~Q(status=4), name='goal_active_due_date_idx'),
+			GinIndex(fields=['search_vector'], name='goal_search_vector_idx'),
+		]
 
 	def __str__(self):
 		return self.title
 
+	def save(self, *args, **kwargs) -> None:
+		"""доска цели всегда совпадает с доской ее категории"""
+		update_fields = kwargs.get('update_fields')
+		if update_fields is not None and 'category' not in update_fields:
+			return super().save(*args, **kwargs)
+
+		previous_board_id = self.board_id
+		self.board_id = self.category.board_id
+		if update_fields is not None:
+			kwargs['update_fields'] = {*update_fields, 'board'}
+		super().save(*args, **kwargs)
+
+		if previous_board_id is not None and previous_board_id != self.board_id:
+			comment_ids = list(self.comments.values_list('id', flat=True))
+			self.comments.update(board_id=self.board_id, updated=timezone.now())
+			bump_board_versions(previous_board_id)
+			BoardEvent.record(BoardEvent.Kind.goal, BoardEvent.Action.deleted, [(previous_board_id, self.id)])
+			BoardEvent.record(
+				BoardEvent.Kind.comment, BoardEvent.Action.updated,
+				[(self.board_id, comment_id) for comment_id in comment_ids],
+			)
+
 
 class GoalComment(BaseModel):
 	class Meta:
 		verbose_name = 'Комментарий'
 		verbose_name_plural = 'Комментарии'
+		indexes = [
+			models.Index(fields=['board', 'goal'], name='comment_board_goal_idx'),
+			GinIndex(fields=['search_vector'], name='comment_search_vector_idx'),
+		]
 
 	user = models.ForeignKey(User, on_delete=models.PROTECT, related_name='comments')
 	goal = models.ForeignKey(Goal, on_delete=models.CASCADE, related_name='comments')
+	board = models.ForeignKey(Board, on_delete=models.PROTECT, related_name='comments', editable=False)
 	text = models.TextField()
+	# заполняется триггером в базе по text
+	search_vector = SearchVectorField(null=True, editable=False)
 
 	def __str__(self) -> str:
-		return self.text
\ No newline at end of file
+		return self.text
+
+	def save(self, *args, **kwargs) -> None:
+		"""доска комментария всегда совпадает с доской цели"""
+		update_fields = kwargs.get('update_fields')
+		if update_fields is not None and 'goal' not in update_fields:
+			return super().save(*args, **kwargs)
+
+		self.board_id = self.goal.board_id
+		if update_fields is not None:
+			kwargs['update_fields'] = {*update_fields, 'board'}
+		super().save(*args, **kwargs)
+
+
+class BoardEvent(models.Model):
+	"""журнал изменений досок для рассылки клиентам, записи только добавляются"""
+
+	class Meta:
+		verbose_name = 'Событие доски'
+		verbose_name_plural = 'События досок'
+		indexes = [
+			models.Index(fields=['board', 'txid', 'id'], name='event_board_txid_idx'),
+			models.Index(fields=['txid', 'id'], name='event_txid_idx'),
+		]
+
+	class Kind(models.TextChoices):
+		board = 'board', 'Доска'
+		participant = 'participant', 'Участник'
+		category = 'category', 'Категория'
+		goal = 'goal', 'Цель'
+		comment = 'comment', 'Комментарий'
+
+	class Action(models.TextChoices):
+		created = 'created', 'Создание'
+		updated = 'updated', 'Изменение'
+		deleted = 'deleted', 'Удаление'
+
+	board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name='events')
+	kind = models.CharField(max_length=16, choices=Kind.choices)
+	action = models.CharField(max_length=16, choices=Action.choices)
+	object_id = models.BigIntegerField()
+	created = models.DateTimeField(auto_now_add=True, db_index=True)
+	# транзакция, записавшая событие: по ней события читаются в порядке коммита
+	txid = models.BigIntegerField()
+
+	@classmethod
+	def record(cls, kind: str, action: str, objects: list[tuple[int, int]]) -> None:
+		"""события по парам (board_id, object_id) одним запросом"""
+		txid = Func(function='txid_current', output_field=models.BigIntegerField())
+		cls.objects.bulk_create([
+			cls(board_id=board_id, kind=kind, action=action, object_id=object_id, txid=txid)
+			for board_id, object_id in objects
+		])
+
+
+class BoardEventTrim(models.Model):
+	"""очистка журнала событий: все события с id не больше last_id удалены"""
+
+	class Meta:
+		verbose_name = 'Очистка событий'
+		verbose_name_plural = 'Очистки событий'
+
+	last_id = models.BigIntegerField()
+	created = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,147 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from collections import OrderedDict
+from typing import Any
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db.models import Model, Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class ListPagination(LimitOffsetPagination):
+    """
+    limit/offset по умолчанию, ?count=false отключает COUNT(*),
+    ?cursor включает keyset-пагинацию по полям сортировки и id (страницы только вперед)
+    """
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    cursor_default_limit = 50
+    invalid_cursor_message = 'Неверный курсор'
+
+    def paginate_queryset(self, queryset: QuerySet, request: Request, view=None) -> list | None:
+        self.request = request
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if self.cursor_mode:
+            return self.paginate_by_cursor(queryset, request)
+
+        if request.query_params.get(self.count_query_param, '').lower() not in ('false', '0'):
+            return super().paginate_queryset(queryset, request, view)
+
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.offset = self.get_offset(request)
+        self.count = None
+        page = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(page) > self.limit
+        return page[:self.limit]
+
+    def get_paginated_response(self, data: list) -> Response:
+        if self.cursor_mode:
+            return Response(OrderedDict([('next', self.get_next_link()), ('results', data)]))
+        if self.count is None:
+            return Response(OrderedDict([
+                ('next', self.get_next_link()),
+                ('previous', self.get_previous_link()),
+                ('results', data),
+            ]))
+        return super().get_paginated_response(data)
+
+    def get_next_link(self) -> str | None:
+        if self.cursor_mode:
+            if self.next_cursor is None:
+                return None
+            url = self.request.build_absolute_uri()
+            return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+        if self.count is None:
+            if not self.has_next:
+                return None
+            url = self.request.build_absolute_uri()
+            url = replace_query_param(url, self.limit_query_param, self.limit)
+            return replace_query_param(url, self.offset_query_param, self.offset + self.limit)
+        return super().get_next_link()
+
+    def paginate_by_cursor(self, queryset: QuerySet, request: Request) -> list:
+        """следующая страница после строки из курсора, без OFFSET и COUNT(*)"""
+        self.limit = self.get_limit(request) or self.cursor_default_limit
+        ordering = self.get_keyset_ordering(queryset)
+        queryset = queryset.order_by(*ordering)
+
+        if cursor := request.query_params.get(self.cursor_query_param):
+            position = self.decode_cursor(queryset.model, ordering, cursor)
+            queryset = queryset.filter(self.after_position(ordering, position))
+
+        page = list(queryset[:self.limit + 1])
+        self.next_cursor = None
+        if len(page) > self.limit:
+            page = page[:self.limit]
+            self.next_cursor = self.encode_cursor([self.get_value(page[-1], field) for field in ordering])
+        return page
+
+    @staticmethod
+    def get_keyset_ordering(queryset: QuerySet) -> list[str]:
+        """сортировка запроса, дополненная id для однозначной позиции"""
+        ordering = [
+            field for field in (queryset.query.order_by or queryset.model._meta.ordering) if isinstance(field, str)
+        ]
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering.append('id')
+        return ordering
+
+    @staticmethod
+    def after_position(ordering: list[str], position: list) -> Q:
+        """строки после позиции: (a > x) | (a = x & b > y) | ..., с учетом направления сортировки"""
+        conditions = Q()
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            conditions |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+
+        # диапазон по первому полю позволяет использовать индекс
+        first = ordering[0]
+        return Q(**{f"{first.lstrip('-')}__{'lte' if first.startswith('-') else 'gte'}": position[0]}) & conditions
+
+    @staticmethod
+    def get_value(obj: Model, field: str) -> Any:
+        value = obj
+        for attr in field.lstrip('-').split('__'):
+            value = getattr(value, 'pk' if attr == 'pk' else attr)
+        return value
+
+    @staticmethod
+    def encode_cursor(position: list) -> str:
+        # isoformat сохраняет микросекунды, без них позиция в created неточна
+        data = json.dumps(
+            position, default=lambda value: value.isoformat() if hasattr(value, 'isoformat') else str(value)
+        )
+        return urlsafe_b64encode(data.encode()).decode()
+
+    def decode_cursor(self, model: type[Model], ordering: list[str], cursor: str) -> list:
+        try:
+            position = json.loads(urlsafe_b64decode(cursor.encode()))
+            if not isinstance(position, list) or len(position) != len(ordering):
+                raise ValueError
+            return [self.to_python(model, field, value) for field, value in zip(ordering, position)]
+        except (BinasciiError, ValueError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def to_python(model: type[Model], field: str, value: Any) -> Any:
+        name = field.lstrip('-')
+        try:
+            model_field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return value
+        return model_field.to_python(value)
+
+    def get_html_context(self) -> dict:
+        if self.cursor_mode or self.count is None:
+            return {'previous_url': None, 'next_url': self.get_next_link(), 'page_links': []}
+        return super().get_html_context()
@@ -1,45 +1,58 @@
-from typing import Any
 from rest_framework.generics import GenericAPIView
 from rest_framework.permissions import IsAuthenticated, SAFE_METHODS
 from rest_framework.request import Request
-from goals.models import Goal, GoalCategory, GoalComment, Board, BoardParticipant
+from goals.models import BoardParticipant
 
+WRITE_ROLES = (BoardParticipant.Role.owner, BoardParticipant.Role.writer)
 
-class BoardPermission(IsAuthenticated):
 
-    def has_object_permission(self, request: Request, view: GenericAPIView, obj: Board) -> bool:
-        _filters: dict[str, Any] = {'user_id': request.user.id, 'board_id': obj.id}
-        if request.method not in SAFE_METHODS:
-            _filters['role'] = BoardParticipant.Role.owner
+def get_board_roles(request: Request) -> dict[int, int]:
+    """роли пользователя на досках {board_id: role}, загружаются один раз за запрос"""
+    roles: dict[int, int] | None = getattr(request, '_board_roles', None)
+    if roles is None:
+        roles = dict(
+            BoardParticipant.objects.filter(user_id=request.user.id).values_list('board_id', 'role')
+        )
+        request._board_roles = roles
+    return roles
 
-        return BoardParticipant.objects.filter(**_filters).exists()
 
+def reset_board_roles(request: Request) -> None:
+    """сбрасывает закешированные роли после изменения участников в рамках запроса"""
+    request.__dict__.pop('_board_roles', None)
 
-class GoalCategoryPermission(IsAuthenticated):
 
-    def has_object_permission(self, request: Request, view: GenericAPIView, obj: GoalCategory) -> bool:
-        _filters: dict[str, Any] = {'user_id': request.user.id, 'board_id': obj.board_id}
-        if request.method not in SAFE_METHODS:
-            _filters['role__in'] = [BoardParticipant.Role.owner, BoardParticipant.Role.writer]
+def has_board_role(request: Request, board_id: int, roles: tuple[int, ...] | None = None) -> bool:
+    """пользователь участник доски, при необходимости с одной из ролей"""
+    role = get_board_roles(request).get(board_id)
+    if role is None:
+        return False
+    return roles is None or role in roles
 
-        return BoardParticipant.objects.filter(**_filters).exists()
 
+class BoardRolePermission(IsAuthenticated):
+    """проверка роли участника доски объекта, на запись нужна одна из write_roles"""
+    write_roles: tuple[int, ...] = WRITE_ROLES
+    # атрибут объекта с id его доски
+    board_field = 'board_id'
 
-class GoalPermission(IsAuthenticated):
+    def has_object_permission(self, request: Request, view: GenericAPIView, obj) -> bool:
+        roles = None if request.method in SAFE_METHODS else self.write_roles
+        return has_board_role(request, getattr(obj, self.board_field), roles)
 
-    def has_object_permission(self, request: Request, view: GenericAPIView, obj: Goal) -> bool:
-        _filters: dict[str, Any] = {'user_id': request.user.id, 'board_id': obj.category.board_id}
-        if request.method not in SAFE_METHODS:
-            _filters['role__in'] = [BoardParticipant.Role.owner, BoardParticipant.Role.writer]
 
-        return BoardParticipant.objects.filter(**_filters).exists()
+class BoardPermission(BoardRolePermission):
+    write_roles = (BoardParticipant.Role.owner,)
+    board_field = 'id'
 
 
-class GoalCommentPermission(IsAuthenticated):
+class GoalCategoryPermission(BoardRolePermission):
+    pass
 
-    def has_object_permission(self, request: Request, view: GenericAPIView, obj: GoalComment) -> bool:
-        _filters: dict[str, Any] = {'user_id': request.user.id, 'board_id': obj.goal.category.board_id}
-        if request.method not in SAFE_METHODS:
-            _filters['role__in'] = [BoardParticipant.Role.owner, BoardParticipant.Role.writer]
 
-        return BoardParticipant.objects.filter(**_filters).exists()
\ No newline at end of file
+class GoalPermission(BoardRolePermission):
+    pass
+
+
+class GoalCommentPermission(BoardRolePermission):
+    pass
@@ -6,7 +6,9 @@ from rest_framework import serializers
 from rest_framework.request import Request
 from core.models import User
 from core.serializers import ProfileSerializer
-from goals.models import GoalCategory, Goal, GoalComment, Board, BoardParticipant
+from goals.models import GoalCategory, Goal, GoalComment, Board, BoardEvent, BoardParticipant
+from goals.permissions import WRITE_ROLES, has_board_role, reset_board_roles
+from goals.versions import bump_board_versions
 
 
 class BoardSerializer(serializers.ModelSerializer):
@@ -17,6 +19,12 @@ class BoardSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class BoardListSerializer(BoardSerializer):
+    """доска в списке: роль текущего пользователя и число участников из аннотаций запроса"""
+    role = serializers.IntegerField(read_only=True)
+    participants_count = serializers.IntegerField(read_only=True)
+
+
 class BoardParticipantSerializer(serializers.ModelSerializer):
 
     role = serializers.ChoiceField(required=True, choices=BoardParticipant.editable_roles)
@@ -42,21 +50,59 @@ class BoardWithParticipantsSerializer(BoardSerializer):
         """действия пользователей на одной доске"""
         requests: Request = self.context['request']
         with transaction.atomic():
-            BoardParticipant.objects.filter(board=instance).exclude(user=requests.user).delete()
-            BoardParticipant.objects.bulk_create(
-                [
-                    BoardParticipant(user=participant['user'], role=participant['role'], board=instance)
-                    for participant in validated_data.get('participants', [])
-                ],
-                ignore_conflicts=True,
-            )
+            if 'participants' in validated_data:
+                self.sync_participants(instance, requests.user, validated_data['participants'])
 
             if title := validated_data.get('title'):
                 instance.title = title
             instance.save()
 
+        reset_board_roles(requests)
         return instance
 
+    @staticmethod
+    def sync_participants(board: Board, user: User, participants: list[dict]) -> None:
+        """
+        применяет только разницу с переданным списком: удаленные, сменившие роль и новые участники,
+        остальные строки не меняются; роль самого пользователя не трогается
+        """
+        # параллельные изменения участников одной доски выполняются по очереди
+        Board.objects.select_for_update().filter(id=board.id).exists()
+        current = {
+            participant.user_id: participant
+            for participant in BoardParticipant.objects.select_for_update().filter(board=board).exclude(user=user)
+        }
+        roles = {participant['user'].id: participant['role'] for participant in participants}
+        removed = [participant.id for user_id, participant in current.items() if user_id not in roles]
+        changed = [
+            participant for user_id, participant in current.items()
+            if user_id in roles and participant.role != roles[user_id]
+        ]
+        added = [
+            BoardParticipant(board=board, user_id=user_id, role=role)
+            for user_id, role in roles.items() if user_id not in current
+        ]
+
+        if removed:
+            # события удаления записывают сигналы
+            BoardParticipant.objects.filter(id__in=removed).delete()
+        now = timezone.now()
+        for participant in changed:
+            participant.role, participant.updated = roles[participant.user_id], now
+        BoardParticipant.objects.bulk_update(changed, ('role', 'updated'))
+        # участника могли добавить в обход блокировки доски, повторная строка не нужна
+        BoardParticipant.objects.bulk_create(added, ignore_conflicts=True)
+        if changed or added:
+            bump_board_versions(board.id)
+            BoardEvent.record(
+                BoardEvent.Kind.participant, BoardEvent.Action.updated,
+                [(board.id, participant.user_id) for participant in changed],
+            )
+            BoardEvent.record(
+                BoardEvent.Kind.participant, BoardEvent.Action.created,
+                [(board.id, participant.user_id) for participant in added],
+            )
+
 
 class GoalCategoryCreateSerializer(serializers.ModelSerializer):
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())
@@ -71,11 +117,7 @@ class GoalCategoryCreateSerializer(serializers.ModelSerializer):
         if board.is_deleted:
             raise ValidationError('Доска удалена')
 
-        if not BoardParticipant.objects.filter(
-            board_id=board.id,
-            user_id=self.context['request'].user.id,
-            role__in=[BoardParticipant.Role.owner, BoardParticipant.Role.writer],
-        ).exists():
+        if not has_board_role(self.context['request'], board.id, WRITE_ROLES):
             raise PermissionDenied
 
         return board
@@ -95,18 +137,14 @@ class GoalCreateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Goal
-        read_only_fields = ("id", "created", "updated", "user", "is_deleted")
-        fields = "__all__"
+        read_only_fields = ("id", "created", "updated", "user", "board")
+        exclude = ("search_vector",)
 
     def validate_category(self, cat: GoalCategory):
         """категорию существует, цель создает владелец или редактор"""
         if cat.is_deleted:
             raise ValidationError('Категория не найдена')
-        if not BoardParticipant.objects.filter(
-            board_id=cat.board.id,
-            user_id=self.context['request'].user.id,
-            role__in=[BoardParticipant.Role.owner, BoardParticipant.Role.writer],
-        ).exists():
+        if not has_board_role(self.context['request'], cat.board_id, WRITE_ROLES):
             raise PermissionDenied
         return cat
 
@@ -121,8 +159,8 @@ class GoalSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Goal
-        read_only_fields = ("id", "created", "updated", "user")
-        fields = "__all__"
+        read_only_fields = ("id", "created", "updated", "user", "board")
+        exclude = ("search_vector",)
 
 
 class GoalCommentCreateSerializer(serializers.ModelSerializer):
@@ -130,18 +168,14 @@ class GoalCommentCreateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = GoalComment
-        fields = '__all__'
-        read_only_fields = ("id", "created", "updated", "user")
+        exclude = ('search_vector',)
+        read_only_fields = ("id", "created", "updated", "user", "board")
 
     def validate_goal(self, goal: Goal):
         """цель существует, комментарий создает владелец или редактор"""
         if goal.status == Goal.Status.archived:
             raise ValidationError('Цель не найдена')
-        if not BoardParticipant.objects.filter(
-            board_id=goal.category.board.id,
-            user_id=self.context['request'].user.id,
-            role__in=[BoardParticipant.Role.owner, BoardParticipant.Role.writer],
-        ).exists():
+        if not has_board_role(self.context['request'], goal.board_id, WRITE_ROLES):
             raise PermissionDenied
         return goal
 
@@ -150,5 +184,42 @@ class GoalCommentSerializer(GoalCommentCreateSerializer):
 
     class Meta:
         model = GoalComment
-        read_only_fields = ('id', 'created', 'updated', 'user')
-        fields = '__all__'
+        read_only_fields = ('id', 'created', 'updated', 'user', 'board')
+        exclude = ('search_vector',)
+
+
+class SearchParamsSerializer(serializers.Serializer):
+    search = serializers.CharField(required=True, trim_whitespace=True)
+    limit = serializers.IntegerField(required=False, default=20, min_value=1, max_value=100)
+
+
+class ChangesParamsSerializer(serializers.Serializer):
+    since = serializers.IntegerField(required=False, min_value=0)
+    limit = serializers.IntegerField(required=False, default=500, min_value=1, max_value=1000)
+
+
+class GoalBulkSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), min_length=1, max_length=500)
+
+    def validate_ids(self, ids: list[int]) -> list[int]:
+        """без повторов, в исходном порядке"""
+        return list(dict.fromkeys(ids))
+
+
+class GoalBulkUpdateSerializer(GoalBulkSerializer):
+    status = serializers.ChoiceField(choices=Goal.Status.choices, required=False)
+    priority = serializers.ChoiceField(choices=Goal.Priority.choices, required=False)
+    due_date = serializers.DateField(required=False, allow_null=True)
+
+    validate_due_date = GoalCreateSerializer.validate_due_date
+
+    def validate(self, attrs: dict) -> dict:
+        if len(attrs) == 1:
+            raise ValidationError('Не указано, что изменить')
+        return attrs
+
+
+class GoalBulkMoveSerializer(GoalBulkSerializer):
+    category = serializers.PrimaryKeyRelatedField(queryset=GoalCategory.objects.all())
+
+    validate_category = GoalCreateSerializer.validate_category
@@ -0,0 +1,49 @@
+from django.db.models import Model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from goals.models import Board, BoardEvent, BoardParticipant, Goal, GoalCategory, GoalComment
+from goals.versions import bump_board_versions
+
+EVENT_KINDS = {
+    Board: BoardEvent.Kind.board,
+    BoardParticipant: BoardEvent.Kind.participant,
+    GoalCategory: BoardEvent.Kind.category,
+    Goal: BoardEvent.Kind.goal,
+    GoalComment: BoardEvent.Kind.comment,
+}
+
+
+def board_changed(sender: type[Model], instance: Model, action: str) -> None:
+    """
+    меняет версию доски для кеша списков и пишет событие для подписчиков;
+    изменения через update() и bulk_update сигналов не вызывают, там это делается явно
+    """
+    board_id = instance.id if sender is Board else instance.board_id
+    # участник в событии — это пользователь: по нему клиент и поток событий узнают о своем членстве
+    object_id = instance.user_id if sender is BoardParticipant else instance.id
+    bump_board_versions(board_id)
+    BoardEvent.record(EVENT_KINDS[sender], action, [(board_id, object_id)])
+
+
+@receiver(post_save, sender=Board)
+@receiver(post_save, sender=BoardParticipant)
+@receiver(post_save, sender=GoalCategory)
+@receiver(post_save, sender=Goal)
+@receiver(post_save, sender=GoalComment)
+def saved(sender: type[Model], instance: Model, created: bool, **kwargs) -> None:
+    board_changed(sender, instance, BoardEvent.Action.created if created else BoardEvent.Action.updated)
+
+
+@receiver(post_delete, sender=BoardParticipant)
+@receiver(post_delete, sender=GoalCategory)
+@receiver(post_delete, sender=Goal)
+@receiver(post_delete, sender=GoalComment)
+def deleted(sender: type[Model], instance: Model, **kwargs) -> None:
+    board_changed(sender, instance, BoardEvent.Action.deleted)
+
+
+@receiver(post_delete, sender=Board)
+def board_deleted(sender: type[Board], instance: Board, **kwargs) -> None:
+    """события удаленной доски удаляются вместе с ней, остается только сбросить кеш"""
+    bump_board_versions(instance.id)
@@ -0,0 +1,26 @@
+from goals.archive import finish_archive
+from goals.models import Goal, GoalCategory
+from tasks.registry import task
+from tasks.worker import report_progress
+
+
+def archive_progress(archived: int) -> None:
+    report_progress({'archived': archived})
+
+
+@task(name='goals.archive_board')
+def archive_board(board_id: int) -> dict:
+    """архивирование целей удаленной доски, которое не успел закончить запрос"""
+    archived, _ = finish_archive(
+        Goal.objects.filter(board_id=board_id, board__is_deleted=True), board_id, progress=archive_progress
+    )
+    return {'archived': archived}
+
+
+@task(name='goals.archive_category')
+def archive_category(category_id: int) -> dict:
+    category = GoalCategory.objects.get(id=category_id)
+    archived, _ = finish_archive(
+        category.goals.filter(category__is_deleted=True), category.board_id, progress=archive_progress
+    )
+    return {'archived': archived}
@@ -0,0 +1,157 @@
+import csv
+import json
+from itertools import islice
+from typing import AsyncIterator, Iterable, Iterator
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F, Model
+from rest_framework.exceptions import ValidationError
+
+from core.models import User
+from goals.models import Board, BoardEvent, BoardParticipant, Goal, GoalCategory, GoalComment
+
+# строк в одной выборке серверного курсора при выгрузке
+EXPORT_CHUNK_SIZE = 2000
+IMPORT_BATCH_SIZE = 1000
+
+BOARD_FIELDS = ('id', 'title', 'created', 'updated')
+CATEGORY_FIELDS = ('id', 'title', 'is_deleted', 'created', 'updated')
+GOAL_FIELDS = ('id', 'category', 'title', 'description', 'due_date', 'status', 'priority', 'created', 'updated')
+COMMENT_FIELDS = ('id', 'goal', 'text', 'created', 'updated')
+
+
+def _rows(queryset, fields: tuple[str, ...]) -> Iterator[dict]:
+    """строки через серверный курсор: в памяти не больше EXPORT_CHUNK_SIZE объектов"""
+    return (
+        queryset.annotate(author=F('user__username'))
+        .values(*fields, 'author')
+        .order_by('id')
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+
+def export_board(board: Board) -> Iterator[str]:
+    """доска в формате NDJSON: доска, затем категории, цели и комментарии"""
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    yield encoder.encode({'type': 'board', **{field: getattr(board, field) for field in BOARD_FIELDS}}) + '\n'
+    for kind, queryset, fields in (
+        ('category', GoalCategory.objects.filter(board=board), CATEGORY_FIELDS),
+        ('goal', Goal.objects.filter(board=board), GOAL_FIELDS),
+        ('comment', GoalComment.objects.filter(board=board), COMMENT_FIELDS),
+    ):
+        for row in _rows(queryset, fields):
+            row['user'] = row.pop('author')
+            yield encoder.encode({'type': kind, **row}) + '\n'
+
+
+class _Echo:
+    """файл для csv.writer, который возвращает записанную строку"""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def export_goals_csv(board: Board) -> Iterator[str]:
+    """цели доски в CSV, категория указана названием"""
+    writer = csv.writer(_Echo())
+    fields = ('id', 'category__title', *GOAL_FIELDS[2:])
+    yield writer.writerow([*fields[:1], 'category', *fields[2:], 'user'])
+    for row in _rows(Goal.objects.filter(board=board), fields):
+        yield writer.writerow([row[field] for field in fields] + [row['author']])
+
+
+async def iterate_in_thread(lines: Iterator[str], batch_size: int = EXPORT_CHUNK_SIZE) -> AsyncIterator[str]:
+    """
+    выгрузка для ответа под ASGI: синхронный генератор с запросами к базе читается в потоке
+    пачками строк, синхронный итератор Django под ASGI собрал бы в память целиком
+    """
+    take = sync_to_async(lambda: ''.join(islice(lines, batch_size)))
+    while chunk := await take():
+        yield chunk
+
+
+class BoardImporter:
+    """
+    создает доску из NDJSON, выгруженного export_board: записи пишутся пачками через bulk_create,
+    в памяти остаются только соответствия старых id новым; автором всех записей становится
+    импортирующий пользователь, username из файла не используется
+    """
+
+    def __init__(self, user: User, batch_size: int = IMPORT_BATCH_SIZE):
+        self.user = user
+        self.batch_size = batch_size
+        self.board: Board | None = None
+        self.ids: dict[str, dict[int, int]] = {'category': {}, 'goal': {}}
+        self.pending: dict[str, list[tuple[int, Model]]] = {'category': [], 'goal': [], 'comment': []}
+        self.counts = {'category': 0, 'goal': 0, 'comment': 0}
+
+    def run(self, lines: Iterable[str | bytes]) -> Board:
+        with transaction.atomic():
+            for number, line in enumerate(lines, start=1):
+                if line.strip():
+                    self.add(number, line)
+            if self.board is None:
+                raise ValidationError('Файл не содержит доски')
+            for kind in self.pending:
+                self.flush(kind)
+        return self.board
+
+    def add(self, number: int, line: str | bytes) -> None:
+        try:
+            record = json.loads(line)
+            kind = record.pop('type')
+            if kind == 'board':
+                return self.add_board(record)
+            if self.board is None:
+                raise ValueError('первой должна быть доска')
+            if kind == 'category':
+                obj = GoalCategory(board=self.board, title=record['title'], is_deleted=record.get('is_deleted', False))
+            elif kind == 'goal':
+                obj = Goal(
+                    board=self.board,
+                    category_id=self.new_id('category', record['category']),
+                    **{field: record[field] for field in GOAL_FIELDS[2:7] if field in record},
+                )
+            elif kind == 'comment':
+                obj = GoalComment(board=self.board, goal_id=self.new_id('goal', record['goal']), text=record['text'])
+            else:
+                raise ValueError(f'неизвестный тип записи {kind}')
+            obj.user_id = self.user.id
+            obj.clean_fields(exclude=('board', 'category', 'goal', 'user', 'search_vector'))
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            raise ValidationError(f'Строка {number}: {e}')
+        except DjangoValidationError as e:
+            raise ValidationError(f'Строка {number}: {e.messages}')
+
+        self.pending[kind].append((record.get('id'), obj))
+        if len(self.pending[kind]) >= self.batch_size:
+            self.flush(kind)
+
+    def add_board(self, record: dict) -> None:
+        if self.board is not None:
+            raise ValueError('в файле может быть только одна доска')
+        self.board = Board.objects.create(title=record['title'])
+        BoardParticipant.objects.create(board=self.board, user=self.user, role=BoardParticipant.Role.owner)
+
+    def new_id(self, kind: str, old_id: int) -> int:
+        """id созданной записи; записи из очереди сохраняются, если на них уже ссылаются"""
+        if old_id not in self.ids[kind]:
+            self.flush(kind)
+        try:
+            return self.ids[kind][old_id]
+        except KeyError:
+            raise ValueError(f'{kind} {old_id} не найден')
+
+    def flush(self, kind: str) -> None:
+        pending, self.pending[kind] = self.pending[kind], []
+        if not pending:
+            return
+        created = type(pending[0][1]).objects.bulk_create([obj for _, obj in pending])
+        # bulk_create сигналов не вызывает
+        BoardEvent.record(kind, BoardEvent.Action.created, [(self.board.id, obj.id) for obj in created])
+        if kind in self.ids:
+            self.ids[kind].update((old_id, obj.id) for (old_id, _), obj in zip(pending, created))
+        self.counts[kind] += len(created)
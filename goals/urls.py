@@ -5,6 +5,11 @@ urlpatterns = [
     path('board/create', views.BoardCreateView.as_view(), name='board-create'),
     path('board/list', views.BoardListView.as_view(), name='board-list'),
     path('board/<int:pk>', views.BoardDetailView.as_view(), name='board'),
+    path('board/<int:pk>/export', views.BoardExportView.as_view(), name='board-export'),
+    path('board/<int:pk>/export.csv', views.BoardExportCsvView.as_view(), name='board-export-csv'),
+    path('board/<int:pk>/stats', views.BoardStatsView.as_view(), name='board-stats'),
+    path('board/events', views.BoardEventsView.as_view(), name='board-events'),
+    path('board/import', views.BoardImportView.as_view(), name='board-import'),
 
     path("goal_category/create", views.GoalCategoryCreateView.as_view(), name='category-create'),
     path("goal_category/list", views.GoalCategoryListView.as_view(), name='category-list'),
@@ -13,8 +18,14 @@ urlpatterns = [
     path("goal/create", views.GoalCreateView.as_view(), name='goal-create'),
     path("goal/list", views.GoalListView.as_view(), name='goal-list'),
     path("goal/<int:pk>", views.GoalView.as_view(), name='goal'),
+    path("goal/bulk_update", views.GoalBulkUpdateView.as_view(), name='goal-bulk-update'),
+    path("goal/bulk_archive", views.GoalBulkArchiveView.as_view(), name='goal-bulk-archive'),
+    path("goal/bulk_move", views.GoalBulkMoveView.as_view(), name='goal-bulk-move'),
 
     path('goal_comment/create', views.GoalCommentCreateView.as_view(), name='comment-create'),
     path('goal_comment/list', views.GoalCommentListView.as_view(), name='comments-list'),
     path('goal_comment/<int:pk>', views.GoalCommentView.as_view(), name='comment'),
+
+    path('search', views.SearchView.as_view(), name='search'),
+    path('changes', views.ChangesView.as_view(), name='changes'),
 ]
@@ -0,0 +1,30 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def board_version_key(board_id: int) -> str:
+    return f'board-version:{board_id}'
+
+
+def get_board_versions(board_ids: list[int]) -> dict[int, int]:
+    """версии досок; отсутствующие в кеше получают новую, чтобы не совпасть с вытесненной"""
+    keys = {board_version_key(board_id): board_id for board_id in board_ids}
+    versions = cache.get_many(keys)
+    if missing := {key: time.time_ns() for key in keys if key not in versions}:
+        cache.set_many(missing, timeout=None)
+        versions |= missing
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def bump_board_versions(*board_ids: int) -> None:
+    """после коммита меняет версии досок: закешированные по ним списки больше не используются"""
+    def bump():
+        for board_id in set(board_ids):
+            try:
+                cache.incr(board_version_key(board_id))
+            except ValueError:
+                cache.set(board_version_key(board_id), time.time_ns(), timeout=None)
+
+    transaction.on_commit(bump)
@@ -1,14 +1,44 @@
+import time
+from abc import ABC, abstractmethod
+
+from asgiref.sync import sync_to_async
+from django.contrib.postgres.search import SearchRank
+from django.core.handlers.asgi import ASGIRequest
 from django.db import transaction
-from django.db.models import QuerySet
+from django.db.models import Count, F, OuterRef, Prefetch, Q, QuerySet, Subquery
+from django.db.models.functions import Coalesce
+from django.http import HttpRequest, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views import View
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import generics, permissions, filters
+from rest_framework import generics, permissions, filters, status
 from rest_framework.filters import OrderingFilter, SearchFilter
-from rest_framework.pagination import LimitOffsetPagination
-from goals.permissions import GoalCommentPermission, GoalPermission, GoalCategoryPermission, BoardPermission
-from goals.filters import GoalDateFilter
-from goals.models import GoalCategory, Goal, GoalComment, BoardParticipant, Board
+from rest_framework.request import Request
+from rest_framework.response import Response
+from goals.permissions import GoalCommentPermission, GoalPermission, GoalCategoryPermission, BoardPermission, \
+    WRITE_ROLES, get_board_roles, has_board_role
+from goals.archive import ARCHIVE_INLINE_SECONDS, finish_archive
+from goals.filters import GoalDateFilter, FullTextSearchFilter, search_query
+from goals.caching import CachedListMixin, ConditionalListMixin, ConditionalRetrieveMixin
+from goals.changes import ChangesGone, collect_changes, fetch_changes
+from goals.events import event_stream, hub, latest_event_id
+from goals.pagination import ListPagination
+from goals.transfer import BoardImporter, export_board, export_goals_csv, iterate_in_thread
+from goals.versions import bump_board_versions
+from goals.models import GoalCategory, Goal, GoalComment, BoardParticipant, Board, BoardEvent
+from goals.tasks import archive_board, archive_category
 from goals.serializers import GoalCategoryCreateSerializer, GoalCategorySerializer, GoalCreateSerializer, \
-    GoalSerializer, GoalCommentCreateSerializer, GoalCommentSerializer, BoardSerializer, BoardParticipant, BoardWithParticipantsSerializer
+    GoalSerializer, GoalCommentCreateSerializer, GoalCommentSerializer, BoardSerializer, BoardParticipant, BoardWithParticipantsSerializer, \
+    BoardListSerializer, ChangesParamsSerializer, SearchParamsSerializer, GoalBulkSerializer, GoalBulkUpdateSerializer, GoalBulkMoveSerializer
+from todolist.db.routers import primary_reads
+
+
+def user_boards(user_id: int) -> QuerySet:
+    """
+    подзапрос неудаленных досок пользователя: цели удаленной доски скрыты сразу,
+    пока их архивирование еще не закончено
+    """
+    return BoardParticipant.objects.filter(user_id=user_id, board__is_deleted=False).values('board_id')
 
 
 class BoardCreateView(generics.CreateAPIView):
@@ -20,31 +50,183 @@ class BoardCreateView(generics.CreateAPIView):
         BoardParticipant.objects.create(user=self.request.user, board=serializer.save())
 
 
-class BoardListView(generics.ListAPIView):
+class BoardListView(CachedListMixin, ConditionalListMixin, generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
-    serializer_class = BoardSerializer
+    serializer_class = BoardListSerializer
+    pagination_class = ListPagination
     filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['title', 'created', 'updated']
     ordering = ['title']
 
     def get_queryset(self) -> QuerySet[Board]:
-        """все доски кроме удаленных"""
-        return Board.objects.filter(participants__user_id=self.request.user.id).exclude(is_deleted=True)
+        """
+        все доски кроме удаленных; роль пользователя берется из того же join с участниками,
+        число участников считается подзапросом, без GROUP BY по доскам
+        """
+        participants = (
+            BoardParticipant.objects.filter(board=OuterRef('pk'))
+            .order_by()
+            .values('board')
+            .annotate(count=Count('id'))
+            .values('count')
+        )
+        return Board.objects.filter(participants__user_id=self.request.user.id, is_deleted=False).annotate(
+            role=F('participants__role'),
+            participants_count=Coalesce(Subquery(participants), 0),
+        )
 
 
-class BoardDetailView(generics.RetrieveUpdateDestroyAPIView):
+class BoardDetailView(ConditionalRetrieveMixin, generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [BoardPermission]
     serializer_class = BoardWithParticipantsSerializer
 
     def get_queryset(self) -> QuerySet[Board]:
-        """все доски пользователя кроме удаленных"""
-        return Board.objects.filter(participants__user_id=self.request.user.id).exclude(is_deleted=True)
+        """все доски пользователя кроме удаленных, участники с именами загружаются одним запросом"""
+        return (
+            Board.objects.filter(participants__user_id=self.request.user.id, is_deleted=False)
+            .prefetch_related(Prefetch('participants', queryset=BoardParticipant.objects.select_related('user')))
+        )
 
     def perform_destroy(self, instance: Board) -> None:
-        """отправляем доску в архивный"""
+        """
+        отправляем доску в архивный; цели архивируются пачками без долгих блокировок,
+        что не успело за ARCHIVE_INLINE_SECONDS, доделывает фоновая задача
+        """
         with transaction.atomic():
-            Board.objects.filter(id=instance.id).update(is_deleted=True)
-            instance.categories.update(is_deleted=True)
-            Goal.objects.filter(category__board=instance).update(status=Goal.Status.archived)
+            now = timezone.now()
+            Board.objects.filter(id=instance.id).update(is_deleted=True, updated=now)
+            instance.categories.update(is_deleted=True, updated=now)
+            BoardEvent.record(BoardEvent.Kind.board, BoardEvent.Action.deleted, [(instance.id, instance.id)])
+        _, finished = finish_archive(
+            Goal.objects.filter(board=instance), instance.id, deadline=time.monotonic() + ARCHIVE_INLINE_SECONDS
+        )
+        if not finished:
+            archive_board.delay(user=self.request.user, board_id=instance.id)
+
+
+class BoardExportView(generics.GenericAPIView):
+    """выгрузка доски потоком, без загрузки всех целей в память"""
+    permission_classes = [BoardPermission]
+    content_type = 'application/x-ndjson'
+    extension = 'ndjson'
+
+    def get_queryset(self) -> QuerySet[Board]:
+        return Board.objects.filter(participants__user_id=self.request.user.id).exclude(is_deleted=True)
+
+    def export(self, board: Board):
+        return export_board(board)
+
+    def get(self, request: Request, *args, **kwargs) -> StreamingHttpResponse:
+        board: Board = self.get_object()
+        content = self.export(board)
+        if isinstance(request._request, ASGIRequest):
+            content = iterate_in_thread(content)
+        response = StreamingHttpResponse(content, content_type=self.content_type)
+        response['Content-Disposition'] = f'attachment; filename="board-{board.id}.{self.extension}"'
+        return response
+
+
+class BoardExportCsvView(BoardExportView):
+    content_type = 'text/csv'
+    extension = 'csv'
+
+    def export(self, board: Board):
+        return export_goals_csv(board)
+
+
+class BoardStatsView(generics.GenericAPIView):
+    """количество целей доски по статусам, приоритетам и просроченных, всего и по категориям"""
+    permission_classes = [BoardPermission]
+
+    def get_queryset(self) -> QuerySet[Board]:
+        return Board.objects.filter(participants__user_id=self.request.user.id).exclude(is_deleted=True)
+
+    @staticmethod
+    def get_counters() -> dict[str, Count]:
+        active = ~Q(goals__status=Goal.Status.archived)
+        counters = {
+            f'status_{choice.name}': Count('goals', filter=Q(goals__status=choice)) for choice in Goal.Status
+        }
+        counters |= {
+            f'priority_{choice.name}': Count('goals', filter=active & Q(goals__priority=choice))
+            for choice in Goal.Priority
+        }
+        counters['overdue'] = Count(
+            'goals',
+            filter=Q(goals__due_date__lt=timezone.now().date())
+            & ~Q(goals__status__in=(Goal.Status.done, Goal.Status.archived)),
+        )
+        return counters
+
+    def get(self, request: Request, *args, **kwargs) -> Response:
+        """один запрос с группировкой по категориям, итоги по доске считаются из них"""
+        board: Board = self.get_object()
+        counters = self.get_counters()
+        rows = (
+            GoalCategory.objects.filter(board=board, is_deleted=False)
+            .values('id', 'title')
+            .annotate(**counters)
+            .order_by('title', 'id')
+        )
+
+        categories = [
+            {
+                'id': row['id'],
+                'title': row['title'],
+                'status': {choice.name: row[f'status_{choice.name}'] for choice in Goal.Status},
+                'priority': {choice.name: row[f'priority_{choice.name}'] for choice in Goal.Priority},
+                'overdue': row['overdue'],
+            }
+            for row in rows
+        ]
+        total = {
+            'status': {choice.name: sum(c['status'][choice.name] for c in categories) for choice in Goal.Status},
+            'priority': {choice.name: sum(c['priority'][choice.name] for c in categories) for choice in Goal.Priority},
+            'overdue': sum(c['overdue'] for c in categories),
+        }
+        return Response({'board': board.id, 'total': total, 'categories': categories})
+
+
+class BoardEventsView(View):
+    """
+    server-sent events об изменениях досок пользователя вместо опроса списков,
+    держит соединение открытым, поэтому работает только под ASGI
+    """
+
+    async def get(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse({'detail': 'Доступно только при запуске через ASGI'}, status=501)
+        user_id = await sync_to_async(lambda: request.user.id)()
+        if user_id is None:
+            return JsonResponse({'detail': 'Учетные данные не были предоставлены.'}, status=403)
+
+        try:
+            last_event_id = int(request.headers.get('Last-Event-ID') or request.GET.get('last_event_id', ''))
+        except ValueError:
+            last_event_id = None
+        board_ids = await sync_to_async(list)(user_boards(user_id).values_list('board_id', flat=True))
+
+        response = StreamingHttpResponse(
+            event_stream(hub, board_ids, last_event_id, user_id=user_id), content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        # nginx не должен буферизовать поток
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+class BoardImportView(generics.GenericAPIView):
+    """новая доска из NDJSON выгрузки, тело запроса читается построчно"""
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = BoardSerializer
+
+    def post(self, request: Request, *args, **kwargs) -> Response:
+        importer = BoardImporter(request.user)
+        board = importer.run(request.stream or [])
+        return Response(
+            {'board': self.get_serializer(board).data, 'imported': importer.counts},
+            status=status.HTTP_201_CREATED,
+        )
 
 
 class GoalCategoryCreateView(generics.CreateAPIView):
@@ -52,9 +234,10 @@ class GoalCategoryCreateView(generics.CreateAPIView):
     serializer_class = GoalCategoryCreateSerializer
 
 
-class GoalCategoryListView(generics.ListAPIView):
+class GoalCategoryListView(CachedListMixin, ConditionalListMixin, generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = GoalCategorySerializer
+    pagination_class = ListPagination
     filter_backends = [OrderingFilter, SearchFilter]
     ordering_fields = ["title", "created"]
     ordering = ["title"]
@@ -62,22 +245,33 @@ class GoalCategoryListView(generics.ListAPIView):
 
     def get_queryset(self) -> QuerySet[GoalCategory]:
         """все категории пользователя кроме удаленных"""
-        return GoalCategory.objects.filter(board__participants__user=self.request.user).exclude(is_deleted=True)
+        return (
+            GoalCategory.objects.select_related('user')
+            .filter(board_id__in=user_boards(self.request.user.id))
+            .exclude(is_deleted=True)
+        )
 
 
-class GoalCategoryView(generics.RetrieveUpdateDestroyAPIView):
+class GoalCategoryView(ConditionalRetrieveMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = GoalCategorySerializer
     permission_classes = [GoalCategoryPermission]
 
     def get_queryset(self) -> QuerySet[GoalCategory]:
         """все категории пользователя кроме удаленных"""
-        return GoalCategory.objects.filter(board__participants__user=self.request.user).exclude(is_deleted=True)
+        return (
+            GoalCategory.objects.select_related('user')
+            .filter(board_id__in=user_boards(self.request.user.id))
+            .exclude(is_deleted=True)
+        )
 
     def perform_destroy(self, instance: GoalCategory) -> None:
-        with transaction.atomic():
-            instance.is_deleted = True
-            instance.save(update_fields=('is_deleted',))
-            instance.goals.update(status=Goal.Status.archived)
+        instance.is_deleted = True
+        instance.save(update_fields=('is_deleted',))
+        _, finished = finish_archive(
+            instance.goals.all(), instance.board_id, deadline=time.monotonic() + ARCHIVE_INLINE_SECONDS
+        )
+        if not finished:
+            archive_category.delay(user=self.request.user, category_id=instance.id)
 
 
 class GoalCreateView(generics.CreateAPIView):
@@ -85,10 +279,11 @@ class GoalCreateView(generics.CreateAPIView):
     serializer_class = GoalCreateSerializer
 
 
-class GoalListView(generics.ListAPIView):
+class GoalListView(CachedListMixin, ConditionalListMixin, generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = GoalSerializer
-    filter_backends = [DjangoFilterBackend, OrderingFilter, SearchFilter]
+    pagination_class = ListPagination
+    filter_backends = [DjangoFilterBackend, OrderingFilter, FullTextSearchFilter]
     filterset_class = GoalDateFilter
     ordering_fields = ["title", "created"]
     ordering = ["title"]
@@ -96,19 +291,23 @@ class GoalListView(generics.ListAPIView):
 
     def get_queryset(self) -> QuerySet[Goal]:
         """все цели пользователя, кроме удаленнных"""
-        return Goal.objects.filter(category__board__participants__user=self.request.user).exclude(
-            status=Goal.Status.archived
+        return (
+            Goal.objects.select_related('user')
+            .filter(board_id__in=user_boards(self.request.user.id))
+            .exclude(status=Goal.Status.archived)
         )
 
 
-class GoalView(generics.RetrieveUpdateDestroyAPIView):
+class GoalView(ConditionalRetrieveMixin, generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = GoalSerializer
 
     def get_queryset(self) -> QuerySet[Goal]:
         """все цели пользователя, кроме удаленнных"""
-        return Goal.objects.filter(category__board__participants__user=self.request.user).exclude(
-            status=Goal.Status.archived
+        return (
+            Goal.objects.select_related('user')
+            .filter(board_id__in=user_boards(self.request.user.id))
+            .exclude(status=Goal.Status.archived)
         )
 
     def perform_destroy(self, instance: Goal):
@@ -116,6 +315,97 @@ class GoalView(generics.RetrieveUpdateDestroyAPIView):
         instance.save(update_fields=('status',))
 
 
+class GoalBulkView(generics.GenericAPIView, ABC):
+    """
+    изменение списка целей одним запросом: одна транзакция, роли на досках загружаются один раз,
+    все изменения сохраняются одним bulk_update; по каждой цели возвращается результат
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self) -> QuerySet[Goal]:
+        return (
+            Goal.objects.filter(board_id__in=user_boards(self.request.user.id))
+            .exclude(status=Goal.Status.archived)
+        )
+
+    @abstractmethod
+    def get_changes(self, data: dict) -> dict:
+        """новые значения полей целей"""
+
+    def after_update(self, goals: list[Goal], changes: dict) -> None:
+        pass
+
+    def post(self, request: Request, *args, **kwargs) -> Response:
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids: list[int] = serializer.validated_data['ids']
+        changes = self.get_changes(serializer.validated_data)
+
+        with transaction.atomic():
+            goals = {goal.id: goal for goal in self.get_queryset().filter(id__in=ids).select_for_update()}
+            results, updated, previous_boards = [], [], []
+            now = timezone.now()
+            for goal_id in ids:
+                goal = goals.get(goal_id)
+                if goal is None:
+                    results.append({'id': goal_id, 'result': 'not_found'})
+                elif not has_board_role(request, goal.board_id, WRITE_ROLES):
+                    results.append({'id': goal_id, 'result': 'forbidden'})
+                else:
+                    previous_boards.append(goal.board_id)
+                    for field, value in changes.items():
+                        setattr(goal, field, value)
+                    goal.updated = now
+                    updated.append(goal)
+                    results.append({'id': goal_id, 'result': 'ok'})
+
+            if updated:
+                Goal.objects.bulk_update(updated, fields=[*changes, 'updated'])
+                self.after_update(updated, changes)
+                bump_board_versions(*previous_boards, *(goal.board_id for goal in updated))
+                BoardEvent.record(
+                    BoardEvent.Kind.goal, BoardEvent.Action.updated, [(goal.board_id, goal.id) for goal in updated]
+                )
+                # цели, перенесенные на другую доску, для подписчиков старой доски удалены
+                BoardEvent.record(BoardEvent.Kind.goal, BoardEvent.Action.deleted, [
+                    (board_id, goal.id) for goal, board_id in zip(updated, previous_boards) if board_id != goal.board_id
+                ])
+
+        return Response({'results': results})
+
+
+class GoalBulkUpdateView(GoalBulkView):
+    serializer_class = GoalBulkUpdateSerializer
+
+    def get_changes(self, data: dict) -> dict:
+        return {field: value for field, value in data.items() if field != 'ids'}
+
+
+class GoalBulkArchiveView(GoalBulkView):
+    serializer_class = GoalBulkSerializer
+
+    def get_changes(self, data: dict) -> dict:
+        return {'status': Goal.Status.archived}
+
+
+class GoalBulkMoveView(GoalBulkView):
+    serializer_class = GoalBulkMoveSerializer
+
+    def get_changes(self, data: dict) -> dict:
+        category: GoalCategory = data['category']
+        return {'category_id': category.id, 'board_id': category.board_id}
+
+    def after_update(self, goals: list[Goal], changes: dict) -> None:
+        """комментарии переносятся на доску новой категории вместе с целями"""
+        comments = GoalComment.objects.filter(goal__in=goals).exclude(board_id=changes['board_id'])
+        comment_ids = list(comments.values_list('id', flat=True))
+        GoalComment.objects.filter(id__in=comment_ids).update(board_id=changes['board_id'], updated=goals[0].updated)
+        BoardEvent.record(
+            BoardEvent.Kind.comment, BoardEvent.Action.updated,
+            [(changes['board_id'], comment_id) for comment_id in comment_ids],
+        )
+
+
 class GoalCommentCreateView(generics.CreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = GoalCommentCreateSerializer
@@ -124,22 +414,90 @@ class GoalCommentCreateView(generics.CreateAPIView):
         serializer.save()
 
 
-class GoalCommentListView(generics.ListAPIView):
+class GoalCommentListView(ConditionalListMixin, generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = GoalCommentSerializer
-    pagination_class = LimitOffsetPagination
+    pagination_class = ListPagination
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_fields = ['goal']
+    ordering_fields = ['created', 'updated']
     ordering = ['-created']
 
     def get_queryset(self) -> QuerySet[GoalComment]:
         """все коменты пользователя"""
-        return GoalComment.objects.filter(goal__category__board__participants__user=self.request.user.id)
+        return GoalComment.objects.select_related('user').filter(board_id__in=user_boards(self.request.user.id))
 
 
-class GoalCommentView(generics.RetrieveUpdateDestroyAPIView):
+class GoalCommentView(ConditionalRetrieveMixin, generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = GoalCommentSerializer
 
     def get_queryset(self):
         return GoalComment.objects.select_related('user').filter(user_id=self.request.user.id)
+
+
+class ChangesView(generics.GenericAPIView):
+    """
+    изменения досок, категорий, целей и комментариев пользователя после курсора для синхронизации
+    клиентов; без since возвращает курсор, с которого продолжать после полной загрузки списков
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = ChangesParamsSerializer
+
+    def get(self, request: Request, *args, **kwargs) -> Response:
+        # курсор с отстающей реплики пропустил бы события, которые уже есть в основной базе
+        with primary_reads():
+            return self.get_changes(request)
+
+    def get_changes(self, request: Request) -> Response:
+        params: ChangesParamsSerializer = self.get_serializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        if 'since' not in params.validated_data:
+            return Response({'cursor': latest_event_id()})
+
+        since: int = params.validated_data['since']
+        board_ids = get_board_roles(request)
+        try:
+            events, has_more = fetch_changes(request.user.id, board_ids, since, params.validated_data['limit'])
+        except ChangesGone:
+            return Response(
+                {'detail': 'Курсор устарел, загрузите данные заново', 'cursor': latest_event_id()},
+                status=status.HTTP_410_GONE,
+            )
+        return Response({
+            'cursor': events[-1]['id'] if events else since,
+            'has_more': has_more,
+            **collect_changes(board_ids, events, self.get_serializer_context()),
+        })
+
+
+class SearchView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = SearchParamsSerializer
+
+    def get(self, request: Request, *args, **kwargs) -> Response:
+        """цели и комментарии пользователя, отсортированные по релевантности"""
+        params: SearchParamsSerializer = self.get_serializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        query = search_query(params.validated_data['search'])
+        limit: int = params.validated_data['limit']
+        boards = user_boards(request.user.id)
+
+        goals = (
+            Goal.objects.select_related('user')
+            .filter(board_id__in=boards, search_vector=query)
+            .exclude(status=Goal.Status.archived)
+            .annotate(rank=SearchRank(F('search_vector'), query))
+            .order_by('-rank', '-id')[:limit]
+        )
+        comments = (
+            GoalComment.objects.select_related('user')
+            .filter(board_id__in=boards, search_vector=query)
+            .annotate(rank=SearchRank(F('search_vector'), query))
+            .order_by('-rank', '-id')[:limit]
+        )
+
+        return Response({
+            'goals': GoalSerializer(goals, many=True).data,
+            'comments': GoalCommentSerializer(comments, many=True).data,
+        })
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from tasks.models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'run_at', 'finished')
+    list_filter = ('status', 'name')
+    readonly_fields = ('attempts', 'result', 'error', 'created', 'started', 'finished')
@@ -0,0 +1,35 @@
+import time
+from datetime import timedelta
+
+from django.core.management import BaseCommand
+from django.db import close_old_connections
+from tasks.models import Task
+from tasks.worker import logger, run_batch
+
+
+class Command(BaseCommand):
+    help = 'Воркер фоновых задач; процессов можно запустить несколько, задачи не выполняются дважды'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10, help='Сколько задач забирать за раз')
+        parser.add_argument('--interval', type=float, default=1, help='Пауза в секундах, когда очередь пуста')
+        parser.add_argument(
+            '--stale-timeout', type=int, default=3600,
+            help='Через сколько секунд незавершенная задача упавшего воркера возвращается в очередь',
+        )
+        parser.add_argument('--burst', action='store_true', help='Выйти, когда очередь опустеет')
+
+    def handle(self, *args, **options):
+        stale_timeout = timedelta(seconds=options['stale_timeout'])
+        logger.info('Воркер задач готов к работе')
+        while True:
+            # соединения с базой, как и в запросах, не держатся между выборками
+            close_old_connections()
+            if requeued := Task.requeue_stale(stale_timeout):
+                logger.warning('Возвращено в очередь зависших задач: %s', requeued)
+            count = run_batch(options['batch_size'])
+            close_old_connections()
+            if count < options['batch_size']:
+                if options['burst']:
+                    return
+                time.sleep(options['interval'])
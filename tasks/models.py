@@ -0,0 +1,81 @@
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.models import User
+
+
+class Task(models.Model):
+    """отложенный вызов функции, зарегистрированной декоратором tasks.registry.task"""
+
+    class Status(models.TextChoices):
+        queued = 'queued', 'в очереди'
+        running = 'running', 'выполняется'
+        done = 'done', 'выполнена'
+        failed = 'failed', 'ошибка'
+
+    name = models.CharField(max_length=255)
+    kwargs = models.JSONField(default=dict)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='tasks')
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.queued)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    created = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(null=True, blank=True)
+    finished = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+        indexes = [
+            # воркеры выбирают только задачи в очереди, выполненные в индекс не попадают
+            models.Index(fields=['run_at'], condition=Q(status='queued'), name='task_queued_run_at_idx'),
+        ]
+
+    attempts_exhausted = 'Воркер не завершил задачу, попытки исчерпаны'
+
+    def __str__(self):
+        return f'{self.name} #{self.id}'
+
+    @staticmethod
+    def claim(limit: int) -> list['Task']:
+        """
+        забирает подошедшие по времени задачи, не блокируясь на взятых другими воркерами;
+        задачи, исчерпавшие попытки, не выполняются, а помечаются ошибкой
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            tasks = list(
+                Task.objects.select_for_update(skip_locked=True)
+                .filter(status=Task.Status.queued, run_at__lte=now)
+                .order_by('run_at')[:limit]
+            )
+            exhausted = [task for task in tasks if task.attempts >= task.max_attempts]
+            Task.objects.filter(id__in=[task.id for task in exhausted]).update(
+                status=Task.Status.failed, error=Task.attempts_exhausted, finished=now
+            )
+            tasks = [task for task in tasks if task.attempts < task.max_attempts]
+            Task.objects.filter(id__in=[task.id for task in tasks]).update(
+                status=Task.Status.running, started=now, attempts=F('attempts') + 1
+            )
+        for task in tasks:
+            task.status, task.started, task.attempts = Task.Status.running, now, task.attempts + 1
+        return tasks
+
+    @staticmethod
+    def requeue_stale(timeout: timedelta) -> int:
+        """
+        возвращает в очередь задачи воркеров, которые упали, не закончив выполнение;
+        задачи, исчерпавшие попытки, помечаются ошибкой, иначе каждая попытка снова роняла бы воркер
+        """
+        now = timezone.now()
+        stale = Task.objects.filter(status=Task.Status.running, started__lt=now - timeout)
+        stale.filter(attempts__gte=F('max_attempts')).update(
+            status=Task.Status.failed, error=Task.attempts_exhausted, finished=now
+        )
+        return stale.update(status=Task.Status.queued)
@@ -0,0 +1,54 @@
+from datetime import datetime
+from typing import Any, Callable
+
+from django.utils import timezone
+
+from core.models import User
+from tasks.models import Task
+
+
+class TaskFunction:
+    """функция, которую можно вызвать сразу или поставить в очередь через delay()"""
+
+    def __init__(self, func: Callable, name: str, max_attempts: int, retry_delay: float):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+    def __call__(self, **kwargs: Any) -> Any:
+        return self.func(**kwargs)
+
+    def delay(self, user: User | None = None, run_at: datetime | None = None, **kwargs: Any) -> Task:
+        """
+        задача сохраняется в текущей транзакции: воркер увидит ее только после коммита,
+        аргументы должны сериализоваться в JSON
+        """
+        return Task.objects.create(
+            name=self.name,
+            kwargs=kwargs,
+            user=user,
+            run_at=run_at or timezone.now(),
+            max_attempts=self.max_attempts,
+        )
+
+    def get_retry_delay(self, attempts: int) -> float:
+        """пауза перед повтором растет вдвое с каждой попыткой"""
+        return self.retry_delay * 2 ** (attempts - 1)
+
+
+_registry: dict[str, TaskFunction] = {}
+
+
+def task(name: str | None = None, max_attempts: int = 3, retry_delay: float = 30) -> Callable[[Callable], TaskFunction]:
+    """регистрирует функцию как фоновую задачу; аргументы передаются только по имени"""
+    def decorator(func: Callable) -> TaskFunction:
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        _registry[task_name] = TaskFunction(func, task_name, max_attempts, retry_delay)
+        return _registry[task_name]
+
+    return decorator
+
+
+def get_task(name: str) -> TaskFunction:
+    return _registry[name]
@@ -0,0 +1,10 @@
+from rest_framework import serializers
+from tasks.models import Task
+
+
+class TaskSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Task
+        fields = ('id', 'name', 'status', 'attempts', 'max_attempts', 'run_at', 'result', 'error', 'created',
+                  'started', 'finished')
+        read_only_fields = fields
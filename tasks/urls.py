@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('list', views.TaskListView.as_view(), name='task-list'),
+    path('<int:pk>', views.TaskView.as_view(), name='task'),
+]
@@ -0,0 +1,21 @@
+from django.db.models import QuerySet
+from rest_framework import generics, permissions
+from tasks.models import Task
+from tasks.serializers import TaskSerializer
+
+
+class TaskListView(generics.ListAPIView):
+    """задачи, поставленные пользователем, сначала новые"""
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = TaskSerializer
+
+    def get_queryset(self) -> QuerySet[Task]:
+        return Task.objects.filter(user_id=self.request.user.id).order_by('-id')
+
+
+class TaskView(generics.RetrieveAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = TaskSerializer
+
+    def get_queryset(self) -> QuerySet[Task]:
+        return Task.objects.filter(user_id=self.request.user.id)
@@ -0,0 +1,55 @@
+import logging
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.utils import timezone
+
+from tasks.models import Task
+from tasks.registry import get_task
+
+logger = logging.getLogger(__name__)
+
+_current_task: ContextVar[Task | None] = ContextVar('current_task', default=None)
+
+
+def report_progress(result: dict) -> None:
+    """промежуточный result выполняемой задачи, виден в /tasks до ее завершения; вне воркера ничего не делает"""
+    task = _current_task.get()
+    if task is not None:
+        task.result = result
+        Task.objects.filter(id=task.id).update(result=result)
+
+
+def execute(task: Task) -> None:
+    """выполняет задачу; при ошибке она возвращается в очередь, пока не исчерпаны попытки"""
+    try:
+        func = get_task(task.name)
+    except KeyError:
+        return finish(task, Task.Status.failed, error=f'Неизвестная задача {task.name}')
+
+    token = _current_task.set(task)
+    try:
+        result = func(**task.kwargs)
+    except Exception as e:
+        logger.exception('Задача %s завершилась с ошибкой', task)
+        error = f'{type(e).__name__}: {e}'
+        if task.attempts < task.max_attempts:
+            task.run_at = timezone.now() + timedelta(seconds=func.get_retry_delay(task.attempts))
+            return finish(task, Task.Status.queued, error=error)
+        return finish(task, Task.Status.failed, error=error)
+    finally:
+        _current_task.reset(token)
+    finish(task, Task.Status.done, result=result)
+
+
+def finish(task: Task, status: str, result=None, error: str = '') -> None:
+    task.status, task.result, task.error = status, result, error
+    task.finished = timezone.now() if status != Task.Status.queued else None
+    task.save(update_fields=('status', 'result', 'error', 'finished', 'run_at'))
+
+
+def run_batch(limit: int) -> int:
+    tasks = Task.claim(limit)
+    for task in tasks:
+        execute(task)
+    return len(tasks)
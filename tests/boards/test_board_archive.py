@@ -0,0 +1,85 @@
+import time
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+
+from goals.archive import archive_goals, pending_boards, pending_categories
+from goals.models import Board, BoardParticipant, Goal
+from tasks.models import Task
+from tasks.worker import run_batch
+
+
+@pytest.mark.django_db()
+class TestBoardArchive:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, user, board, board_participant_factory, category_factory, goal_factory):
+        board_participant_factory.create(user=user, board=board, role=BoardParticipant.Role.owner)
+        self.category = category_factory.create(board=board)
+        self.goals = goal_factory.create_batch(5, category=self.category)
+        self.other = goal_factory.create()
+
+    def test_batches(self, board, django_assert_num_queries):
+        """выборка id и обновление диапазона на каждую пачку, одна выборка в конце"""
+        done = []
+        with django_assert_num_queries(3 * 4 + 1):
+            archived, finished = archive_goals(Goal.objects.filter(board=board), batch_size=2, progress=done.append)
+
+        assert (archived, finished) == (5, True)
+        assert done == [2, 4, 5]
+        assert not Goal.objects.filter(board=board).exclude(status=Goal.Status.archived).exists()
+        self.other.refresh_from_db()
+        assert self.other.status != Goal.Status.archived
+
+    def test_resume(self, board):
+        archived, finished = archive_goals(Goal.objects.filter(board=board), deadline=time.monotonic())
+        assert (archived, finished) == (0, False)
+
+        archived, finished = archive_goals(Goal.objects.filter(board=board))
+        assert (archived, finished) == (5, True)
+
+    def test_delete_board(self, auth_client, board):
+        response = auth_client.delete(reverse('goals:board', args=[board.id]))
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert Board.objects.get(id=board.id).is_deleted
+        assert not Goal.objects.filter(board=board).exclude(status=Goal.Status.archived).exists()
+
+    def test_deleted_board_goals_hidden(self, auth_client, board):
+        """цели, которые не успели архивироваться, не видны сразу после удаления доски"""
+        with patch('goals.views.ARCHIVE_INLINE_SECONDS', 0):
+            auth_client.delete(reverse('goals:board', args=[board.id]))
+
+        assert list(pending_boards()) == [board]
+        assert auth_client.get(reverse('goals:goal-list')).json() == []
+
+    def test_deferred_to_task(self, auth_client, board, user):
+        with patch('goals.views.ARCHIVE_INLINE_SECONDS', 0):
+            auth_client.delete(reverse('goals:board', args=[board.id]))
+
+        task = Task.objects.get()
+        assert (task.name, task.kwargs, task.user) == ('goals.archive_board', {'board_id': board.id}, user)
+        with patch('goals.tasks.report_progress') as report_progress:
+            assert run_batch(1) == 1
+        assert not pending_boards().exists()
+        report_progress.assert_called_with({'archived': 5})
+        assert Task.objects.get().result == {'archived': 5}
+
+    def test_command(self, auth_client, board):
+        with patch('goals.views.ARCHIVE_INLINE_SECONDS', 0):
+            auth_client.delete(reverse('goals:category', args=[self.category.id]))
+        assert list(pending_categories()) == [self.category]
+
+        output = StringIO()
+        call_command('archive_deleted', batch_size=3, stdout=output)
+
+        assert output.getvalue().splitlines() == [
+            f'Категория {self.category.id}: архивировано 3 из 5',
+            f'Категория {self.category.id}: архивировано 5 из 5',
+            f'Категория {self.category.id}: готово, архивировано 5',
+        ]
+        assert not pending_categories().exists()
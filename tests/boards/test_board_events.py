@@ -0,0 +1,226 @@
+import asyncio
+import threading
+from unittest.mock import Mock
+
+import pytest
+from django.db import connection, transaction
+from django.urls import reverse
+from rest_framework import status
+
+from goals.events import EventHub, event_key, event_stream, fetch_events, format_event, latest_event_id
+from goals.models import BoardEvent, BoardParticipant
+
+
+def make_event(event_id: int, board_id: int, kind: str = 'goal', action: str = 'updated', txid: int = 0) -> dict:
+    return {
+        'id': event_id, 'txid': txid or event_id, 'board_id': board_id,
+        'kind': kind, 'action': action, 'object_id': event_id * 10,
+    }
+
+
+class StubEvents:
+    """журнал событий в памяти вместо таблицы, события видны в порядке (txid, id)"""
+
+    def __init__(self, events: list[dict]):
+        self.events = events
+        self.queries = 0
+
+    def locate(self, event_id: int) -> tuple[int, int] | None:
+        return next((event_key(e) for e in self.events if e['id'] == event_id), None)
+
+    def fetch(self, after: tuple[int, int] | None, limit: int, board_ids=None) -> list[dict]:
+        self.queries += 1
+        events = [
+            e for e in sorted(self.events, key=event_key)
+            if event_key(e) > (after or (0, 0)) and (board_ids is None or e['board_id'] in board_ids)
+        ]
+        return events[:limit]
+
+    def latest(self) -> tuple[int, int]:
+        return max((event_key(e) for e in self.events), default=(0, 0))
+
+    def hub(self, **kwargs) -> EventHub:
+        return EventHub(fetch=self.fetch, latest=self.latest, locate=self.locate, **kwargs)
+
+
+async def read(stream, count: int) -> list[str]:
+    chunks = [await asyncio.wait_for(stream.__anext__(), timeout=2) for _ in range(count)]
+    await stream.aclose()
+    return chunks
+
+
+@pytest.mark.django_db()
+class TestBoardEventsRecorded:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, user, board, board_participant_factory, category_factory):
+        board_participant_factory.create(user=user, board=board, role=BoardParticipant.Role.owner)
+        self.category = category_factory.create(board=board, user=user)
+
+    def test_goal_created(self, auth_client):
+        response = auth_client.post(
+            reverse('goals:goal-create'), {'title': 'goal', 'category': self.category.id}
+        )
+
+        assert BoardEvent.objects.filter(kind='goal').values_list('board_id', 'action', 'object_id').get() == (
+            self.category.board_id, 'created', response.json()['id']
+        )
+
+    def test_bulk_move(self, auth_client, user, goal_factory, board_factory, category_factory):
+        """перенесенная цель удаляется со старой доски и изменяется на новой"""
+        goal = goal_factory.create(category=self.category)
+        target = category_factory.create(board=board_factory.create(with_owner=user))
+        BoardEvent.objects.all().delete()
+
+        auth_client.post(reverse('goals:goal-bulk-move'), {'ids': [goal.id], 'category': target.id}, format='json')
+
+        assert set(BoardEvent.objects.values_list('board_id', 'action')) == {
+            (self.category.board_id, 'deleted'), (target.board_id, 'updated')
+        }
+
+    def test_stream_requires_asgi(self, auth_client):
+        response = auth_client.get(reverse('goals:board-events'))
+        assert response.status_code == status.HTTP_501_NOT_IMPLEMENTED
+
+
+@pytest.mark.django_db(transaction=True)
+class TestEventVisibility:
+
+    def test_hidden_until_earlier_transaction_commits(self, board):
+        """событие, закоммиченное после незавершенной транзакции, ждет ее коммита и идет после ее событий"""
+        started, release = threading.Event(), threading.Event()
+
+        def long_transaction():
+            try:
+                with transaction.atomic():
+                    BoardEvent.record(BoardEvent.Kind.goal, BoardEvent.Action.updated, [(board.id, 1)])
+                    started.set()
+                    release.wait(timeout=5)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=long_transaction)
+        thread.start()
+        started.wait(timeout=5)
+        BoardEvent.record(BoardEvent.Kind.goal, BoardEvent.Action.updated, [(board.id, 2)])
+        hidden = fetch_events(None, 10, [board.id])
+        release.set()
+        thread.join()
+
+        assert [event['object_id'] for event in hidden if event['kind'] == 'goal'] == []
+        visible = fetch_events(None, 10, [board.id])
+        assert [event['object_id'] for event in visible if event['kind'] == 'goal'] == [1, 2]
+        assert latest_event_id() == visible[-1]['id']
+
+
+class TestEventStream:
+
+    def test_format(self):
+        assert format_event(make_event(5, 1)) == 'id: 5\nevent: goal\ndata: {"board": 1, "action": "updated", "id": 50}\n\n'
+
+    def test_only_events_of_subscribed_boards(self):
+        async def scenario():
+            journal = StubEvents([])
+            hub = journal.hub(interval=0.01)
+            stream = event_stream(hub, [1])
+            first = await stream.__anext__()
+            journal.events += [make_event(1, 2), make_event(2, 1)]
+            return [first] + await read(stream, 1), hub
+
+        chunks, hub = asyncio.run(scenario())
+
+        assert chunks == ['retry: 3000\n\n', format_event(make_event(2, 1))]
+        assert not hub.subscribers
+
+    def test_missed_events_after_last_event_id(self):
+        """при переподключении сначала приходят пропущенные события, затем новые, без повторов"""
+        async def scenario():
+            journal = StubEvents([make_event(i, 1) for i in range(1, 5)])
+            hub = journal.hub(interval=0.01, batch_size=2)
+            stream = event_stream(hub, [1], last_event_id=2)
+            first = await stream.__anext__()
+            journal.events.append(make_event(5, 1))
+            return [first] + await read(stream, 3)
+
+        chunks = asyncio.run(scenario())
+
+        assert chunks[1:] == [format_event(make_event(i, 1)) for i in (3, 4, 5)]
+
+    def test_late_commit_with_lower_id(self):
+        """событие транзакции, закоммиченной позже, приходит, хотя его id меньше уже отправленного"""
+        async def scenario():
+            journal = StubEvents([])
+            hub = journal.hub(interval=0.01)
+            stream = event_stream(hub, [1])
+            first = await stream.__anext__()
+            journal.events.append(make_event(3, 1, txid=10))
+            second = await asyncio.wait_for(stream.__anext__(), timeout=2)
+            journal.events.append(make_event(2, 1, txid=11))
+            return [first, second] + await read(stream, 1)
+
+        chunks = asyncio.run(scenario())
+
+        assert chunks[1:] == [format_event(make_event(3, 1)), format_event(make_event(2, 1))]
+
+    def test_reset_when_too_far_behind(self):
+        async def scenario():
+            journal = StubEvents([make_event(i, 1) for i in range(1, 10)])
+            hub = journal.hub(interval=0.01, queue_size=3)
+            return await read(event_stream(hub, [1], last_event_id=0), 2)
+
+        assert asyncio.run(scenario())[1] == 'id: 9\nevent: reset\ndata: {}\n\n'
+
+    def test_one_query_per_interval_for_all_subscribers(self):
+        async def scenario():
+            journal = StubEvents([])
+            hub = journal.hub(interval=0.05)
+            streams = [event_stream(hub, [board_id], heartbeat=0.01) for board_id in range(20)]
+            for stream in streams:
+                await stream.__anext__()
+            await asyncio.gather(*(read(stream, 1) for stream in streams))
+            return journal.queries
+
+        assert asyncio.run(scenario()) <= 2
+
+    def test_poll_continues_after_trimmed_event(self):
+        """опрос идет от места в журнале: без поиска последнего события, даже если его уже удалили"""
+        async def scenario():
+            journal = StubEvents([make_event(1, 1), make_event(2, 1)])
+            journal.locate = Mock(side_effect=journal.locate)
+            hub = journal.hub(interval=0.01)
+            stream = event_stream(hub, [1], heartbeat=1)
+            await stream.__anext__()
+            journal.events = [make_event(1, 1), make_event(3, 1)]
+            return await read(stream, 1), journal.locate.call_count
+
+        chunks, located = asyncio.run(scenario())
+        assert chunks == [format_event(make_event(3, 1))]
+        assert located == 0
+
+    def test_membership_changes_boards(self):
+        """после добавления на доску пользователь получает ее события, после удаления перестает"""
+        async def scenario():
+            journal = StubEvents([])
+            hub = journal.hub(interval=0.01)
+            stream = event_stream(hub, [1], user_id=7)
+            first = await stream.__anext__()
+            journal.events += [
+                {'id': 1, 'txid': 1, 'board_id': 2, 'kind': 'participant', 'action': 'created', 'object_id': 7},
+                make_event(2, 2),
+                {'id': 3, 'txid': 3, 'board_id': 2, 'kind': 'participant', 'action': 'deleted', 'object_id': 7},
+                make_event(4, 2),
+                make_event(5, 1),
+            ]
+            return [first] + await read(stream, 4)
+
+        chunks = asyncio.run(scenario())
+
+        assert [chunk.split('\n')[0] for chunk in chunks[1:]] == ['id: 1', 'id: 2', 'id: 3', 'id: 5']
+
+    def test_heartbeat(self):
+        async def scenario():
+            journal = StubEvents([])
+            hub = journal.hub(interval=0.01)
+            return await read(event_stream(hub, [1], heartbeat=0.01), 2)
+
+        assert asyncio.run(scenario())[1] == ': ping\n\n'
@@ -0,0 +1,69 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from goals.models import Board, BoardParticipant
+
+
+@pytest.mark.django_db()
+class TestBoardListView:
+    url = reverse('goals:board-list')
+
+    @pytest.fixture(autouse=True)
+    def setup(self, user, board, user_factory, board_participant_factory):
+        board_participant_factory.create(user=user, board=board, role=BoardParticipant.Role.writer)
+        for other in user_factory.create_batch(2):
+            board_participant_factory.create(user=other, board=board, role=BoardParticipant.Role.reader)
+
+    def add_boards(self, user, count: int) -> None:
+        boards = Board.objects.bulk_create(Board(title=f'board {i}') for i in range(count))
+        BoardParticipant.objects.bulk_create(BoardParticipant(user=user, board=board) for board in boards)
+
+    def test_role_and_participants_count(self, auth_client, board):
+        response = auth_client.get(self.url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == [{
+            'id': board.id,
+            'title': board.title,
+            'created': board.created.isoformat().replace('+00:00', 'Z'),
+            'updated': board.updated.isoformat().replace('+00:00', 'Z'),
+            'is_deleted': False,
+            'role': BoardParticipant.Role.writer,
+            'participants_count': 3,
+        }]
+
+    def test_deleted_excluded(self, auth_client, board):
+        Board.objects.filter(id=board.id).update(is_deleted=True)
+        assert auth_client.get(self.url).json() == []
+
+    def test_query_count_does_not_depend_on_number_of_boards(self, auth_client, user, count_queries):
+        """разные строки запроса, чтобы оба ответа не пришли из кеша списков"""
+        self.add_boards(user, 4)
+        few = count_queries(auth_client.get, self.url, {'ordering': 'title'})
+        self.add_boards(user, 495)
+        many = count_queries(auth_client.get, self.url, {'ordering': '-title'})
+
+        assert many == few
+        response = auth_client.get(self.url, {'ordering': 'created'})
+        assert len(response.json()) == 500
+        assert {board['participants_count'] for board in response.json()} == {1, 3}
+
+
+@pytest.mark.django_db()
+class TestBoardDetailQueries:
+
+    def test_query_count_does_not_depend_on_number_of_participants(
+        self, auth_client, user, board, user_factory, board_participant_factory, count_queries
+    ):
+        board_participant_factory.create(user=user, board=board, role=BoardParticipant.Role.owner)
+        url = reverse('goals:board', args=[board.id])
+        few = count_queries(auth_client.get, url)
+        for other in user_factory.create_batch(20):
+            board_participant_factory.create(user=other, board=board, role=BoardParticipant.Role.reader)
+
+        response = auth_client.get(url)
+        assert count_queries(auth_client.get, url) == few
+        usernames = [participant['user'] for participant in response.json()['participants']]
+        assert len(usernames) == 21
+        assert user.username in usernames
@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+from django.db import connection, transaction
+from django.urls import reverse
+from rest_framework import status
+
+from goals.models import BoardEvent, BoardParticipant
+from goals.serializers import BoardWithParticipantsSerializer
+
+
+@pytest.mark.django_db()
+class TestBoardParticipantsSync:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, user, board, user_factory, board_participant_factory):
+        board_participant_factory.create(user=user, board=board, role=BoardParticipant.Role.owner)
+        self.kept, self.promoted, self.removed, self.added = user_factory.create_batch(4)
+        self.kept_participant = board_participant_factory.create(
+            user=self.kept, board=board, role=BoardParticipant.Role.reader
+        )
+        self.promoted_participant = board_participant_factory.create(
+            user=self.promoted, board=board, role=BoardParticipant.Role.reader
+        )
+        board_participant_factory.create(user=self.removed, board=board, role=BoardParticipant.Role.writer)
+        self.url = reverse('goals:board', args=[board.id])
+        BoardEvent.objects.all().delete()
+
+    def put(self, auth_client, board, participants: list[tuple]):
+        return auth_client.put(
+            self.url,
+            {'title': board.title, 'participants': [{'user': user.username, 'role': role} for user, role in participants]},
+            format='json',
+        )
+
+    def test_diff(self, auth_client, user, board):
+        response = self.put(auth_client, board, [
+            (self.kept, BoardParticipant.Role.reader),
+            (self.promoted, BoardParticipant.Role.writer),
+            (self.added, BoardParticipant.Role.reader),
+        ])
+
+        assert response.status_code == status.HTTP_200_OK
+        assert dict(BoardParticipant.objects.filter(board=board).values_list('user_id', 'role')) == {
+            user.id: BoardParticipant.Role.owner,
+            self.kept.id: BoardParticipant.Role.reader,
+            self.promoted.id: BoardParticipant.Role.writer,
+            self.added.id: BoardParticipant.Role.reader,
+        }
+        kept = BoardParticipant.objects.get(id=self.kept_participant.id)
+        assert (kept.created, kept.updated) == (self.kept_participant.created, self.kept_participant.updated)
+        assert BoardParticipant.objects.get(user=self.promoted).id == self.promoted_participant.id
+
+    def test_membership_events(self, auth_client, board):
+        self.put(auth_client, board, [
+            (self.kept, BoardParticipant.Role.reader),
+            (self.promoted, BoardParticipant.Role.writer),
+            (self.added, BoardParticipant.Role.reader),
+        ])
+
+        assert set(BoardEvent.objects.filter(kind='participant').values_list('action', 'object_id')) == {
+            ('deleted', self.removed.id), ('updated', self.promoted.id), ('created', self.added.id),
+        }
+
+    def test_no_changes(self, auth_client, board):
+        self.put(auth_client, board, [
+            (self.kept, BoardParticipant.Role.reader),
+            (self.promoted, BoardParticipant.Role.reader),
+            (self.removed, BoardParticipant.Role.writer),
+        ])
+
+        assert not BoardEvent.objects.filter(kind='participant').exists()
+
+    def test_title_only_keeps_participants(self, auth_client, board):
+        response = auth_client.patch(self.url, {'title': 'new'}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert BoardParticipant.objects.filter(board=board).count() == 4
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConcurrentParticipantsSync:
+
+    def test_same_user_added_concurrently(self, user, board, user_factory, board_participant_factory):
+        """второе изменение ждет первое и видит уже добавленного участника"""
+        board_participant_factory.create(user=user, board=board, role=BoardParticipant.Role.owner)
+        added = user_factory.create()
+        participants = [{'user': added, 'role': BoardParticipant.Role.reader}]
+        inserted, errors = threading.Event(), []
+
+        def first():
+            try:
+                with transaction.atomic():
+                    BoardWithParticipantsSerializer.sync_participants(board, user, participants)
+                    inserted.set()
+                    time.sleep(0.3)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=first)
+        thread.start()
+        inserted.wait(timeout=5)
+        try:
+            with transaction.atomic():
+                BoardWithParticipantsSerializer.sync_participants(board, user, participants)
+        except Exception as e:
+            errors.append(e)
+        thread.join()
+
+        assert errors == []
+        assert BoardParticipant.objects.filter(board=board, user=added).count() == 1
+        assert BoardEvent.objects.filter(kind='participant', action='created', object_id=added.id).count() == 1
@@ -0,0 +1,57 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from goals.models import BoardParticipant
+from goals.permissions import GoalPermission, WRITE_ROLES, get_board_roles, has_board_role, reset_board_roles
+
+
+def participant_queries(context: CaptureQueriesContext) -> int:
+    return sum('"goals_boardparticipant"' in query['sql'] for query in context.captured_queries)
+
+
+@pytest.mark.django_db()
+class TestBoardRoles:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, user, board, board_participant_factory, category_factory):
+        board_participant_factory.create(user=user, board=board, role=BoardParticipant.Role.writer)
+        self.category = category_factory.create(board=board, user=user)
+
+    def make_request(self, user) -> Request:
+        request = Request(APIRequestFactory().post('/'))
+        request.user = user
+        return request
+
+    def test_roles_loaded_once_per_request(self, user, goal_factory):
+        """проверка прав объекта и валидация сериализатора не повторяют запрос ролей"""
+        request = self.make_request(user)
+        goal = goal_factory.create(category=self.category, user=user)
+
+        with CaptureQueriesContext(connection) as context:
+            assert GoalPermission().has_object_permission(request, None, goal)
+            assert has_board_role(request, self.category.board_id, WRITE_ROLES)
+            assert not has_board_role(request, self.category.board_id + 1)
+
+        assert participant_queries(context) == 1
+
+    def test_create_runs_one_participant_query(self, auth_client):
+        with CaptureQueriesContext(connection) as context:
+            response = auth_client.post(reverse('goals:goal-create'), {'title': 'goal', 'category': self.category.id})
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert participant_queries(context) == 1
+
+    def test_reset_after_participants_change(self, user, board):
+        request = self.make_request(user)
+        assert get_board_roles(request) == {board.id: BoardParticipant.Role.writer}
+
+        BoardParticipant.objects.filter(user=user, board=board).update(role=BoardParticipant.Role.reader)
+        assert get_board_roles(request)[board.id] == BoardParticipant.Role.writer
+
+        reset_board_roles(request)
+        assert get_board_roles(request) == {board.id: BoardParticipant.Role.reader}
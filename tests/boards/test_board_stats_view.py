@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from goals.models import BoardParticipant, Goal
+
+
+@pytest.mark.django_db()
+class TestBoardStatsView:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, user, board, board_participant_factory, category_factory, goal_factory):
+        board_participant_factory.create(user=user, board=board, role=BoardParticipant.Role.reader)
+        self.url = reverse('goals:board-stats', args=[board.id])
+        yesterday = timezone.now().date() - timedelta(days=1)
+
+        self.work = category_factory.create(board=board, title='A work')
+        goal_factory.create_batch(2, category=self.work, priority=Goal.Priority.high, due_date=yesterday)
+        goal_factory.create(category=self.work, status=Goal.Status.done, due_date=yesterday)
+        goal_factory.create(category=self.work, status=Goal.Status.archived, priority=Goal.Priority.high)
+        self.empty = category_factory.create(board=board, title='B empty')
+        category_factory.create(board=board, is_deleted=True)
+        goal_factory.create()
+
+    def test_auth_required(self, client):
+        response = client.get(self.url)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_stats(self, auth_client):
+        """архивные цели не учитываются в приоритетах, выполненные не просрочены"""
+        response = auth_client.get(self.url)
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data['total'] == {
+            'status': {'to_do': 2, 'in_progress': 0, 'done': 1, 'archived': 1},
+            'priority': {'low': 0, 'medium': 1, 'high': 2, 'critical': 0},
+            'overdue': 2,
+        }
+        assert [(category['id'], category['overdue']) for category in data['categories']] == [
+            (self.work.id, 2), (self.empty.id, 0)
+        ]
+
+    def test_single_query(self, auth_client, count_queries):
+        """сессия, пользователь, доска, роли и один запрос со статистикой"""
+        assert count_queries(auth_client.get, self.url) == 5
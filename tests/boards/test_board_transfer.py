@@ -0,0 +1,102 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+
+from goals.models import Board, BoardParticipant, Goal, GoalCategory, GoalComment
+
+
+def read_stream(response) -> str:
+    return b''.join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db()
+class TestBoardTransfer:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, user, board, board_participant_factory, category_factory, goal_factory, goal_comment_factory):
+        board_participant_factory.create(user=user, board=board, role=BoardParticipant.Role.reader)
+        self.board = board
+        categories = category_factory.create_batch(2, board=board, user=user)
+        for category in categories:
+            for goal in goal_factory.create_batch(3, category=category, priority=Goal.Priority.high):
+                goal_comment_factory.create(goal=goal, user=user)
+
+    def export(self, auth_client) -> str:
+        response = auth_client.get(reverse('goals:board-export', args=[self.board.id]))
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/x-ndjson'
+        return read_stream(response)
+
+    def test_export_of_foreign_board(self, auth_client, board_factory):
+        response = auth_client.get(reverse('goals:board-export', args=[board_factory.create().id]))
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_export(self, auth_client):
+        """доска, затем категории, цели и комментарии"""
+        records = [json.loads(line) for line in self.export(auth_client).splitlines()]
+
+        assert [record['type'] for record in records] == ['board'] + ['category'] * 2 + ['goal'] * 6 + ['comment'] * 6
+        assert records[0]['title'] == self.board.title
+
+    def test_export_csv(self, auth_client):
+        response = auth_client.get(reverse('goals:board-export-csv', args=[self.board.id]))
+
+        lines = read_stream(response).splitlines()
+        assert lines[0].split(',')[:3] == ['id', 'category', 'title']
+        assert len(lines) == 7
+
+    def test_import_copies_board(self, auth_client, user):
+        """копия доски принадлежит импортирующему, связи между записями сохраняются"""
+        data = self.export(auth_client)
+
+        response = auth_client.post(reverse('goals:board-import'), data=data, content_type='application/x-ndjson')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.json()['imported'] == {'category': 2, 'goal': 6, 'comment': 6}
+        board = Board.objects.get(id=response.json()['board']['id'])
+        assert BoardParticipant.objects.get(board=board).user == user
+        assert set(Goal.objects.filter(board=board).values_list('category__board', 'priority')) == {
+            (board.id, Goal.Priority.high)
+        }
+        assert set(GoalComment.objects.filter(board=board).values_list('goal__board', 'user')) == {(board.id, user.id)}
+
+    def test_import_ignores_usernames_from_file(self, auth_client, user, user_factory):
+        """файл нельзя использовать, чтобы записать цели на чужой аккаунт"""
+        other = user_factory.create()
+        data = self.export(auth_client).replace(f'"user": "{user.username}"', f'"user": "{other.username}"')
+
+        response = auth_client.post(reverse('goals:board-import'), data=data, content_type='application/x-ndjson')
+
+        board = Board.objects.get(id=response.json()['board']['id'])
+        assert set(Goal.objects.filter(board=board).values_list('user', flat=True)) == {user.id}
+        assert set(GoalComment.objects.filter(board=board).values_list('user', flat=True)) == {user.id}
+
+    def test_import_in_batches(self, auth_client, user, count_queries, tmp_path, goal_factory):
+        """количество запросов зависит от числа пачек, а не записей"""
+        def import_queries() -> int:
+            path = tmp_path / 'board.ndjson'
+            path.write_text(self.export(auth_client))
+            return count_queries(call_command, 'import_board', str(path), user=user.username, batch_size=1000)
+
+        small = import_queries()
+        goal_factory.create_batch(10, category=GoalCategory.objects.filter(board=self.board).first(), user=user)
+
+        assert import_queries() == small
+        assert Board.objects.count() == 3
+
+    def test_invalid_import_rolled_back(self, auth_client):
+        lines = self.export(auth_client).splitlines()
+        goal = json.loads(lines[3])
+        lines[3] = json.dumps({**goal, 'status': 42})
+
+        response = auth_client.post(
+            reverse('goals:board-import'), data='\n'.join(lines), content_type='application/x-ndjson'
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'Строка 4' in response.json()[0]
+        assert Board.objects.count() == 1
+        assert GoalCategory.objects.count() == 2
@@ -0,0 +1,90 @@
+import threading
+import time
+
+from bot.tg.sender import MessageSender, TokenBucket
+
+
+class FakeClient:
+
+    def __init__(self):
+        self.sent: list[tuple[int, str, float]] = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def send_message(self, chat_id: int, text: str) -> None:
+        self.release.wait()
+        self.sent.append((chat_id, text, time.monotonic()))
+
+
+class TestTokenBucket:
+
+    def test_rate_and_capacity(self):
+        now = [0.0]
+        bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0])
+
+        bucket.consume()
+        bucket.consume()
+        assert bucket.delay() == 0.5
+
+        now[0] = 10
+        assert bucket.delay() == 0
+        assert bucket.is_full
+
+
+class TestMessageSender:
+
+    def test_send_does_not_wait_for_telegram(self):
+        client = FakeClient()
+        client.release.clear()
+        sender = MessageSender(client)
+
+        started = time.monotonic()
+        sender.send(1, 'text')
+        assert time.monotonic() - started < 0.1
+
+        client.release.set()
+        assert sender.flush(timeout=5)
+        assert [(chat_id, text) for chat_id, text, _ in client.sent] == [(1, 'text')]
+
+    def test_pending_messages_of_chat_batched(self):
+        """сообщения, накопившиеся за время отправки, уходят одним сообщением"""
+        client = FakeClient()
+        client.release.clear()
+        sender = MessageSender(client, chat_rate=100)
+
+        sender.send(1, 'a')
+        time.sleep(0.05)
+        sender.send(1, 'b')
+        sender.send(1, 'c')
+        client.release.set()
+
+        assert sender.flush(timeout=5)
+        assert [text for _, text, _ in client.sent] == ['a', 'b\nc']
+
+    def test_chat_rate_limit(self):
+        """в один чат не чаще chat_rate сообщений в секунду, другие чаты не ждут"""
+        client = FakeClient()
+        sender = MessageSender(client, chat_rate=10)
+
+        sender.send(1, 'a')
+        sender.flush(timeout=5)
+        sender.send(1, 'b')
+        sender.send(2, 'c')
+        assert sender.flush(timeout=5)
+
+        sent = {text: sent_at for _, text, sent_at in client.sent}
+        assert sent['b'] - sent['a'] >= 0.09
+        assert sent['c'] < sent['b']
+
+    def test_global_rate_limit(self):
+        client = FakeClient()
+        sender = MessageSender(client, rate=20, chat_rate=100)
+
+        started = time.monotonic()
+        for chat_id in range(25):
+            sender.send(chat_id, 'text')
+        assert sender.flush(timeout=5)
+
+        # 20 токенов в запасе, остальные 5 со скоростью 20 в секунду
+        assert time.monotonic() - started >= 0.2
+        assert len(client.sent) == 25
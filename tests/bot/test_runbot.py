@@ -0,0 +1,73 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from django.core.management import CommandError
+
+from bot.management.commands.runbot import Command
+from bot.tg.client import TgClientError
+
+
+class TestPoll:
+
+    @pytest.fixture()
+    def command(self):
+        command = Command()
+        command.tg_client = Mock()
+        return command
+
+    @patch('bot.management.commands.runbot.asyncio.sleep', new_callable=AsyncMock)
+    def test_backoff_after_errors(self, sleep, command):
+        command.tg_client.get_updates.side_effect = [
+            TgClientError('Telegram getUpdates: 502', 502),
+            TgClientError('Telegram getUpdates: ConnectionError'),
+            TgClientError('Telegram getUpdates: 409', 409),
+        ]
+
+        with pytest.raises(CommandError):
+            asyncio.run(command.poll(Mock()))
+
+        assert [call.args[0] for call in sleep.await_args_list] == [1, 2]
+
+    @pytest.mark.parametrize('status', [401, 409])
+    @patch('bot.management.commands.runbot.asyncio.sleep', new_callable=AsyncMock)
+    def test_stops_on_fatal_status(self, sleep, command, status):
+        command.tg_client.get_updates.side_effect = TgClientError(f'Telegram getUpdates: {status}', status)
+
+        with pytest.raises(CommandError):
+            asyncio.run(command.poll(Mock()))
+
+        assert command.tg_client.get_updates.call_count == 1
+        sleep.assert_not_awaited()
+
+
+class Stop(Exception):
+    pass
+
+
+class TestDrain:
+
+    @pytest.fixture()
+    def command(self):
+        command = Command()
+        command.claim_updates = Mock(side_effect=[[], Stop])
+        return command
+
+    @patch('bot.management.commands.runbot.asyncio.sleep', new_callable=AsyncMock)
+    def test_claims_only_free_capacity(self, sleep, command):
+        dispatcher = Mock(concurrency=4, pending=3)
+
+        with pytest.raises(Stop):
+            asyncio.run(command.drain(dispatcher))
+
+        assert command.claim_updates.call_args.args == (1,)
+
+    @patch('bot.management.commands.runbot.asyncio.sleep', new_callable=AsyncMock)
+    def test_waits_while_dispatcher_busy(self, sleep, command):
+        dispatcher = Mock(concurrency=2, pending=2)
+        sleep.side_effect = [None, Stop]
+
+        with pytest.raises(Stop):
+            asyncio.run(command.drain(dispatcher))
+
+        command.claim_updates.assert_not_called()
@@ -0,0 +1,99 @@
+from unittest.mock import Mock, patch
+
+import pytest
+
+from bot.management.commands.runbot import Command
+from bot.models import TgUser
+from bot.tg.schemas import Message
+from bot.tg.state import DatabaseStateStore, MemoryStateStore, TgBotStatus
+from goals.models import BoardParticipant, Goal, GoalCategory
+
+
+class TestMemoryStateStore:
+
+    def test_state_per_chat(self):
+        store = MemoryStateStore()
+        store.set(1, TgBotStatus(TgBotStatus.GOAL_CREATE, category_id=10))
+
+        assert store.get(1).status_b == TgBotStatus.GOAL_CREATE
+        assert store.get(1).category_id == 10
+        assert store.get(2).status_b == TgBotStatus.STOK
+
+    def test_least_recently_used_chat_evicted(self):
+        store = MemoryStateStore(maxsize=2)
+        for chat_id in (1, 2):
+            store.set(chat_id, TgBotStatus(TgBotStatus.CAT_CHOICE))
+        store.get(1)
+        store.set(3, TgBotStatus(TgBotStatus.CAT_CHOICE))
+
+        assert store.get(1).status_b == TgBotStatus.CAT_CHOICE
+        assert store.get(2).status_b == TgBotStatus.STOK
+
+    def test_state_expires(self):
+        store = MemoryStateStore(ttl=10)
+        with patch('bot.tg.state.time.monotonic', return_value=0):
+            store.set(1, TgBotStatus(TgBotStatus.CAT_CHOICE))
+        with patch('bot.tg.state.time.monotonic', return_value=11):
+            assert store.get(1).status_b == TgBotStatus.STOK
+
+
+@pytest.mark.django_db()
+class TestDatabaseStateStore:
+
+    def test_state_saved_in_tg_user(self, goal_category):
+        TgUser.objects.create(chat_id=1)
+        DatabaseStateStore().set(1, TgBotStatus(TgBotStatus.GOAL_CREATE, category_id=goal_category.id))
+
+        state = DatabaseStateStore().get(1)
+
+        assert (state.status_b, state.category_id) == (TgBotStatus.GOAL_CREATE, goal_category.id)
+
+    def test_unknown_chat(self):
+        assert DatabaseStateStore().get(1).status_b == TgBotStatus.STOK
+
+
+@pytest.mark.django_db()
+class TestConcurrentGoalCreation:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, board, category_factory, user_factory, board_participant_factory):
+        self.users = user_factory.create_batch(2)
+        for chat_id, user in enumerate(self.users, start=1):
+            board_participant_factory.create(board=board, user=user, role=BoardParticipant.Role.writer)
+            category_factory.create(board=board, user=user, title=f'category {chat_id}')
+            TgUser.objects.create(chat_id=chat_id, user=user)
+
+    def test_chats_do_not_overwrite_each_other(self):
+        """два пользователя создают цели одновременно, каждый в своей категории"""
+        with patch('bot.management.commands.runbot.TgClient'), patch('bot.management.commands.runbot.get_sender'):
+            command = Command()
+        command.state_store = DatabaseStateStore()
+        command.sender = Mock()
+
+        for chat_id, text in [
+            (1, '/create'), (2, '/create'),
+            (1, 'category 1'), (2, 'category 2'),
+            (2, 'goal 2'), (1, 'goal 1'),
+        ]:
+            command.handle_message(Message(chat={'id': chat_id}, text=text))
+
+        assert sorted(Goal.objects.values_list('title', 'category__title', 'user_id')) == [
+            ('goal 1', 'category 1', self.users[0].id),
+            ('goal 2', 'category 2', self.users[1].id),
+        ]
+
+    def test_deleted_category_resets_state(self, board):
+        """категорию удалили до ввода цели, диалог начинается заново"""
+        with patch('bot.management.commands.runbot.TgClient'), patch('bot.management.commands.runbot.get_sender'):
+            command = Command()
+        command.state_store = DatabaseStateStore()
+        command.sender = Mock()
+
+        command.handle_message(Message(chat={'id': 1}, text='/create'))
+        command.handle_message(Message(chat={'id': 1}, text='category 1'))
+        GoalCategory.objects.filter(title='category 1').update(is_deleted=True)
+        command.handle_message(Message(chat={'id': 1}, text='goal 1'))
+
+        assert not Goal.objects.exists()
+        assert command.state_store.get(1).status_b == TgBotStatus.STOK
+        command.sender.send.assert_called_with(chat_id=1, text='Категория не найдена')
@@ -0,0 +1,161 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from bot.tg.client import RequestMetrics, TgClient, TgClientError
+
+SEND_MESSAGE_OK = {'ok': True, 'result': {'chat': {'id': 1}, 'text': 'text'}}
+
+
+class StubTelegram(ThreadingHTTPServer):
+    """локальный сервер, отвечающий заранее заданными ответами"""
+
+    def __init__(self, responses: list[tuple[int, dict]]):
+        self.responses = list(responses)
+        self.requests: list[str] = []
+        self.bodies: list[dict] = []
+        self.connections: set[int] = set()
+        super().__init__(('127.0.0.1', 0), StubHandler)
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_port}'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.respond()
+
+    def do_POST(self):
+        self.server.bodies.append(json.loads(self.rfile.read(int(self.headers['Content-Length']))))
+        self.respond()
+
+    def respond(self):
+        self.server.requests.append(self.path)
+        self.server.connections.add(self.client_address[1])
+        status, body = self.server.responses.pop(0)
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def stub_server():
+    servers = []
+
+    def _wrapper(*responses: tuple[int, dict]) -> StubTelegram:
+        server = StubTelegram(responses)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield _wrapper
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture()
+def make_client():
+    def _wrapper(server: StubTelegram, **kwargs) -> TgClient:
+        client = TgClient(token='token', base_url=server.url, session=requests.Session(), **kwargs)
+        client.metrics = RequestMetrics()
+        return client
+
+    return _wrapper
+
+
+class TestTgClient:
+
+    def test_connection_reused(self, stub_server, make_client):
+        """запросы идут через одно keep-alive соединение"""
+        server = stub_server(*[(200, SEND_MESSAGE_OK)] * 3)
+        client = make_client(server)
+
+        for _ in range(3):
+            client.send_message(chat_id=1, text='text')
+
+        assert len(server.requests) == 3
+        assert len(server.connections) == 1
+
+    @patch('bot.tg.client.time.sleep')
+    def test_retry_with_backoff_on_server_error(self, sleep, stub_server, make_client):
+        server = stub_server((502, {}), (500, {}), (200, SEND_MESSAGE_OK))
+        client = make_client(server, backoff=0.5)
+
+        response = client.send_message(chat_id=1, text='text')
+
+        assert response.ok is True
+        assert [call.args[0] for call in sleep.call_args_list] == [0.5, 1.0]
+        assert client.metrics.snapshot()['sendMessage']['retries'] == 2
+
+    @patch('bot.tg.client.time.sleep')
+    def test_retry_after_on_too_many_requests(self, sleep, stub_server, make_client):
+        server = stub_server(
+            (429, {'ok': False, 'error_code': 429, 'parameters': {'retry_after': 7}}), (200, SEND_MESSAGE_OK)
+        )
+
+        make_client(server).send_message(chat_id=1, text='text')
+
+        sleep.assert_called_once_with(7.0)
+
+    @patch('bot.tg.client.time.sleep')
+    def test_client_error_not_retried(self, sleep, stub_server, make_client):
+        server = stub_server((400, {'ok': False, 'description': 'Bad Request'}))
+
+        with pytest.raises(TgClientError):
+            make_client(server).send_message(chat_id=1, text='text')
+
+        assert len(server.requests) == 1
+        sleep.assert_not_called()
+
+    @patch('bot.tg.client.time.sleep')
+    def test_retries_exhausted(self, sleep, stub_server, make_client):
+        server = stub_server(*[(503, {})] * 3)
+        client = make_client(server, max_retries=2)
+
+        with pytest.raises(TgClientError):
+            client.send_message(chat_id=1, text='text')
+
+        stats = client.metrics.snapshot()['sendMessage']
+        assert (stats['requests'], stats['errors'], stats['retries']) == (3, 3, 2)
+
+    def test_latency_metrics(self, stub_server, make_client):
+        server = stub_server((200, {'ok': True, 'result': []}))
+        client = make_client(server)
+
+        client.get_updates(timeout=0)
+
+        stats = client.metrics.snapshot()['getUpdates']
+        assert stats['requests'] == 1
+        assert 0 < stats['avg_time'] <= stats['max_time']
+
+    def test_webhook_secret_sent_in_body(self, stub_server, make_client):
+        server = stub_server((200, {'ok': True, 'result': True}))
+
+        make_client(server).set_webhook('https://example.com/bot/webhook', 'secret')
+
+        assert server.requests == ['/bottoken/setWebhook']
+        assert server.bodies == [{'url': 'https://example.com/bot/webhook', 'secret_token': 'secret'}]
+
+    @patch('bot.tg.client.time.sleep')
+    def test_token_not_logged_on_connection_error(self, sleep, caplog):
+        client = TgClient(token='token', base_url='http://127.0.0.1:1', session=requests.Session(), max_retries=1)
+
+        with pytest.raises(TgClientError) as error:
+            client.send_message(chat_id=1, text='text')
+
+        assert 'token' not in str(error.value)
+        assert caplog.messages and not any('token' in message for message in caplog.messages)
@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import time
+
+from bot.tg.dispatcher import UpdateDispatcher
+from bot.tg.schemas import UpdateObj
+
+
+def make_update(update_id: int, chat_id: int) -> UpdateObj:
+    return UpdateObj(update_id=update_id, message={'chat': {'id': chat_id}, 'text': str(update_id)})
+
+
+class TestUpdateDispatcher:
+
+    def run(self, dispatcher: UpdateDispatcher, updates: list[UpdateObj]) -> None:
+        async def _run():
+            for update in updates:
+                dispatcher.dispatch(update)
+            await dispatcher.join()
+
+        try:
+            asyncio.run(_run())
+        finally:
+            dispatcher.close()
+
+    def test_messages_of_one_chat_in_order(self):
+        """сообщения одного чата обрабатываются по порядку"""
+        handled = []
+
+        def handler(msg):
+            time.sleep(0.01 if int(msg.text) % 2 else 0)
+            handled.append((msg.chat.id, msg.text))
+
+        self.run(UpdateDispatcher(handler, concurrency=4), [make_update(i, chat_id=i % 2) for i in range(10)])
+
+        for chat_id in (0, 1):
+            texts = [text for chat, text in handled if chat == chat_id]
+            assert texts == [str(i) for i in range(10) if i % 2 == chat_id]
+
+    def test_chats_handled_concurrently(self):
+        """медленный чат не задерживает остальные, параллелизм ограничен concurrency"""
+        active = 0
+        max_active = 0
+        lock = threading.Lock()
+
+        def handler(msg):
+            nonlocal active, max_active
+            with lock:
+                active += 1
+                max_active = max(max_active, active)
+            time.sleep(0.05)
+            with lock:
+                active -= 1
+
+        started = time.monotonic()
+        self.run(UpdateDispatcher(handler, concurrency=3), [make_update(i, chat_id=i) for i in range(6)])
+
+        assert max_active == 3
+        assert time.monotonic() - started < 0.05 * 6
+
+    def test_handler_error_does_not_stop_chat(self):
+        """ошибка в обработчике не останавливает обработку следующих сообщений чата"""
+        handled = []
+
+        def handler(msg):
+            if msg.text == '0':
+                raise RuntimeError
+            handled.append(msg.text)
+
+        self.run(UpdateDispatcher(handler, concurrency=1), [make_update(i, chat_id=1) for i in range(3)])
+
+        assert handled == ['1', '2']
+
+    def test_done_only_after_successful_handling(self):
+        acked = []
+
+        def handler(msg):
+            if msg.text == '0':
+                raise RuntimeError
+
+        async def _run():
+            for i in range(2):
+                dispatcher.dispatch(make_update(i, chat_id=1), done=lambda i=i: acked.append(i))
+            await dispatcher.join()
+
+        dispatcher = UpdateDispatcher(handler, concurrency=1)
+        try:
+            asyncio.run(_run())
+        finally:
+            dispatcher.close()
+
+        assert acked == [1]
+
+    def test_pending_counts_unfinished_messages(self):
+        """pending уменьшается и после ошибки обработчика"""
+        seen = []
+
+        def handler(msg):
+            seen.append(dispatcher.pending)
+            if msg.text == '0':
+                raise RuntimeError
+
+        async def _run():
+            for i in range(3):
+                dispatcher.dispatch(make_update(i, chat_id=1))
+            assert dispatcher.pending == 3
+            await dispatcher.join()
+
+        dispatcher = UpdateDispatcher(handler, concurrency=1)
+        try:
+            asyncio.run(_run())
+        finally:
+            dispatcher.close()
+
+        assert seen == [3, 2, 1]
+        assert dispatcher.pending == 0
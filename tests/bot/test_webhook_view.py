@@ -0,0 +1,122 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from bot.models import TgUpdate
+
+SECRET = 'webhook-secret'
+# обновление в том виде, в котором его присылает Telegram
+UPDATE = {
+    'update_id': 715420001,
+    'message': {
+        'message_id': 12,
+        'from': {'id': 100500, 'is_bot': False, 'first_name': 'Ivan', 'language_code': 'ru'},
+        'chat': {'id': 100500, 'first_name': 'Ivan', 'type': 'private'},
+        'date': 1687000000,
+        'text': '/goals',
+        'entities': [{'offset': 0, 'length': 6, 'type': 'bot_command'}],
+    },
+}
+
+
+@pytest.mark.django_db()
+class TestWebhookView:
+    url = reverse('bot:webhook')
+
+    @pytest.fixture(autouse=True)
+    def setup(self, settings):
+        settings.BOT_WEBHOOK_SECRET = SECRET
+
+    def post(self, client, data: dict, secret: str = SECRET):
+        return client.post(self.url, data=data, format='json', HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN=secret)
+
+    def test_update_enqueued(self, client):
+        response = self.post(client, UPDATE)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert TgUpdate.objects.get().payload == UPDATE
+
+    def test_repeated_delivery_enqueued_once(self, client):
+        """Telegram повторяет доставку, если не получил ответ"""
+        self.post(client, UPDATE)
+        self.post(client, UPDATE)
+
+        assert TgUpdate.objects.count() == 1
+
+    def test_wrong_secret(self, client):
+        response = self.post(client, UPDATE, secret='wrong')
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert not TgUpdate.objects.exists()
+
+    def test_disabled_without_secret(self, client, settings):
+        settings.BOT_WEBHOOK_SECRET = ''
+
+        response = self.post(client, UPDATE, secret='')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_update_without_message_skipped(self, client):
+        response = self.post(client, {'update_id': 1, 'edited_message': UPDATE['message']})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert not TgUpdate.objects.exists()
+
+    def test_update_enqueued_with_chat(self, client):
+        self.post(client, UPDATE)
+
+        assert TgUpdate.objects.get().chat_id == UPDATE['message']['chat']['id']
+
+
+@pytest.mark.django_db()
+class TestClaimUpdates:
+    lease = timedelta(minutes=5)
+
+    def add(self, update_id: int, chat_id: int) -> TgUpdate:
+        return TgUpdate.objects.create(update_id=update_id, chat_id=chat_id, payload={'update_id': update_id})
+
+    def claim(self, limit: int = 10) -> list[int]:
+        return [update.update_id for update in TgUpdate.claim(limit, self.lease)]
+
+    def test_claim_in_update_order(self):
+        for update_id in (3, 1, 2):
+            self.add(update_id, chat_id=update_id)
+
+        assert self.claim(limit=2) == [1, 2]
+        assert self.claim(limit=2) == [3]
+        assert self.claim(limit=2) == []
+
+    def test_chat_claimed_by_one_worker(self):
+        """пока обновления чата закреплены за воркером, новые сообщения этого чата другим не достаются"""
+        self.add(1, chat_id=1)
+        self.add(2, chat_id=2)
+        assert self.claim(limit=1) == [1]
+
+        self.add(3, chat_id=1)
+        assert self.claim() == [2]
+
+        TgUpdate.objects.get(update_id=1).delete()
+        assert self.claim() == [3]
+
+    def test_not_deleted_until_done(self):
+        """обновление, обработка которого не завершилась, забирается снова после истечения срока"""
+        self.add(1, chat_id=1)
+        self.claim()
+
+        with patch('bot.models.timezone.now', return_value=timezone.now() + self.lease * 2):
+            assert self.claim() == [1]
+        assert TgUpdate.objects.get().attempts == 2
+
+    def test_dropped_after_max_attempts(self):
+        self.add(1, chat_id=1)
+        for hours in range(3):
+            with patch('bot.models.timezone.now', return_value=timezone.now() + timedelta(hours=hours)):
+                assert self.claim() == [1]
+
+        with patch('bot.models.timezone.now', return_value=timezone.now() + timedelta(hours=3)):
+            assert self.claim() == []
+        assert not TgUpdate.objects.exists()
@@ -0,0 +1,28 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from goals.models import BoardParticipant
+
+
+@pytest.mark.django_db()
+class TestCategoryListView:
+    url = reverse('goals:category-list')
+
+    @pytest.fixture(autouse=True)
+    def setup(self, user, board, board_participant_factory, category_factory, user_factory):
+        board_participant_factory.create(user=user, board=board, role=BoardParticipant.Role.owner)
+        for author in user_factory.create_batch(10):
+            category_factory.create(board=board, user=author)
+
+    def test_auth_required(self, client):
+        """ошибка если пользователь неавторизован"""
+        response = client.get(self.url)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_query_count_does_not_depend_on_page_size(self, auth_client, count_queries):
+        """количество запросов не растет вместе с размером страницы"""
+        small_page = count_queries(auth_client.get, self.url, {'limit': 1})
+        large_page = count_queries(auth_client.get, self.url, {'limit': 10})
+
+        assert small_page == large_page
@@ -0,0 +1,44 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from goals.models import BoardParticipant
+
+
+@pytest.mark.django_db()
+class TestCommentListView:
+    url = reverse('goals:comments-list')
+
+    @pytest.fixture(autouse=True)
+    def setup(self, user, board, board_participant_factory, category_factory, goal_factory,
+              goal_comment_factory, user_factory):
+        board_participant_factory.create(user=user, board=board, role=BoardParticipant.Role.owner)
+        self.goal = goal_factory.create(category=category_factory.create(board=board, user=user), user=user)
+        for author in user_factory.create_batch(10):
+            goal_comment_factory.create(goal=self.goal, user=author)
+
+    def test_auth_required(self, client):
+        """ошибка если пользователь неавторизован"""
+        response = client.get(self.url)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_list_comments_of_goal(self, auth_client):
+        """участник доски видит комментарии к цели"""
+        response = auth_client.get(self.url, {'goal': self.goal.id, 'limit': 100})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()['count'] == 10
+
+    def test_query_count_does_not_depend_on_page_size(self, auth_client, count_queries):
+        """количество запросов не растет вместе с размером страницы"""
+        small_page = count_queries(auth_client.get, self.url, {'limit': 1})
+        large_page = count_queries(auth_client.get, self.url, {'limit': 10})
+
+        assert small_page == large_page
+
+    def test_cursor_ignores_ordering_by_relation(self, auth_client):
+        """сортировка по связи не разрешена, курсор строится по created и открывает следующую страницу"""
+        first = auth_client.get(self.url, {'cursor': '', 'limit': 6, 'ordering': 'user'}).json()
+        second = auth_client.get(first['next']).json()
+
+        assert len(first['results'] + second['results']) == 10
@@ -1,9 +1,21 @@
+from typing import Callable
 import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 
 pytest_plugins = 'tests.factories'
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """кеш не переживает тест: версии досок и закешированные ответы у каждого теста свои"""
+    cache.clear()
+    yield
+    cache.clear()
+
+
 @pytest.fixture()
 def client() -> APIClient:
     return APIClient()
@@ -13,3 +25,14 @@ def client() -> APIClient:
 def auth_client(client, user) -> APIClient:
     client.force_login(user)
     return client
+
+
+@pytest.fixture()
+def count_queries() -> Callable:
+    """количество SQL-запросов, выполненных при вызове функции"""
+    def _wrapper(func: Callable, *args, **kwargs) -> int:
+        with CaptureQueriesContext(connection) as context:
+            func(*args, **kwargs)
+        return len(context.captured_queries)
+
+    return _wrapper
@@ -0,0 +1,65 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import reverse
+from rest_framework import status
+
+from goals.models import BoardParticipant
+
+
+def call(method, *args, **kwargs):
+    """запрос AsyncClient из синхронного теста, ORM остается в потоке теста"""
+    async def request():
+        return await method(*args, **kwargs)
+
+    return async_to_sync(request)()
+
+
+@pytest.fixture()
+def async_client(client, user) -> AsyncClient:
+    """клиент, который обращается к приложению через ASGI"""
+    client.force_login(user)
+    async_client = AsyncClient()
+    async_client.cookies = client.cookies
+    return async_client
+
+
+@pytest.mark.django_db()
+class TestAsgi:
+
+    def test_profile(self, async_client, user):
+        response = call(async_client.get, reverse('core:profile'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()['username'] == user.username
+
+    def test_auth_required(self):
+        response = call(AsyncClient().get, reverse('core:profile'))
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_method_not_allowed(self, async_client):
+        response = call(async_client.post, reverse('core:profile'))
+        assert response.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
+
+    def test_goal_list(self, async_client, user, board_participant_factory, goal_factory):
+        participant = board_participant_factory.create(user=user, role=BoardParticipant.Role.reader)
+        goal = goal_factory.create(category__board=participant.board)
+
+        response = call(async_client.get, reverse('goals:goal-list'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [item['id'] for item in response.json()] == [goal.id]
+
+    def test_export_streamed_by_async_iterator(self, async_client, user, board_participant_factory, goal_factory):
+        """под ASGI выгрузка отдается асинхронным итератором, а не собирается в память целиком"""
+        participant = board_participant_factory.create(user=user, role=BoardParticipant.Role.reader)
+        goals = goal_factory.create_batch(3, category__board=participant.board)
+
+        async def export():
+            response = await async_client.get(reverse('goals:board-export-csv', args=[participant.board_id]))
+            return response, b''.join([chunk async for chunk in response.streaming_content])
+
+        response, content = async_to_sync(export)()
+
+        assert response.is_async
+        assert len(content.decode().splitlines()) == len(goals) + 1
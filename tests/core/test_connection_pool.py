@@ -0,0 +1,123 @@
+import pytest
+from django.db import OperationalError, connection
+from psycopg2 import OperationalError as ServerError
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS, TRANSACTION_STATUS_UNKNOWN
+
+from todolist.db.pooled.base import ConnectionPool, DatabaseWrapper, get_pool
+
+
+class FakeConnection:
+    """соединение psycopg2 без базы: статус транзакции и результат проверки задаются в тесте"""
+
+    def __init__(self, healthy: bool = True):
+        self.healthy = healthy
+        self.closed = 0
+        self.rolled_back = False
+        self.info = type('Info', (), {'transaction_status': TRANSACTION_STATUS_IDLE})()
+
+    def cursor(self):
+        connection = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, sql):
+                if not connection.healthy:
+                    raise ServerError('server closed the connection')
+
+        return Cursor()
+
+    def rollback(self):
+        self.rolled_back = True
+        self.info.transaction_status = TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class TestConnectionPool:
+
+    def test_reuse(self):
+        pool = ConnectionPool(size=2, timeout=0)
+        first = pool.acquire(FakeConnection)
+        pool.release(first)
+
+        assert pool.acquire(FakeConnection) is first
+
+    def test_exhausted(self):
+        pool = ConnectionPool(size=1, timeout=0)
+        pool.acquire(FakeConnection)
+
+        with pytest.raises(OperationalError):
+            pool.acquire(FakeConnection)
+
+    def test_release_frees_slot(self):
+        pool = ConnectionPool(size=1, timeout=0)
+        pool.release(pool.acquire(FakeConnection))
+        pool.release(pool.acquire(FakeConnection))
+
+        assert len(pool.idle) == 1
+
+    def test_rollback_on_release(self):
+        pool = ConnectionPool(size=1, timeout=0)
+        conn = pool.acquire(FakeConnection)
+        conn.info.transaction_status = TRANSACTION_STATUS_INTRANS
+        pool.release(conn)
+
+        assert conn.rolled_back
+        assert pool.acquire(FakeConnection) is conn
+
+    def test_broken_discarded_on_release(self):
+        pool = ConnectionPool(size=1, timeout=0)
+        conn = pool.acquire(FakeConnection)
+        conn.info.transaction_status = TRANSACTION_STATUS_UNKNOWN
+        pool.release(conn)
+
+        assert conn.closed
+        assert pool.acquire(FakeConnection) is not conn
+
+    def test_health_check(self):
+        pool = ConnectionPool(size=1, timeout=0)
+        conn = pool.acquire(FakeConnection)
+        pool.release(conn)
+        conn.healthy = False
+
+        assert pool.acquire(FakeConnection) is not conn
+        assert conn.closed
+
+    def test_connect_error_frees_slot(self):
+        pool = ConnectionPool(size=1, timeout=0)
+
+        def connect():
+            raise OperationalError('connection refused')
+
+        with pytest.raises(OperationalError):
+            pool.acquire(connect)
+        assert pool.acquire(FakeConnection)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestPooledBackend:
+
+    def test_connection_reused(self):
+        wrapper = DatabaseWrapper({**connection.settings_dict, 'ENGINE': 'todolist.db.pooled', 'POOL_SIZE': 2}, 'pooled')
+        try:
+            wrapper.connect()
+            raw = wrapper.connection
+            with wrapper.cursor() as cursor:
+                cursor.execute('SELECT pg_backend_pid()')
+                pid = cursor.fetchone()[0]
+            wrapper.close()
+
+            wrapper.connect()
+            with wrapper.cursor() as cursor:
+                cursor.execute('SELECT pg_backend_pid()')
+                assert cursor.fetchone()[0] == pid
+            assert wrapper.connection is raw
+        finally:
+            wrapper.close()
+            get_pool(wrapper.settings_dict).close()
@@ -0,0 +1,98 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from bot.models import TgUser
+from goals.events import latest_event_key
+from goals.models import Goal
+from todolist.db.middleware import PIN_COOKIE, ReplicaMiddleware
+from todolist.db.routers import ReplicaRouter, primary_reads, replica_reads
+
+router = ReplicaRouter()
+
+
+def read_alias(request):
+    """ответ с базой, из которой представление читало бы цели"""
+    return HttpResponse(router.db_for_read(Goal))
+
+
+async def async_read_alias(request):
+    return read_alias(request)
+
+
+@pytest.fixture(autouse=True)
+def replicas(settings):
+    settings.REPLICA_DATABASES = ['replica_0']
+    settings.REPLICA_PIN_SECONDS = 5
+
+
+class TestReplicaRouter:
+
+    def test_default_outside_requests(self):
+        assert router.db_for_read(Goal) == 'default'
+
+    def test_replica_reads(self):
+        with replica_reads():
+            assert router.db_for_read(Goal) == 'replica_0'
+            assert router.db_for_read(TgUser) == 'default'
+            assert router.db_for_write(Goal) == 'default'
+            with primary_reads():
+                assert router.db_for_read(Goal) == 'default'
+
+    def test_one_replica_per_block(self, settings):
+        """реплика выбирается один раз, все чтения блока видят одно состояние"""
+        settings.REPLICA_DATABASES = [f'replica_{number}' for number in range(10)]
+        with replica_reads():
+            aliases = {router.db_for_read(Goal) for _ in range(20)}
+
+        assert len(aliases) == 1
+
+    @pytest.mark.django_db()
+    def test_latest_event_key_on_primary(self):
+        """реплики replica_0 в тестах нет: запрос к ней завершился бы ошибкой"""
+        with replica_reads():
+            assert latest_event_key() == (0, 0)
+
+    def test_no_replicas(self, settings):
+        settings.REPLICA_DATABASES = []
+        with replica_reads():
+            assert router.db_for_read(Goal) == 'default'
+
+    def test_migrate_only_default(self):
+        assert router.allow_migrate('default', 'goals')
+        assert not router.allow_migrate('replica_0', 'goals')
+
+
+class TestReplicaMiddleware:
+
+    @pytest.mark.parametrize('view', [read_alias, async_read_alias])
+    def test_get_reads_replica(self, rf: RequestFactory, view):
+        response = ReplicaMiddleware(view)(rf.get('/goals/goal/list'))
+        if not isinstance(response, HttpResponse):
+            async def wait():
+                return await response
+
+            response = async_to_sync(wait)()
+
+        assert response.content == b'replica_0'
+
+    def test_write_pins_client(self, rf: RequestFactory):
+        response = ReplicaMiddleware(read_alias)(rf.post('/goals/goal/create'))
+
+        assert response.content == b'default'
+        assert response.cookies[PIN_COOKIE]['max-age'] == 5
+
+    def test_failed_write_not_pinned(self, rf: RequestFactory):
+        response = ReplicaMiddleware(lambda request: HttpResponse(status=400))(rf.post('/goals/goal/create'))
+        assert PIN_COOKIE not in response.cookies
+
+    def test_pinned_client_reads_primary(self, rf: RequestFactory):
+        request = rf.get('/goals/goal/list')
+        request.COOKIES[PIN_COOKIE] = '1'
+
+        assert ReplicaMiddleware(read_alias)(request).content == b'default'
+
+    def test_context_reset(self, rf: RequestFactory):
+        ReplicaMiddleware(read_alias)(rf.get('/goals/goal/list'))
+        assert router.db_for_read(Goal) == 'default'
@@ -0,0 +1,40 @@
+import pytest
+
+from goals.models import Goal, GoalComment
+
+
+@pytest.mark.django_db()
+class TestGoalBoardSync:
+
+    def test_goal_takes_board_of_category(self, goal):
+        """цель и комментарий получают доску категории"""
+        comment = GoalComment.objects.create(goal=goal, user=goal.user, text='text')
+
+        assert goal.board_id == goal.category.board_id
+        assert comment.board_id == goal.board_id
+
+    def test_goal_moved_to_another_board(self, goal_comment, category_factory):
+        """при переносе цели в категорию другой доски переносятся и комментарии"""
+        goal = goal_comment.goal
+        goal.category = category_factory.create()
+        goal.save()
+
+        updated = goal_comment.updated
+        goal_comment.refresh_from_db()
+        assert goal.board_id == goal.category.board_id
+        assert goal_comment.board_id == goal.board_id
+        assert goal_comment.updated > updated
+
+    def test_category_moved_to_another_board(self, goal_comment, board_factory):
+        """при переносе категории на другую доску переносятся ее цели и комментарии"""
+        category = goal_comment.goal.category
+        category.board = board_factory.create()
+        category.save()
+
+        goal = Goal.objects.get(id=goal_comment.goal_id)
+        comment = GoalComment.objects.get(id=goal_comment.id)
+        assert goal.board_id == category.board_id
+        assert comment.board_id == category.board_id
+        # ETag перенесенных записей меняется
+        assert goal.updated > goal_comment.goal.updated
+        assert comment.updated > goal_comment.updated
@@ -0,0 +1,92 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from goals.models import BoardParticipant, Goal, GoalComment
+
+
+@pytest.mark.django_db()
+class TestGoalBulkViews:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, user, board, board_participant_factory, category_factory, goal_factory):
+        board_participant_factory.create(user=user, board=board, role=BoardParticipant.Role.owner)
+        self.category = category_factory.create(board=board, user=user)
+        self.goals = goal_factory.create_batch(5, category=self.category, user=user)
+
+        reader_board = board_participant_factory.create(user=user, role=BoardParticipant.Role.reader).board
+        self.read_only_goal = goal_factory.create(category=category_factory.create(board=reader_board))
+        self.foreign_goal = goal_factory.create()
+
+    def test_auth_required(self, client):
+        response = client.post(reverse('goals:goal-bulk-update'), {'ids': [1], 'status': 2}, format='json')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_bulk_update(self, auth_client):
+        """изменяются только цели, доступные пользователю на запись"""
+        ids = [goal.id for goal in self.goals] + [self.read_only_goal.id, self.foreign_goal.id]
+
+        response = auth_client.post(
+            reverse('goals:goal-bulk-update'),
+            {'ids': ids, 'status': Goal.Status.done, 'priority': Goal.Priority.high},
+            format='json',
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()['results'] == [{'id': goal.id, 'result': 'ok'} for goal in self.goals] + [
+            {'id': self.read_only_goal.id, 'result': 'forbidden'},
+            {'id': self.foreign_goal.id, 'result': 'not_found'},
+        ]
+        assert set(Goal.objects.filter(id__in=ids).values_list('status', 'priority')) == {
+            (Goal.Status.done, Goal.Priority.high),
+            (Goal.Status.to_do, Goal.Priority.medium),
+        }
+        assert Goal.objects.get(id=self.read_only_goal.id).status == Goal.Status.to_do
+
+    def test_bulk_update_requires_changes(self, auth_client):
+        response = auth_client.post(reverse('goals:goal-bulk-update'), {'ids': [self.goals[0].id]}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_bulk_archive(self, auth_client):
+        ids = [goal.id for goal in self.goals[:3]]
+
+        response = auth_client.post(reverse('goals:goal-bulk-archive'), {'ids': ids}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert Goal.objects.filter(status=Goal.Status.archived).count() == 3
+
+    def test_bulk_move(self, auth_client, user, board_factory, category_factory, goal_comment_factory):
+        """цели и их комментарии переносятся на доску новой категории"""
+        target = category_factory.create(board=board_factory.create(with_owner=user), user=user)
+        comment = goal_comment_factory.create(goal=self.goals[0])
+
+        response = auth_client.post(
+            reverse('goals:goal-bulk-move'),
+            {'ids': [goal.id for goal in self.goals], 'category': target.id},
+            format='json',
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert set(Goal.objects.filter(user=user).values_list('category_id', 'board_id')) == {
+            (target.id, target.board_id)
+        }
+        assert GoalComment.objects.get(id=comment.id).board_id == target.board_id
+
+    def test_move_to_read_only_category(self, auth_client):
+        response = auth_client.post(
+            reverse('goals:goal-bulk-move'),
+            {'ids': [self.goals[0].id], 'category': self.read_only_goal.category_id},
+            format='json',
+        )
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert Goal.objects.get(id=self.goals[0].id).category_id == self.category.id
+
+    def test_query_count_does_not_depend_on_number_of_goals(self, auth_client, count_queries):
+        url = reverse('goals:goal-bulk-update')
+        one = count_queries(auth_client.post, url, {'ids': [self.goals[0].id], 'status': 2}, format='json')
+        many = count_queries(
+            auth_client.post, url, {'ids': [goal.id for goal in self.goals], 'status': 3}, format='json'
+        )
+
+        assert one == many
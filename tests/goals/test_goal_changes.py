@@ -0,0 +1,161 @@
+import json
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from goals.models import BoardEvent, BoardParticipant
+
+
+# события видны только после коммита записавшей их транзакции
+@pytest.mark.django_db(transaction=True)
+class TestChangesView:
+    url = reverse('goals:changes')
+
+    @pytest.fixture(autouse=True)
+    def setup(self, user, board, board_participant_factory, category_factory, goal_factory):
+        board_participant_factory.create(user=user, board=board, role=BoardParticipant.Role.owner)
+        self.category = category_factory.create(board=board, user=user)
+        self.goal = goal_factory.create(category=self.category, user=user)
+
+    def get_cursor(self, client) -> int:
+        return client.get(self.url).json()['cursor']
+
+    def test_auth_required(self, client):
+        response = client.get(self.url, {'since': 0})
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_changes(self, auth_client, user, goal_factory, goal_comment_factory):
+        cursor = self.get_cursor(auth_client)
+        created = goal_factory.create(category=self.category, user=user)
+        comment = goal_comment_factory.create(goal=created, user=user)
+        auth_client.delete(reverse('goals:goal', args=[self.goal.id]))
+
+        response = auth_client.get(self.url, {'since': cursor})
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data['has_more'] is False
+        assert data['cursor'] == BoardEvent.objects.latest('id').id
+        assert [goal['id'] for goal in data['goals']] == [created.id]
+        assert [item['id'] for item in data['comments']] == [comment.id]
+        assert data['deleted'] == {'boards': [], 'categories': [], 'goals': [self.goal.id], 'comments': []}
+
+        assert auth_client.get(self.url, {'since': data['cursor']}).json()['goals'] == []
+
+    def test_other_boards_hidden(self, auth_client, goal_factory):
+        cursor = self.get_cursor(auth_client)
+        goal_factory.create()
+
+        data = auth_client.get(self.url, {'since': cursor}).json()
+        assert data['goals'] == []
+        assert data['cursor'] == cursor
+
+    def test_removed_from_board(self, auth_client, user, board, user_factory, board_participant_factory):
+        """удаление с доски приходит как удаление доски, хотя доска уже не в списке пользователя"""
+        owner = user_factory.create()
+        board_participant_factory.create(user=owner, board=board, role=BoardParticipant.Role.owner)
+        cursor = self.get_cursor(auth_client)
+        BoardParticipant.objects.get(board=board, user=user).delete()
+
+        data = auth_client.get(self.url, {'since': cursor}).json()
+        assert data['deleted']['boards'] == [board.id]
+
+    def test_pages(self, auth_client, user, goal_factory):
+        cursor = self.get_cursor(auth_client)
+        goals = goal_factory.create_batch(3, category=self.category, user=user)
+
+        first = auth_client.get(self.url, {'since': cursor, 'limit': 2}).json()
+        second = auth_client.get(self.url, {'since': first['cursor'], 'limit': 2}).json()
+
+        assert first['has_more'] is True
+        assert second['has_more'] is False
+        assert [goal['id'] for goal in first['goals'] + second['goals']] == [goal.id for goal in goals]
+
+    def test_cursor_gone(self, auth_client, user, goal_factory):
+        cursor = self.get_cursor(auth_client)
+        goal_factory.create_batch(2, category=self.category, user=user)
+        BoardEvent.objects.filter(id__lte=cursor + 1).update(created=timezone.now() - timedelta(days=30))
+        call_command('trim_board_events', days=7, stdout=StringIO())
+
+        response = auth_client.get(self.url, {'since': cursor})
+
+        assert response.status_code == status.HTTP_410_GONE
+        assert response.json()['cursor'] == BoardEvent.objects.latest('id').id
+
+    def test_start_without_trim_not_gone(self, auth_client, user, goal_factory):
+        """удаленные без очистки события (откат, удаление доски) не делают курсор устаревшим"""
+        BoardEvent.objects.filter(id=BoardEvent.objects.earliest('id').id).delete()
+        goal = goal_factory.create(category=self.category, user=user)
+
+        response = auth_client.get(self.url, {'since': 0})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert goal.id in [item['id'] for item in response.json()['goals']]
+
+    def test_cursor_of_empty_log(self, auth_client, user, goal_factory):
+        """после очистки всего журнала курсор указывает за удаленные события и не устаревает"""
+        BoardEvent.objects.update(created=timezone.now() - timedelta(days=30))
+        call_command('trim_board_events', days=7, stdout=StringIO())
+        cursor = self.get_cursor(auth_client)
+        goal = goal_factory.create(category=self.category, user=user)
+
+        response = auth_client.get(self.url, {'since': cursor})
+
+        assert cursor > 0
+        assert response.status_code == status.HTTP_200_OK
+        assert [item['id'] for item in response.json()['goals']] == [goal.id]
+        assert auth_client.get(self.url, {'since': 0}).status_code == status.HTTP_410_GONE
+
+    def test_category_moved_with_goals(self, auth_client, user, board_factory, goal_comment_factory):
+        """цели и комментарии переносятся через update(), события о них пишутся явно"""
+        comment = goal_comment_factory.create(goal=self.goal, user=user)
+        cursor = self.get_cursor(auth_client)
+        self.category.board = board_factory.create(with_owner=user)
+        self.category.save()
+
+        data = auth_client.get(self.url, {'since': cursor}).json()
+        assert [goal['id'] for goal in data['goals']] == [self.goal.id]
+        assert [item['id'] for item in data['comments']] == [comment.id]
+
+    def test_bulk_move_comments(self, auth_client, user, board_factory, category_factory, goal_comment_factory):
+        comment = goal_comment_factory.create(goal=self.goal, user=user)
+        target = category_factory.create(board=board_factory.create(with_owner=user), user=user)
+        cursor = self.get_cursor(auth_client)
+        auth_client.post(
+            reverse('goals:goal-bulk-move'), {'ids': [self.goal.id], 'category': target.id}, format='json'
+        )
+
+        data = auth_client.get(self.url, {'since': cursor}).json()
+        assert [item['id'] for item in data['comments']] == [comment.id]
+        assert data['comments'][0]['board'] == target.board_id
+
+    def test_imported_board(self, auth_client):
+        """импорт создает записи через bulk_create, события о них пишутся явно"""
+        lines = [
+            {'type': 'board', 'title': 'board'},
+            {'type': 'category', 'id': 1, 'title': 'category'},
+            {'type': 'goal', 'id': 1, 'category': 1, 'title': 'goal'},
+            {'type': 'comment', 'goal': 1, 'text': 'comment'},
+        ]
+        cursor = self.get_cursor(auth_client)
+        auth_client.post(
+            reverse('goals:board-import'), data='\n'.join(map(json.dumps, lines)), content_type='application/x-ndjson'
+        )
+
+        data = auth_client.get(self.url, {'since': cursor}).json()
+        assert [item['title'] for item in data['categories']] == ['category']
+        assert [goal['title'] for goal in data['goals']] == ['goal']
+        assert [item['text'] for item in data['comments']] == ['comment']
+
+    def test_query_count_does_not_depend_on_number_of_changes(self, auth_client, user, goal_factory, count_queries):
+        cursor = self.get_cursor(auth_client)
+        goal_factory.create(category=self.category, user=user)
+        few = count_queries(auth_client.get, self.url, {'since': cursor})
+        goal_factory.create_batch(20, category=self.category, user=user)
+
+        assert count_queries(auth_client.get, self.url, {'since': cursor}) == few
@@ -0,0 +1,77 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from goals.models import BoardParticipant, Goal
+
+
+@pytest.mark.django_db()
+class TestGoalConditionalGet:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, user, board, board_participant_factory, category_factory, goal_factory):
+        board_participant_factory.create(user=user, board=board, role=BoardParticipant.Role.owner)
+        category = category_factory.create(board=board, user=user)
+        self.goals = goal_factory.create_batch(3, category=category, user=user)
+
+    def test_list_not_modified(self, auth_client):
+        """повторный запрос с тем же ETag получает 304 без тела"""
+        url = reverse('goals:goal-list')
+        response = auth_client.get(url)
+        etag = response['ETag']
+
+        response = auth_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b''
+        assert response['ETag'] == etag
+
+    def test_list_changed_after_goal_update(self, auth_client, django_capture_on_commit_callbacks):
+        url = reverse('goals:goal-list')
+        etag = auth_client.get(url)['ETag']
+
+        with django_capture_on_commit_callbacks(execute=True):
+            auth_client.patch(reverse('goals:goal', args=[self.goals[0].id]), {'title': 'new title'})
+        response = auth_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+
+    def test_list_changed_after_archive(self, auth_client, django_capture_on_commit_callbacks):
+        """архивирование сохраняет только status, updated не меняется, но меняется количество"""
+        url = reverse('goals:goal-list')
+        etag = auth_client.get(url)['ETag']
+
+        with django_capture_on_commit_callbacks(execute=True):
+            auth_client.delete(reverse('goals:goal', args=[self.goals[0].id]))
+
+        assert auth_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_200_OK
+
+    def test_list_etag_depends_on_filters(self, auth_client):
+        url = reverse('goals:goal-list')
+        etag = auth_client.get(url)['ETag']
+
+        response = auth_client.get(url, {'search': self.goals[0].title}, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_detail_not_modified(self, auth_client, count_queries):
+        url = reverse('goals:goal', args=[self.goals[0].id])
+        response = auth_client.get(url)
+        assert response['Last-Modified']
+
+        queries = count_queries(auth_client.get, url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+        assert auth_client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code == status.HTTP_304_NOT_MODIFIED
+        assert auth_client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code == (
+            status.HTTP_304_NOT_MODIFIED
+        )
+        assert queries == count_queries(auth_client.get, url)
+
+    def test_detail_changed(self, auth_client):
+        url = reverse('goals:goal', args=[self.goals[0].id])
+        etag = auth_client.get(url)['ETag']
+
+        auth_client.patch(url, {'priority': Goal.Priority.high})
+
+        assert auth_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_200_OK
@@ -0,0 +1,57 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from goals.models import BoardParticipant, Goal
+
+
+@pytest.mark.django_db()
+class TestGoalListPagination:
+    url = reverse('goals:goal-list')
+
+    @pytest.fixture(autouse=True)
+    def setup(self, user, board, board_participant_factory, category_factory, goal_factory):
+        board_participant_factory.create(user=user, board=board, role=BoardParticipant.Role.owner)
+        category = category_factory.create(board=board, user=user)
+        # одинаковые названия: позиция в курсоре различается только по id
+        goal_factory.create_batch(4, category=category, user=user, title='same')
+        goal_factory.create_batch(3, category=category, user=user)
+
+    def collect_pages(self, client, params: dict) -> list[int]:
+        ids = []
+        response = client.get(self.url, params)
+        while True:
+            assert response.status_code == status.HTTP_200_OK
+            assert 'count' not in response.json()
+            ids.extend(goal['id'] for goal in response.json()['results'])
+            if not response.json()['next']:
+                return ids
+            response = client.get(response.json()['next'])
+
+    @pytest.mark.parametrize('ordering', ['title', '-created'])
+    def test_cursor_pages_match_offset_list(self, auth_client, ordering):
+        """курсор проходит все цели в порядке сортировки без повторов и пропусков"""
+        expected = list(Goal.objects.order_by(ordering, 'id').values_list('id', flat=True))
+
+        ids = self.collect_pages(auth_client, {'cursor': '', 'limit': 3, 'ordering': ordering})
+
+        assert ids == expected
+
+    def test_cursor_page_without_count_query(self, auth_client):
+        """страница по курсору не выполняет COUNT(*)"""
+        with CaptureQueriesContext(connection) as context:
+            auth_client.get(self.url, {'cursor': '', 'limit': 3})
+
+        assert not any('COUNT(' in query['sql'] for query in context.captured_queries)
+
+    def test_offset_pages_without_count(self, auth_client):
+        """count=false отключает подсчет, но оставляет ссылку на следующую страницу"""
+        ids = self.collect_pages(auth_client, {'limit': 3, 'count': 'false', 'ordering': '-created'})
+
+        assert ids == list(Goal.objects.order_by('-created').values_list('id', flat=True))
+
+    def test_invalid_cursor(self, auth_client):
+        response = auth_client.get(self.url, {'cursor': 'invalid'})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,58 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from goals.models import BoardParticipant, Goal
+
+
+@pytest.mark.django_db()
+class TestGoalSearch:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, user, board, board_participant_factory, category_factory, goal_factory, goal_comment_factory):
+        board_participant_factory.create(user=user, board=board, role=BoardParticipant.Role.owner)
+        category = category_factory.create(board=board, user=user)
+        self.milk = goal_factory.create(category=category, user=user, title='Купить молоко', description='')
+        self.shop = goal_factory.create(
+            category=category, user=user, title='Зайти в магазин', description='купить хлеб и молоко'
+        )
+        goal_factory.create(category=category, user=user, title='Починить велосипед')
+        self.comment = goal_comment_factory.create(goal=self.shop, user=user, text='Молока в магазинах нет')
+        goal_factory.create(title='Купить молоко')  # цель чужой доски
+
+    def test_goal_list_full_text_search(self, auth_client):
+        """поиск в списке целей учитывает словоформы и описание"""
+        response = auth_client.get(reverse('goals:goal-list'), {'search': 'молоком', 'limit': 10})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert {goal['id'] for goal in response.json()['results']} == {self.milk.id, self.shop.id}
+
+    def test_archived_goals_not_found(self, auth_client):
+        """архивные цели не попадают в результаты"""
+        Goal.objects.filter(id=self.milk.id).update(status=Goal.Status.archived)
+
+        response = auth_client.get(reverse('goals:search'), {'search': 'молоко'})
+
+        assert [goal['id'] for goal in response.json()['goals']] == [self.shop.id]
+
+    def test_search_ranks_goals_and_comments(self, auth_client):
+        """совпадение в названии важнее совпадения в описании, комментарии ищутся вместе с целями"""
+        response = auth_client.get(reverse('goals:search'), {'search': 'молоко'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [goal['id'] for goal in response.json()['goals']] == [self.milk.id, self.shop.id]
+        assert [comment['id'] for comment in response.json()['comments']] == [self.comment.id]
+        assert 'search_vector' not in response.json()['goals'][0]
+
+    def test_search_vector_updated_on_save(self, auth_client):
+        """после изменения названия цель ищется по новому тексту"""
+        self.milk.title = 'Купить кефир'
+        self.milk.save()
+
+        response = auth_client.get(reverse('goals:search'), {'search': 'кефир'})
+
+        assert [goal['id'] for goal in response.json()['goals']] == [self.milk.id]
+
+    def test_search_required(self, auth_client):
+        response = auth_client.get(reverse('goals:search'))
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
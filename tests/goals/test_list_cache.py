@@ -0,0 +1,100 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from goals.caching import metrics
+from goals.models import BoardParticipant, Goal
+
+
+@pytest.mark.django_db()
+class TestListCache:
+    url = reverse('goals:goal-list')
+
+    @pytest.fixture(autouse=True)
+    def setup(self, settings, user, board, board_participant_factory, category_factory, goal_factory):
+        # в тестах кеш в памяти процесса, но запросы и изменения идут в одном процессе
+        settings.LIST_CACHE_ENABLED = True
+        board_participant_factory.create(user=user, board=board, role=BoardParticipant.Role.owner)
+        self.category = category_factory.create(board=board, user=user)
+        self.goals = goal_factory.create_batch(3, category=self.category, user=user)
+        metrics.reset()
+
+    def get_titles(self, auth_client) -> tuple[str, set[str]]:
+        response = auth_client.get(self.url)
+        assert response.status_code == status.HTTP_200_OK
+        return response['X-Cache'], {goal['title'] for goal in response.json()}
+
+    def test_repeated_request_from_cache(self, auth_client, count_queries):
+        """повтор не обращается к целям и не сериализует их"""
+        miss = count_queries(auth_client.get, self.url)
+        hit = count_queries(auth_client.get, self.url)
+
+        assert self.get_titles(auth_client)[0] == 'HIT'
+        assert hit < miss
+        assert metrics.snapshot()['GoalListView'] == {'hits': 2, 'misses': 1}
+
+    def test_query_string_is_part_of_key(self, auth_client):
+        auth_client.get(self.url)
+
+        response = auth_client.get(self.url, {'ordering': '-created'})
+
+        assert response['X-Cache'] == 'MISS'
+
+    def test_cache_is_per_user(self, auth_client, client, user_factory, board_participant_factory, board):
+        auth_client.get(self.url)
+        other = user_factory.create()
+        board_participant_factory.create(user=other, board=board, role=BoardParticipant.Role.reader)
+        client.force_login(other)
+
+        assert client.get(self.url)['X-Cache'] == 'MISS'
+
+    def test_invalidated_by_goal_change(self, auth_client, django_capture_on_commit_callbacks):
+        self.get_titles(auth_client)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            auth_client.patch(reverse('goals:goal', args=[self.goals[0].id]), {'title': 'renamed'})
+
+        cache_status, titles = self.get_titles(auth_client)
+        assert cache_status == 'MISS'
+        assert 'renamed' in titles
+
+    def test_invalidated_by_bulk_update(self, auth_client, django_capture_on_commit_callbacks):
+        """bulk_update сигналов не вызывает, версия доски меняется явно"""
+        self.get_titles(auth_client)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            auth_client.post(
+                reverse('goals:goal-bulk-archive'), {'ids': [self.goals[0].id]}, format='json'
+            )
+
+        assert self.get_titles(auth_client) == ('MISS', {goal.title for goal in self.goals[1:]})
+
+    def test_invalidated_by_new_board(self, auth_client, user, board_factory, goal_factory, category_factory):
+        """новая доска пользователя меняет ключ, даже если версии досок не менялись"""
+        self.get_titles(auth_client)
+        goal = goal_factory.create(category=category_factory.create(board=board_factory.create(with_owner=user)))
+
+        assert goal.title in self.get_titles(auth_client)[1]
+
+    def test_other_board_does_not_invalidate(self, auth_client, goal_factory, django_capture_on_commit_callbacks):
+        self.get_titles(auth_client)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            goal_factory.create(status=Goal.Status.done)
+
+        assert self.get_titles(auth_client)[0] == 'HIT'
+
+    def test_disabled_without_shared_cache(self, auth_client, settings):
+        """кеш в памяти одного процесса не видит изменений из других, список не кешируется"""
+        settings.LIST_CACHE_ENABLED = False
+        auth_client.get(self.url)
+
+        assert 'X-Cache' not in auth_client.get(self.url)
+
+    def test_metrics_logged_periodically(self, auth_client, caplog, monkeypatch):
+        monkeypatch.setattr(metrics, 'log_interval', 0)
+
+        with caplog.at_level('INFO', logger='todolist.metrics'):
+            auth_client.get(self.url)
+
+        assert "Кеш списков: {'GoalListView': {'hits': 0, 'misses': 1}}" in caplog.messages
@@ -0,0 +1,75 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from goals.models import BoardParticipant, Goal
+
+
+@pytest.mark.django_db()
+class TestListQueriesUseIndexes:
+    """планы основных запросов списков используют индексы из Meta.indexes"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, user, board, user_factory, board_factory, board_participant_factory, category_factory):
+        another_user = user_factory.create()
+        board_participant_factory.create(user=user, board=board, role=BoardParticipant.Role.owner)
+        categories = category_factory.create_batch(10, board=board, user=user)
+        for other_board in board_factory.create_batch(30):
+            board_participant_factory.create(board=other_board, user=another_user)
+            self.create_goals(category_factory.create_batch(3, board=other_board, user=another_user), 60)
+        self.create_goals(categories, 200)
+
+        self.category = categories[0]
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+            # на тестовых объемах последовательное чтение всегда дешевле
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    @staticmethod
+    def create_goals(categories: list, count: int) -> None:
+        Goal.objects.bulk_create(
+            Goal(
+                title=f'goal {i}',
+                category=categories[i % len(categories)],
+                board_id=categories[0].board_id,
+                user_id=categories[0].user_id,
+                status=Goal.Status.values[i % len(Goal.Status.values)],
+                priority=Goal.Priority.values[i // 10 % len(Goal.Priority.values)],
+            )
+            for i in range(count)
+        )
+
+    def explain_list_query(self, client, url: str, params: dict, table: str) -> str:
+        with CaptureQueriesContext(connection) as context:
+            client.get(url, params)
+
+        sql = next(
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT') and f'FROM "{table}"' in query['sql']
+            and not query['sql'].startswith('SELECT COUNT(')
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN {sql}')
+            return '\n'.join(row[0] for row in cursor.fetchall())
+
+    def test_goal_list_by_due_date(self, auth_client):
+        plan = self.explain_list_query(
+            auth_client, reverse('goals:goal-list'), {'due_date__gte': '2000-01-01'}, 'goals_goal'
+        )
+        assert 'goal_active_due_date_idx' in plan
+
+    def test_goal_list_by_category_status_priority(self, auth_client):
+        params = {'category': self.category.id, 'status': Goal.Status.to_do, 'priority': Goal.Priority.medium}
+        plan = self.explain_list_query(auth_client, reverse('goals:goal-list'), params, 'goals_goal')
+        assert 'goal_active_category_idx' in plan
+
+    def test_board_participants_by_user(self, auth_client):
+        """доски и роль пользователя находятся по индексу внешнего ключа user_id"""
+        plan = self.explain_list_query(auth_client, reverse('goals:board-list'), {}, 'goals_board')
+        assert 'goals_boardparticipant_user_id' in plan
+
+    def test_goal_list_of_boards(self, auth_client):
+        plan = self.explain_list_query(auth_client, reverse('goals:goal-list'), {}, 'goals_goal')
+        assert 'goal_active_board_idx' in plan
@@ -0,0 +1,35 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from tasks.models import Task
+
+
+@pytest.mark.django_db()
+class TestTaskView:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, user, user_factory):
+        self.task = Task.objects.create(name='goals.archive_board', kwargs={'board_id': 1}, user=user)
+        self.other = Task.objects.create(name='goals.archive_board', user=user_factory.create())
+
+    def test_auth_required(self, client):
+        response = client.get(reverse('tasks:task', args=[self.task.id]))
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_status(self, auth_client):
+        response = auth_client.get(reverse('tasks:task', args=[self.task.id]))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()['status'] == Task.Status.queued
+        assert response.json()['name'] == 'goals.archive_board'
+
+    def test_other_user(self, auth_client):
+        response = auth_client.get(reverse('tasks:task', args=[self.other.id]))
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_list(self, auth_client):
+        response = auth_client.get(reverse('tasks:task-list'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [item['id'] for item in response.json()] == [self.task.id]
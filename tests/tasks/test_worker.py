@@ -0,0 +1,126 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from tasks.models import Task
+from tasks.registry import task
+from tasks.worker import report_progress, run_batch
+
+calls = []
+
+
+@task(name='tests.echo')
+def echo(value: int) -> dict:
+    calls.append(value)
+    return {'value': value}
+
+
+@task(name='tests.flaky', max_attempts=2, retry_delay=10)
+def flaky() -> None:
+    raise RuntimeError('Telegram недоступен')
+
+
+@task(name='tests.progress')
+def progress() -> dict:
+    report_progress({'done': 1})
+    calls.append(Task.objects.get(name='tests.progress').result)
+    return {'done': 2}
+
+
+@pytest.mark.django_db()
+class TestWorker:
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        calls.clear()
+
+    def test_done(self, user):
+        queued = echo.delay(user=user, value=1)
+
+        assert run_batch(10) == 1
+        queued.refresh_from_db()
+        assert queued.status == Task.Status.done
+        assert queued.result == {'value': 1}
+        assert queued.attempts == 1
+        assert queued.finished is not None
+
+    def test_progress_visible_while_running(self):
+        queued = progress.delay()
+        report_progress({'done': 0})
+
+        run_batch(10)
+        queued.refresh_from_db()
+        assert calls == [{'done': 1}]
+        assert queued.result == {'done': 2}
+
+    def test_scheduled(self):
+        echo.delay(run_at=timezone.now() + timedelta(minutes=5), value=1)
+
+        assert run_batch(10) == 0
+        assert calls == []
+
+    def test_order_and_limit(self):
+        for value in range(3):
+            echo.delay(value=value)
+
+        assert run_batch(2) == 2
+        assert run_batch(2) == 1
+        assert calls == [0, 1, 2]
+
+    def test_retry(self):
+        queued = flaky.delay()
+        started = timezone.now()
+
+        run_batch(10)
+        queued.refresh_from_db()
+        assert queued.status == Task.Status.queued
+        assert queued.error == 'RuntimeError: Telegram недоступен'
+        assert queued.run_at >= started + timedelta(seconds=10)
+
+        Task.objects.filter(id=queued.id).update(run_at=timezone.now())
+        run_batch(10)
+        queued.refresh_from_db()
+        assert queued.status == Task.Status.failed
+        assert queued.attempts == 2
+
+    def test_unknown(self):
+        queued = Task.objects.create(name='tests.missing')
+
+        run_batch(10)
+        queued.refresh_from_db()
+        assert queued.status == Task.Status.failed
+        assert queued.attempts == 1
+
+    def test_requeue_stale(self):
+        stale = Task.objects.create(
+            name='tests.echo', kwargs={'value': 1}, status=Task.Status.running,
+            started=timezone.now() - timedelta(hours=2),
+        )
+        Task.objects.create(name='tests.echo', status=Task.Status.running, started=timezone.now())
+
+        assert Task.requeue_stale(timedelta(hours=1)) == 1
+        run_batch(10)
+        stale.refresh_from_db()
+        assert stale.status == Task.Status.done
+
+    def test_stale_without_attempts_failed(self):
+        """задача, которая каждый раз роняет воркер, не возвращается в очередь бесконечно"""
+        stale = Task.objects.create(
+            name='tests.echo', kwargs={'value': 1}, status=Task.Status.running, attempts=3,
+            started=timezone.now() - timedelta(hours=2),
+        )
+
+        assert Task.requeue_stale(timedelta(hours=1)) == 0
+        stale.refresh_from_db()
+        assert stale.status == Task.Status.failed
+        assert stale.error == Task.attempts_exhausted
+        assert stale.finished is not None
+
+    def test_claim_skips_exhausted(self):
+        exhausted = Task.objects.create(name='tests.echo', kwargs={'value': 1}, attempts=3)
+
+        assert run_batch(10) == 0
+        exhausted.refresh_from_db()
+        assert exhausted.status == Task.Status.failed
+        assert calls == []
@@ -0,0 +1,39 @@
+from typing import Callable
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.utils.decorators import sync_and_async_middleware
+
+from todolist.db.routers import replica_reads
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# клиент, который недавно писал, читает из основной базы, пока реплики догоняют его изменения
+PIN_COOKIE = 'db_primary_pin'
+
+
+def use_replica(request: HttpRequest) -> bool:
+    return request.method in SAFE_METHODS and PIN_COOKIE not in request.COOKIES
+
+
+def pin_to_primary(request: HttpRequest, response: HttpResponse) -> HttpResponse:
+    if request.method not in SAFE_METHODS and response.status_code < 400:
+        response.set_cookie(PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax')
+    return response
+
+
+@sync_and_async_middleware
+def ReplicaMiddleware(get_response: Callable) -> Callable:
+    """безопасные запросы читают с реплик, после записи клиент на REPLICA_PIN_SECONDS закрепляется за default"""
+    if iscoroutinefunction(get_response):
+        async def middleware(request: HttpRequest) -> HttpResponse:
+            with replica_reads(use_replica(request)):
+                response = await get_response(request)
+            return pin_to_primary(request, response)
+    else:
+        def middleware(request: HttpRequest) -> HttpResponse:
+            with replica_reads(use_replica(request)):
+                response = get_response(request)
+            return pin_to_primary(request, response)
+
+    return middleware
@@ -0,0 +1,111 @@
+import threading
+from collections import deque
+from typing import Callable
+
+from django.db import OperationalError
+from django.db.backends.postgresql import base
+from psycopg2 import Error as DatabaseError
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_UNKNOWN, connection as Connection
+
+
+class ConnectionPool:
+    """
+    не больше size соединений на процесс; свободные соединения переиспользуются,
+    при исчерпании пула запрос ждет освобождения соединения не дольше timeout секунд
+    """
+
+    def __init__(self, size: int, timeout: float, health_checks: bool = True):
+        self.size = size
+        self.timeout = timeout
+        self.health_checks = health_checks
+        self.idle: deque[Connection] = deque()
+        self.slots = threading.BoundedSemaphore(size)
+        self.lock = threading.Lock()
+        self.isolation_level = None
+
+    def acquire(self, connect: Callable[[], Connection]) -> Connection:
+        if not self.slots.acquire(timeout=self.timeout):
+            raise OperationalError(f'Все {self.size} соединений пула заняты')
+        try:
+            while connection := self._pop_idle():
+                if self.is_usable(connection):
+                    return connection
+                connection.close()
+            return connect()
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def release(self, connection: Connection) -> None:
+        """незавершенная транзакция откатывается, сломанное соединение закрывается"""
+        try:
+            status = connection.info.transaction_status if not connection.closed else TRANSACTION_STATUS_UNKNOWN
+            if status == TRANSACTION_STATUS_UNKNOWN:
+                connection.close()
+                return
+            if status != TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+            with self.lock:
+                self.idle.append(connection)
+        except DatabaseError:
+            connection.close()
+        finally:
+            self.slots.release()
+
+    def close(self) -> None:
+        while connection := self._pop_idle():
+            connection.close()
+
+    def is_usable(self, connection: Connection) -> bool:
+        if connection.closed:
+            return False
+        if not self.health_checks:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except DatabaseError:
+            return False
+        return True
+
+    def _pop_idle(self) -> Connection | None:
+        with self.lock:
+            return self.idle.pop() if self.idle else None
+
+
+_pools: dict[tuple, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(settings_dict: dict) -> ConnectionPool:
+    """пул на процесс для каждой базы, тестовая база получает собственный"""
+    key = (settings_dict['HOST'], settings_dict['PORT'], settings_dict['NAME'], settings_dict['USER'])
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(
+                size=settings_dict.get('POOL_SIZE', 10),
+                timeout=settings_dict.get('POOL_TIMEOUT', 10),
+                health_checks=settings_dict.get('CONN_HEALTH_CHECKS', True),
+            )
+        return _pools[key]
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    postgresql с пулом соединений: close() возвращает соединение в пул вместо разрыва.
+    Под ASGI каждый запрос обрабатывается в своем потоке и CONN_MAX_AGE не помогает,
+    пул общий для всех потоков процесса
+    """
+
+    def get_new_connection(self, conn_params: dict) -> Connection:
+        pool = get_pool(self.settings_dict)
+        connection = pool.acquire(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+        if pool.isolation_level is None:
+            pool.isolation_level = self.isolation_level
+        self.isolation_level = pool.isolation_level
+        return connection
+
+    def _close(self) -> None:
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                get_pool(self.settings_dict).release(self.connection)
@@ -0,0 +1,55 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Model
+
+# приложения, чтение которых можно отдать реплике
+REPLICA_APPS = {'goals', 'core'}
+
+# реплика, выбранная для текущего блока replica_reads, None - чтение из основной базы
+_replica_alias: ContextVar[str | None] = ContextVar('replica_alias', default=None)
+
+
+@contextmanager
+def replica_reads(enabled: bool = True) -> Iterator[None]:
+    """
+    чтения моделей REPLICA_APPS внутри блока идут на одну случайно выбранную реплику: запросы
+    одного HTTP-запроса видят одно состояние; enabled=False возвращает их основной базе
+    """
+    alias = random.choice(settings.REPLICA_DATABASES) if enabled and settings.REPLICA_DATABASES else None
+    token = _replica_alias.set(alias)
+    try:
+        yield
+    finally:
+        _replica_alias.reset(token)
+
+
+def primary_reads():
+    return replica_reads(False)
+
+
+class ReplicaRouter:
+    """
+    чтения goals и core уходят на реплику только внутри replica_reads,
+    который включает ReplicaMiddleware для безопасных запросов; запись и все остальное идут в default
+    """
+
+    def db_for_read(self, model: type[Model], **hints) -> str | None:
+        alias = _replica_alias.get()
+        if alias is not None and model._meta.app_label in REPLICA_APPS:
+            return alias
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model: type[Model], **hints) -> str:
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1: Model, obj2: Model, **hints) -> bool:
+        # реплики содержат те же данные, что и основная база
+        return True
+
+    def allow_migrate(self, db: str, app_label: str, **hints) -> bool:
+        return db == DEFAULT_DB_ALIAS
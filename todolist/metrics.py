@@ -0,0 +1,58 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+
+class Metrics:
+    """
+    счетчики по ключам (метод API, представление) в пределах процесса;
+    с log_interval снимок пишется в лог не чаще раза в log_interval секунд
+    """
+
+    name = 'metrics'
+    # поля счетчиков одного ключа с начальными значениями
+    fields: dict[str, float] = {}
+
+    def __init__(self, log_interval: float | None = None):
+        self.log_interval = log_interval
+        self._lock = threading.Lock()
+        self._logged_at = time.monotonic()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats: dict[str, dict[str, float]] = defaultdict(lambda: dict(self.fields))
+
+    def add(self, key: str, **values: float) -> None:
+        with self._lock:
+            stats = self._stats[key]
+            for field, value in values.items():
+                stats[field] += value
+        self.log_if_due()
+
+    def peak(self, key: str, **values: float) -> None:
+        with self._lock:
+            stats = self._stats[key]
+            for field, value in values.items():
+                stats[field] = max(stats[field], value)
+
+    def summarize(self, stats: dict[str, float]) -> dict[str, float]:
+        """производные значения снимка, например среднее"""
+        return dict(stats)
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            return {key: self.summarize(stats) for key, stats in self._stats.items()}
+
+    def log_if_due(self) -> None:
+        if self.log_interval is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - self._logged_at < self.log_interval:
+                return
+            self._logged_at = now
+        logger.info('%s: %s', self.name, self.snapshot())
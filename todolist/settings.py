@@ -31,10 +31,12 @@ INSTALLED_APPS = [
     'core',
     'goals',
     'bot',
+    'tasks',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'todolist.db.middleware.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -76,9 +78,59 @@ DATABASES = {
         'PASSWORD': env('POSTGRES_PASSWORD'),
         'HOST': env('POSTGRES_HOST', default='127.0.0.1'),
         'PORT': '5432',
+        # по умолчанию соединение закрывается после запроса: под ASGI потоки sync_to_async меняются,
+        # и соединения, оставленные в них открытыми, копятся; процессам с постоянным набором потоков
+        # (runbot, runtasks) можно задать POSTGRES_CONN_MAX_AGE, для api включить POSTGRES_POOL_SIZE
+        'CONN_MAX_AGE': env.int('POSTGRES_CONN_MAX_AGE', default=0),
+        'CONN_HEALTH_CHECKS': env.bool('POSTGRES_CONN_HEALTH_CHECKS', default=True),
     }
 }
 
+# под ASGI запросы выполняются в разных потоках, соединения переиспользует общий пул процесса
+POSTGRES_POOL_SIZE = env.int('POSTGRES_POOL_SIZE', default=0)
+if POSTGRES_POOL_SIZE:
+    DATABASES['default'].update(
+        ENGINE='todolist.db.pooled',
+        CONN_MAX_AGE=0,
+        POOL_SIZE=POSTGRES_POOL_SIZE,
+        POOL_TIMEOUT=env.float('POSTGRES_POOL_TIMEOUT', default=10),
+    )
+
+# реплики для чтения: хосты через запятую, остальные параметры как у основной базы
+REPLICA_DATABASES = []
+for number, host in enumerate(env.list('POSTGRES_REPLICA_HOSTS', default=[])):
+    DATABASES[f'replica_{number}'] = {**DATABASES['default'], 'HOST': host, 'TEST': {'MIRROR': 'default'}}
+    REPLICA_DATABASES.append(f'replica_{number}')
+DATABASE_ROUTERS = ['todolist.db.routers.ReplicaRouter']
+# сколько секунд после записи клиент читает из основной базы
+REPLICA_PIN_SECONDS = env.int('REPLICA_PIN_SECONDS', default=5)
+
+# локальная память по умолчанию, для нескольких процессов django.core.cache.backends.redis.RedisCache
+CACHES = {
+    'default': {
+        'BACKEND': env.str('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': env.str('CACHE_LOCATION', default=''),
+    }
+}
+# сколько секунд хранятся закешированные списки досок, категорий и целей
+LIST_CACHE_TIMEOUT = env.int('LIST_CACHE_TIMEOUT', default=300)
+# кеш списков включается только с общим для процессов бэкендом: версии досок, которые меняют
+# воркеры api, runbot и runtasks, в памяти одного процесса остальным не видны
+LIST_CACHE_ENABLED = CACHES['default']['BACKEND'] not in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# раз в сколько секунд процесс пишет в лог счетчики запросов к Telegram и кеша списков
+METRICS_LOG_INTERVAL = env.int('METRICS_LOG_INTERVAL', default=600)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {'console': {'class': 'logging.StreamHandler'}},
+    'root': {'handlers': ['console'], 'level': env.str('LOG_LEVEL', default='INFO')},
+}
+
 AUTH_USER_MODEL = 'core.User'
 
 # Password validation
@@ -137,3 +189,11 @@ REST_FRAMEWORK = {
 }
 
 BOT_TOKEN = env.str('BOT_TOKEN')
+BOT_API_URL = env.str('BOT_API_URL', default='https://api.telegram.org')
+BOT_HTTP_POOL_SIZE = env.int('BOT_HTTP_POOL_SIZE', default=10)
+BOT_CONCURRENCY = env.int('BOT_CONCURRENCY', default=8)
+BOT_WEBHOOK_SECRET = env.str('BOT_WEBHOOK_SECRET', default='')
+# лимиты Telegram: около 30 сообщений в секунду всего и 1 в секунду в один чат
+BOT_SEND_RATE = env.float('BOT_SEND_RATE', default=30)
+BOT_SEND_CHAT_RATE = env.float('BOT_SEND_CHAT_RATE', default=1)
+BOT_STATE_STORE = env.str('BOT_STATE_STORE', default='bot.tg.state.DatabaseStateStore')
@@ -8,6 +8,7 @@ urlpatterns = [
     path("oauth/", include("social_django.urls", namespace="social")),
     path("goals/", include(("goals.urls", "goals"))),
     path('bot/', include(('bot.urls', 'bot'))),
+    path('tasks/', include(('tasks.urls', 'tasks'))),
 ]
 
 if settings.DEBUG: